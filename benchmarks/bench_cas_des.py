@@ -0,0 +1,54 @@
+"""strEnc 的 Python 实现与原 des.js（经 execjs 调用）的耗时对比
+
+用法：python -m benchmarks.bench_cas_des [次数]
+
+两种实现输出一致由 tests/test_cas_des.py 的标准向量保证，这里只计时。
+未安装 PyExecJS 或没有可用的 JS 运行时时只测 Python 实现。
+"""
+import sys
+import time
+from pathlib import Path
+
+from utils.cas_des import str_enc
+
+
+# 登录时 rsa 字段的典型长度：学号 + 密码 + lt
+SAMPLE = "202500996677Passw0rd!LT-1024-aBcDeFgHiJkLmNoP-cas"
+
+
+def measure(func, rounds: int) -> float:
+    """返回平均单次耗时（毫秒）"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def main(rounds: int):
+    python_ms = measure(lambda: str_enc(SAMPLE), rounds)
+    print(f"Python strEnc：{python_ms:.3f} ms/次（{rounds} 次）")
+    try:
+        import execjs
+        ctx = execjs.compile((Path(__file__).parent / "sdu_cas_des.js").read_text(encoding="utf-8"))
+    except Exception as e:
+        print(f"跳过 execjs 对比：{e}")
+        return
+    # 与原登录流程一致：每次登录都 compile 一次并调用三次 strEnc
+    execjs_rounds = max(1, rounds // 20)
+    def execjs_login():
+        login_ctx = execjs.compile((Path(__file__).parent / "sdu_cas_des.js").read_text(encoding="utf-8"))
+        for data in ("202500996677", "Passw0rd!", SAMPLE):
+            login_ctx.call("strEnc", data, "1", "2", "3")
+    def python_login():
+        for data in ("202500996677", "Passw0rd!", SAMPLE):
+            str_enc(data)
+    execjs_ms = measure(lambda: ctx.call("strEnc", SAMPLE, "1", "2", "3"), execjs_rounds)
+    print(f"execjs strEnc：{execjs_ms:.3f} ms/次（{execjs_rounds} 次，运行时 {execjs.get().name}）")
+    execjs_login_ms = measure(execjs_login, execjs_rounds)
+    python_login_ms = measure(python_login, rounds)
+    print(f"单次登录的加密开销：execjs {execjs_login_ms:.3f} ms，Python {python_login_ms:.3f} ms，"
+        f"加速 {execjs_login_ms / python_login_ms:.1f} 倍")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,135 @@
+"""统一认证登录的压测：吞吐与尾延迟
+
+用法：python -m benchmarks.bench_cas_load [--users 32 128] [--backend scrape rest] [--rounds 3]
+                                        [--latency-ms 30] [--jitter-ms 10] [--failure-rate 0] [--hang-rate 0]
+
+在子进程中启动 benchmarks.fake_cas，把统一认证与业务系统的地址都指向它；在临时目录的 SQLite 数据库上，
+通过 ASGI 直接调用应用的 /api/user/login。每轮 N 名用户同时登录，同一批用户重复若干轮（rest 方式从第二轮起命中 TGT 缓存），
+报告每秒完成的登录数、p50/p95/p99/最大延迟，以及按状态码统计的失败数。
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+FAKE_CAS_PORT = free_port()
+FAKE_CAS_URL = f"http://127.0.0.1:{FAKE_CAS_PORT}"
+# 须在导入应用之前设置；数据库所在的临时目录在 run() 中创建，导入应用推迟到设置好 DATABASE_URL 之后
+os.environ["SDU_CAS_BASE_URL"] = os.environ["SDU_AIASSIST_BASE_URL"] = FAKE_CAS_URL
+
+import httpx
+
+from benchmarks.fake_cas import FAKE_CAS_PASSWORD
+
+
+def percentile(values: list[float], q: int) -> float:
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1] if len(values) > 1 else values[0]
+
+
+def start_fake_cas(args: argparse.Namespace) -> subprocess.Popen:
+    process = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.fake_cas", "--port", str(FAKE_CAS_PORT),
+        "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms),
+        "--failure-rate", str(args.failure_rate), "--hang-rate", str(args.hang_rate),
+    ])
+    for _ in range(100):
+        try:
+            httpx.get(f"{FAKE_CAS_URL}/_fake/stats").raise_for_status()
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("fake CAS 未能启动")
+
+
+async def login(client: httpx.AsyncClient, sduid: str) -> tuple[float, int]:
+    start = time.perf_counter()
+    response = await client.post("/api/user/login", data={"sduid": sduid, "password": FAKE_CAS_PASSWORD})
+    return (time.perf_counter() - start) * 1000, response.status_code
+
+
+async def measure(client: httpx.AsyncClient, user_num: int, rounds: int) -> tuple[list[float], Counter, float]:
+    """返回 (成功登录的延迟（毫秒）, 各状态码的次数, 总耗时（秒）)"""
+    latencies, statuses = [], Counter()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        results = await asyncio.gather(*(login(client, f"2025{i:08d}") for i in range(user_num)))
+        for (latency, status_code) in results:
+            statuses[status_code] += 1
+            if status_code == 200:
+                latencies.append(latency)
+    return latencies, statuses, time.perf_counter() - start
+
+
+async def main(args: argparse.Namespace):
+    import routers.sdulogin
+    from main import app
+    from sql.database import async_engine, AsyncSession
+    from sql.migrations import upgrade
+
+    async with AsyncSession(async_engine) as session:
+        await upgrade(session)
+    cas = routers.sdulogin.CASClient()
+    app.state.cas_client = cas
+    app.state.cas_login_states = routers.sdulogin.MemoryLoginStateStore()
+    transport = httpx.ASGITransport(app=app)
+    print(f"fake CAS 延迟 {args.latency_ms}±{args.jitter_ms} ms，失败率 {args.failure_rate}，挂起率 {args.hang_rate}")
+    print(f"{'用户数':>6} {'方式':>8} {'成功':>6} {'登录/秒':>8} {'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9} {'最大(ms)':>9}  失败")
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for user_num in args.users:
+            for backend in args.backend:
+                routers.sdulogin.CAS_LOGIN_BACKEND = backend
+                routers.sdulogin.ticket_granting_tickets.clear()
+                (latencies, statuses, elapsed) = await measure(client, user_num, args.rounds)
+                failures = ", ".join(f"{status_code}×{count}" for (status_code, count) in sorted(statuses.items())
+                                    if status_code != 200) or "-"
+                if not latencies:
+                    print(f"{user_num:>6} {backend:>8} {0:>6}  全部失败  {failures}")
+                    continue
+                print(f"{user_num:>6} {backend:>8} {len(latencies):>6} {len(latencies) / elapsed:>8.1f} "
+                    f"{percentile(latencies, 50):>9.1f} {percentile(latencies, 95):>9.1f} {percentile(latencies, 99):>9.1f} "
+                    f"{max(latencies):>9.1f}  {failures}")
+    await cas.aclose()
+    await async_engine.dispose()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="统一认证登录的压测")
+    parser.add_argument("--users", type=int, nargs="+", default=[32, 128])
+    parser.add_argument("--backend", nargs="+", choices=["scrape", "rest"], default=["scrape", "rest"])
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=30)
+    parser.add_argument("--jitter-ms", type=float, default=10)
+    parser.add_argument("--failure-rate", type=float, default=0)
+    parser.add_argument("--hang-rate", type=float, default=0)
+    return parser.parse_args()
+
+
+def run(args: argparse.Namespace):
+    """在临时目录的数据库上压测，结束（包括出错）后删除临时目录"""
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{Path(directory) / 'bench.db'}"
+        fake_cas = start_fake_cas(args)
+        try:
+            asyncio.run(main(args))
+        finally:
+            fake_cas.terminate()
+            fake_cas.wait()
+
+
+if __name__ == "__main__":
+    run(parse_args())
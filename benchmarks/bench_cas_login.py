@@ -0,0 +1,102 @@
+"""模拟网页登录与 CAS REST 接口登录的对比
+
+用法：python -m benchmarks.bench_cas_login [并发用户数 ...]
+
+用 httpx.MockTransport 模拟统一认证，每个请求固定延迟 LATENCY_SECONDS；N 名用户同时登录，
+对比模拟网页登录（设备已绑定）、REST 首次登录与 TGT 缓存命中后的再次登录：
+每次登录发往统一认证的请求数、总耗时、p50/p99 延迟，以及每次登录占用事件循环的 CPU 时间。
+"""
+import asyncio
+import json
+import statistics
+import sys
+import time
+from collections import Counter
+
+import httpx
+
+from routers.sdulogin import CASClient, CASLoginAttempt, CASRestLogin, ticket_granting_tickets
+
+
+LATENCY_SECONDS = 0.02
+
+SERVICE_RESPONSE = """<cas:serviceResponse xmlns:cas="http://www.yale.edu/tp/cas" xmlns:sso="http://sso">
+    <cas:authenticationSuccess>
+        <sso:user>{sduid}</sso:user>
+        <cas:attributes><cas:USER_NAME>用户{sduid}</cas:USER_NAME></cas:attributes>
+    </cas:authenticationSuccess>
+</cas:serviceResponse>"""
+
+
+def mock_cas(requests: Counter) -> httpx.MockTransport:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(LATENCY_SECONDS)
+        requests[request.url.path] += 1
+        path = request.url.path
+        if path == "/cas/login" and request.method == "GET":
+            return httpx.Response(200, headers={"set-cookie": "JSESSIONID=s; Path=/cas"},
+                text='<input name="lt" value="LT-1-cas"/><input name="execution" value="e1s1"/>'
+                    '<input name="_eventId" value="submit"/>')
+        if path == "/cas/device":
+            return httpx.Response(200, text=json.dumps({"info": "binded"}))
+        if path == "/cas/login":
+            return httpx.Response(302, headers={"location": "https://aiassist.sdu.edu.cn/common/actionCasLogin?ticket=ST-1"})
+        if path == "/common/actionCasLogin":
+            return httpx.Response(302, headers={"set-cookie": "sess=s; Path=/", "location": "/"})
+        if path == "/site/user_info":
+            return httpx.Response(200, text=json.dumps({"d": {"user_number": "s", "user_name": "s"}}))
+        if path == "/cas/restlet/tickets":
+            return httpx.Response(200, text=f"TGT-{request.content.decode()}")
+        if path.startswith("/cas/restlet/tickets/"):
+            return httpx.Response(200, text="ST-1")
+        if path == "/cas/serviceValidate":
+            return httpx.Response(200, text=SERVICE_RESPONSE.format(sduid="s"))
+        return httpx.Response(404)
+    return httpx.MockTransport(handler)
+
+
+async def scrape_login(cas: CASClient, sduid: str) -> dict:
+    attempt = CASLoginAttempt(cas, sduid, "password")
+    await attempt.fetch_login_page()
+    return await attempt.run()
+
+
+async def rest_login(cas: CASClient, sduid: str) -> dict:
+    return await CASRestLogin(cas, sduid, "password").run()
+
+
+def percentile(values: list[float], q: int) -> float:
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1] if len(values) > 1 else values[0]
+
+
+async def timed(login, cas: CASClient, sduid: str) -> float:
+    start = time.perf_counter()
+    assert "sduid" in await login(cas, sduid)
+    return (time.perf_counter() - start) * 1000
+
+
+async def measure(login, cas: CASClient, requests: Counter, user_num: int):
+    requests.clear()
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(timed(login, cas, f"2025{i:08d}") for i in range(user_num)))
+    elapsed = time.perf_counter() - start
+    cpu_ms = (time.process_time() - cpu_start) * 1000
+    return sum(requests.values()) / user_num, elapsed, latencies, cpu_ms / user_num
+
+
+async def main(user_nums: list[int]):
+    requests = Counter()
+    cas = CASClient(transport=mock_cas(requests))
+    print(f"{'用户数':>6} {'方式':>12} {'请求/次':>8} {'总耗时(s)':>10} {'p50(ms)':>9} {'p99(ms)':>9} {'CPU(ms)/次':>11}")
+    for user_num in user_nums:
+        ticket_granting_tickets.clear()
+        for (label, login) in (("网页登录", scrape_login), ("REST 首次", rest_login), ("REST 再次", rest_login)):
+            (per_login, elapsed, latencies, cpu_ms) = await measure(login, cas, requests, user_num)
+            print(f"{user_num:>6} {label:>12} {per_login:>8.1f} {elapsed:>10.2f} {percentile(latencies, 50):>9.1f} "
+                f"{percentile(latencies, 99):>9.1f} {cpu_ms:>11.2f}")
+    await cas.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main([int(n) for n in sys.argv[1:]] or [32, 256]))
@@ -0,0 +1,112 @@
+"""管理员集中登录时排行榜接口的延迟
+
+用法：python -m benchmarks.bench_login_storm [登录并发数 ...]
+
+在临时目录的 SQLite 数据库上，通过 ASGI 在同一事件循环中直接调用应用：持续请求 /api/ranking 并记录延迟，
+同时发起 N 个管理员登录，对比 bcrypt 在事件循环中直接计算（原实现）与放入线程池（现实现）时
+登录期间完成的排行榜请求数与 p50/p99。
+登录限流会拒绝同一 IP 的大部分登录，测试时放宽限流，只比较 bcrypt 计算位置的影响。
+"""
+import asyncio
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+DIRECTORY = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{Path(DIRECTORY) / 'bench.db'}"  # 须在导入应用之前设置
+
+import httpx
+
+import routers.user
+from main import app
+from sql.database import async_engine, AsyncSession
+from sql.migrations import upgrade
+from utils.authorization import PasswordPool
+from utils.rate_limit import RateLimiter
+
+
+PROBE_INTERVAL_SECONDS = 0.01
+
+
+class InlinePasswordPool(PasswordPool):
+    """在事件循环中直接计算，即原来的写法"""
+
+    async def run(self, func, *args):
+        return func(*args)
+
+
+def percentile(values: list[float], q: float) -> float:
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1] if len(values) > 1 else values[0]
+
+
+async def prepare(client: httpx.AsyncClient):
+    async with AsyncSession(async_engine) as session:
+        await upgrade(session)
+    await client.post("/api/admin/register", json={"username": "bench", "password": "bench"})
+    token = (await client.post("/api/admin/login", data={"username": "bench", "password": "bench"})).json()["data"]
+    headers = {"Authorization": f"Bearer {token['access_token']}"}
+    now = datetime.now()
+    project = {"name": "bench", "issue_num": 1, "starttime": str(now - timedelta(hours=1)),
+            "deadline": str(now + timedelta(hours=1)),
+            "questions": [{"type": 0, "text": "t", "A": "a", "B": "b", "C": "c", "D": "d", "answer": "B"}]}
+    project_uuid = (await client.post("/api/admin/project", json=project, headers=headers)).json()["data"]["project_uuid"]
+    question_id = (await client.get(f"/api/admin/project/{project_uuid}", headers=headers)).json()["data"]["questions"][0]["id"]
+    for i in range(50):
+        await client.post("/api/user", json={"student_id": f"s{i}", "name": f"n{i}", "party_branch": "b"})
+        await client.post("/api/user/project", json={
+            "student_id": f"s{i}", "project_uuid": project_uuid, "time_used_seconds": str(10 + i),
+            "user_answers": [{"question_id": question_id, "user_answer": "AB"[i % 2]}]})
+
+
+async def probe_ranking(client: httpx.AsyncClient, stop: asyncio.Event) -> list[float]:
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get("/api/ranking", params={"student_id": "s0"})
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200
+        await asyncio.sleep(PROBE_INTERVAL_SECONDS)
+    return latencies
+
+
+async def measure(client: httpx.AsyncClient, login_num: int) -> tuple[list[float], float]:
+    """返回 (登录期间排行榜请求的延迟（毫秒）, 全部登录完成的耗时（秒）)"""
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_ranking(client, stop))
+    await asyncio.sleep(0.1)
+    start = time.perf_counter()
+    responses = await asyncio.gather(*(
+        client.post("/api/admin/login", data={"username": "bench", "password": "bench"}) for _ in range(login_num)
+    ))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    assert all(response.status_code in (200, 429) for response in responses)
+    return await probe, elapsed
+
+
+async def main(login_nums: list[int]):
+    routers.user.login_ip_limiter = RateLimiter(1e9, burst=10**9)
+    routers.user.login_username_limiter = RateLimiter(1e9, burst=10**9)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await prepare(client)
+        print(f"{'登录数':>6} {'bcrypt 位置':>12} {'排行榜请求数':>12} {'p50(ms)':>9} {'p99(ms)':>9} {'最大(ms)':>9} {'登录耗时(s)':>12}")
+        for login_num in login_nums:
+            for (label, pool) in (("事件循环", InlinePasswordPool()), ("线程池", PasswordPool(max_pending=login_num))):
+                routers.user.password_pool = pool
+                (latencies, elapsed) = await measure(client, login_num)
+                print(f"{login_num:>6} {label:>12} {len(latencies):>12} {percentile(latencies, 50):>9.1f} {percentile(latencies, 99):>9.1f} "
+                    f"{max(latencies):>9.1f} {elapsed:>12.2f}")
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main([int(n) for n in sys.argv[1:]] or [8, 32]))
+    finally:
+        shutil.rmtree(DIRECTORY, ignore_errors=True)
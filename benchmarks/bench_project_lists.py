@@ -0,0 +1,102 @@
+"""项目列表接口的查询条数与耗时
+
+用法：python -m benchmarks.bench_project_lists [项目数 ...]
+
+在临时 SQLite 数据库上造数据，报告每个列表接口执行的 SQL 条数与平均耗时。
+条数不随项目数、作答记录数增长（防止 N+1 查询回归）由 tests/test_queries.py 断言。
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+DATA_DIR = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{Path(DATA_DIR.name) / 'bench.db'}"
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+import main
+from sql.database import async_engine, AsyncSession
+from sql.migrations import upgrade
+
+
+RECORDS_PER_PROJECT = 50
+ROUNDS = 20
+
+URLS = (
+    "/api/admin/projects",
+    "/api/user/projects/all",
+    "/api/user/projects/participate",
+)
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+def seed(client: TestClient, headers: dict, first_issue: int, project_num: int):
+    now = datetime.now()
+    for issue_num in range(first_issue, first_issue + project_num):
+        project = {"name": f"第{issue_num}期", "issue_num": issue_num,
+                "starttime": str(now - timedelta(hours=1)), "deadline": str(now + timedelta(hours=1)),
+                "questions": [{"type": 0, "text": "t", "A": "a", "B": "b", "C": "c", "D": "d", "answer": "B"}]}
+        project_uuid = client.post("/api/admin/project", json=project, headers=headers).json()["data"]["project_uuid"]
+        question_id = client.get(f"/api/admin/project/{project_uuid}", headers=headers).json()["data"]["questions"][0]["id"]
+        for i in range(RECORDS_PER_PROJECT):
+            client.post("/api/user/project", json={
+                "student_id": f"s{i}", "project_uuid": project_uuid, "time_used_seconds": "10",
+                "user_answers": [{"question_id": question_id, "user_answer": "B"}]})
+
+
+def measure(client: TestClient, counter: QueryCounter, url: str, headers: dict, params: dict):
+    """返回 (SQL 条数, 平均耗时毫秒)"""
+    counter.count = 0
+    response = client.get(url, headers=headers, params=params)
+    assert response.status_code == 200, response.text
+    query_num = counter.count
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        client.get(url, headers=headers, params=params)
+    return query_num, (time.perf_counter() - start) / ROUNDS * 1000
+
+
+async def create_tables():
+    async with AsyncSession(async_engine) as session:
+        await upgrade(session)
+    await async_engine.dispose()  # 连接池中的连接属于当前事件循环，交给 TestClient 前清空
+
+
+def run_benchmark(project_nums: list[int]):
+    asyncio.run(create_tables())
+    client = TestClient(main.app)
+    client.post("/api/admin/register", json={"username": "bench", "password": "bench"})
+    token = client.post("/api/admin/login", data={"username": "bench", "password": "bench"}).json()["data"]["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    for i in range(RECORDS_PER_PROJECT):
+        client.post("/api/user", json={"name": f"n{i}", "student_id": f"s{i}", "party_branch": "b"})
+    counter = QueryCounter()
+    event.listen(async_engine.sync_engine, "before_cursor_execute", counter)
+    seeded = 0
+    print(f"{'项目数':>6} {'接口':<32} {'SQL条数':>8} {'耗时(ms)':>10}")
+    for project_num in project_nums:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", counter)
+        seed(client, headers, seeded + 1, project_num - seeded)
+        seeded = project_num
+        event.listen(async_engine.sync_engine, "before_cursor_execute", counter)
+        for url in URLS:
+            #* 学生接口会把 Authorization 当作学生令牌校验，只给管理员接口带管理员令牌
+            url_headers = headers if url.startswith("/api/admin/") else {}
+            query_num, elapsed_ms = measure(client, counter, url, url_headers, {"student_id": "s0"})
+            print(f"{project_num:>6} {url:<32} {query_num:>8} {elapsed_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    run_benchmark([int(n) for n in sys.argv[1:]] or [1, 10, 30])
@@ -0,0 +1,89 @@
+"""发布项目时写入题目的耗时随题目数量的变化
+
+用法：python -m benchmarks.bench_publish [题目数量 ...]
+
+在临时目录的 SQLite 数据库（与线上相同的 PRAGMA）上对比两种写法：
+逐题 add/commit/refresh（原实现）与一条批量 INSERT ... RETURNING 加一次提交（现实现）。
+"""
+import asyncio
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from uuid import uuid1
+
+from sql.database import build_engine, AsyncSession
+from sql.migrations import upgrade
+import sql.models as models
+import utils.schemas as schemas
+from routers.qa import insert_questions
+
+
+ROUNDS = 5
+
+
+def make_questions(question_num: int) -> list[schemas.QuestionCreateRequest]:
+    return [
+        schemas.QuestionCreateRequest(type=i % 2, text=f"第 {i + 1} 题", A="a", B="b", C="c", D="d",
+                                    answer="B" if i % 2 == 0 else "ABD")
+        for i in range(question_num)
+    ]
+
+
+def make_project(admin_id: int, issue_num: int) -> models.Project:
+    now = datetime.now()
+    return models.Project(uuid=str(uuid1()), name="bench", issue_num=issue_num,
+                        starttime=now, deadline=now + timedelta(days=1), status=1, creater_id=admin_id)
+
+
+async def publish_per_question(session, project, questions):
+    session.add(project)
+    await session.commit()
+    for question in questions:
+        question_for_db = models.Question.model_validate(question, update={"project_uuid": project.uuid})
+        session.add(question_for_db)
+        await session.commit()
+        await session.refresh(question_for_db)
+
+
+async def publish_bulk(session, project, questions):
+    session.add(project)
+    await session.flush()
+    await insert_questions(session, project.uuid, questions)
+    await session.commit()
+
+
+async def measure(engine, publish, admin_id: int, questions, issue_nums) -> float:
+    """返回平均单次发布耗时（毫秒）"""
+    elapsed = 0.0
+    for _ in range(ROUNDS):
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            project = make_project(admin_id, next(issue_nums))
+            start = time.perf_counter()
+            await publish(session, project, questions)
+            elapsed += time.perf_counter() - start
+    return elapsed / ROUNDS * 1000
+
+
+async def main(question_nums: list[int]):
+    with tempfile.TemporaryDirectory() as directory:
+        engine = build_engine(f"sqlite+aiosqlite:///{Path(directory) / 'bench.db'}")
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            await upgrade(session)
+            admin = models.Admin(username="bench", hashed_password="")
+            session.add(admin)
+            await session.commit()
+            admin_id = admin.id
+        issue_nums = iter(range(1, 1_000_000))
+        print(f"{'题目数':>6} {'逐题提交(ms)':>14} {'批量插入(ms)':>14} {'加速':>8}")
+        for question_num in question_nums:
+            questions = make_questions(question_num)
+            per_question_ms = await measure(engine, publish_per_question, admin_id, questions, issue_nums)
+            bulk_ms = await measure(engine, publish_bulk, admin_id, questions, issue_nums)
+            print(f"{question_num:>6} {per_question_ms:>14.2f} {bulk_ms:>14.2f} {per_question_ms / bulk_ms:>7.1f}x")
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main([int(n) for n in sys.argv[1:]] or [10, 50, 100, 200]))
@@ -0,0 +1,106 @@
+"""截止前集中提交时，逐条提交与合并提交的吞吐对比
+
+用法：python -m benchmarks.bench_submissions [并发提交数 ...]
+
+在临时目录的 SQLite 数据库（与线上相同的 PRAGMA）上，同时发起 N 个提交，每个提交使用自己的会话，
+对比写入任务未启动时的逐条提交与不同批次大小的 SubmissionWriter，并核对参与人数、重复提交与重试的处理。
+逐条提交在并发较高时会有提交等不到 SQLite 写锁（database is locked），计入“锁超时”一列而不中断压测。
+"""
+import asyncio
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from uuid import uuid1
+
+from sqlalchemy.exc import OperationalError
+
+from sql.database import build_engine, AsyncSession
+from sql.migrations import upgrade
+from sql.submission_writer import Submission, SubmissionWriter, DuplicateSubmission
+import sql.models as models
+
+
+BATCH_SIZES = (16, 64, 256)
+LOCKED = "locked"  # 等待写锁超时的提交
+
+
+async def prepare(engine, submit_num: int) -> list[str]:
+    """建好一名管理员与 submit_num 名用户，返回学号列表"""
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        await upgrade(session)
+        session.add(models.Admin(username="bench", hashed_password=""))
+        student_ids = [f"s{i}" for i in range(submit_num)]
+        session.add_all(models.User(student_id=student_id, name=student_id, party_branch="b")
+                        for student_id in student_ids)
+        await session.commit()
+    return student_ids
+
+
+async def new_project(engine, issue_num: int) -> str:
+    now = datetime.now()
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        project = models.Project(uuid=str(uuid1()), name="bench", issue_num=issue_num,
+                                starttime=now, deadline=now + timedelta(days=1), status=1, creater_id=1)
+        session.add(project)
+        await session.commit()
+        return project.uuid
+
+
+async def submit(engine, writer, student_id: str, project_uuid: str, idempotency_key: str | None = None) -> int | str | None:
+    """返回记录 id；重复提交返回 None，等待写锁超时返回 LOCKED"""
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        submission = Submission(student_id=student_id, project_uuid=project_uuid, correct_num=1,
+                                time_used_seconds=10.0, answer="", valid_flag=True,
+                                idempotency_key=idempotency_key)
+        try:
+            return (await writer.submit(submission, session)).record_id
+        except DuplicateSubmission:
+            return None
+        except OperationalError as e:
+            if "database is locked" not in str(e):
+                raise
+            return LOCKED
+
+
+async def measure(engine, writer, student_ids, project_uuid) -> tuple[float, int]:
+    """返回 (耗时（毫秒）, 锁超时的提交数)，并核对参与人数、重复提交与重试"""
+    start = time.perf_counter()
+    results = await asyncio.gather(*(submit(engine, writer, s, project_uuid, s) for s in student_ids))
+    elapsed = time.perf_counter() - start
+    written = {s: record_id for (s, record_id) in zip(student_ids, results) if record_id != LOCKED}
+    sample = list(written)[:10]
+    duplicated = await asyncio.gather(*(submit(engine, writer, s, project_uuid) for s in sample))
+    retried = await asyncio.gather(*(submit(engine, writer, s, project_uuid, s) for s in sample))
+    async with AsyncSession(engine) as session:
+        participate_num = (await session.get(models.Project, project_uuid)).participate_num
+    assert None not in written.values() and len(set(written.values())) == len(written)
+    assert participate_num == len(written), (participate_num, len(written))
+    assert all(record_id in (None, LOCKED) for record_id in duplicated)
+    assert all(record_id in (written[s], LOCKED) for (s, record_id) in zip(sample, retried))
+    return elapsed * 1000, len(student_ids) - len(written)
+
+
+async def main(submit_nums: list[int]):
+    with tempfile.TemporaryDirectory() as directory:
+        engine = build_engine(f"sqlite+aiosqlite:///{Path(directory) / 'bench.db'}")
+        student_ids = await prepare(engine, max(submit_nums))
+        issue_nums = iter(range(1, 1_000_000))
+        print(f"{'并发数':>6} {'方式':>12} {'耗时(ms)':>10} {'每秒提交':>10} {'锁超时':>6}")
+        for submit_num in submit_nums:
+            writers = [("逐条提交", SubmissionWriter())]
+            writers += [(f"批次 {batch_size}", SubmissionWriter(batch_size=batch_size)) for batch_size in BATCH_SIZES]
+            for (label, writer) in writers:
+                if label != "逐条提交":
+                    writer.start(engine)
+                project_uuid = await new_project(engine, next(issue_nums))
+                (elapsed_ms, locked_num) = await measure(engine, writer, student_ids[:submit_num], project_uuid)
+                await writer.stop()
+                print(f"{submit_num:>6} {label:>12} {elapsed_ms:>10.1f} {(submit_num - locked_num) / elapsed_ms * 1000:>10.0f} "
+                    f"{locked_num:>6}")
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main([int(n) for n in sys.argv[1:]] or [100, 500, 1000]))
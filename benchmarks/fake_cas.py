@@ -0,0 +1,218 @@
+"""本地模拟的山大统一认证，用于在不访问 pass.sdu.edu.cn 的情况下测试与压测登录
+
+用法：python -m benchmarks.fake_cas [--port 8900] [--latency-ms 0] [--jitter-ms 0]
+                                  [--failure-rate 0] [--hang-rate 0] [--bind-required]
+
+提供 routers/sdulogin.py 用到的全部接口：
+- 网页登录：GET /cas/login（含 lt/execution）、POST /cas/device、POST /cas/login（302 跳转到业务系统）、
+  GET /common/actionCasLogin、GET /site/user_info
+- REST 接口：POST /cas/restlet/tickets、POST /cas/restlet/tickets/{tgt}、GET /cas/serviceValidate
+
+任意学号均可登录，密码为 FAKE_CAS_PASSWORD；开启 --bind-required 时新设备须用短信验证码 FAKE_CAS_SMS_CODE 绑定。
+每个请求先等待 latency±jitter 毫秒，再按 failure-rate 返回 503、按 hang-rate 挂起 hang-seconds 秒，
+用来检验客户端的超时与错误处理。运行中可用 PUT /_fake/config 修改这些参数，GET /_fake/stats 查看各接口请求数。
+"""
+import argparse
+import asyncio
+import os
+import random
+import secrets
+from collections import Counter
+from urllib.parse import quote
+
+from fastapi import FastAPI, Form, Request
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, RedirectResponse, Response
+from pydantic import BaseModel
+
+from utils.cache import LRUCache
+from utils.cas_des import str_dec
+
+
+FAKE_CAS_PASSWORD = os.getenv("FAKE_CAS_PASSWORD", "password")
+FAKE_CAS_SMS_CODE = os.getenv("FAKE_CAS_SMS_CODE", "123456")
+FAKE_CAS_STATE_SIZE = 100_000  # 各类会话与票据各自最多保存的数量
+
+
+class FakeCASConfig(BaseModel):
+    latency_ms: float = float(os.getenv("FAKE_CAS_LATENCY_MS", "0"))
+    jitter_ms: float = float(os.getenv("FAKE_CAS_JITTER_MS", "0"))
+    failure_rate: float = float(os.getenv("FAKE_CAS_FAILURE_RATE", "0"))  # 返回 503 的比例
+    hang_rate: float = float(os.getenv("FAKE_CAS_HANG_RATE", "0"))  # 挂起不响应的比例
+    hang_seconds: float = float(os.getenv("FAKE_CAS_HANG_SECONDS", "30"))
+    bind_required: bool = os.getenv("FAKE_CAS_BIND_REQUIRED", "false").lower() in ("1", "true")
+
+
+config = FakeCASConfig()
+stats = Counter()
+
+login_pages = LRUCache(FAKE_CAS_STATE_SIZE)  # JSESSIONID -> 未使用的 lt
+bound_devices = LRUCache(FAKE_CAS_STATE_SIZE)  # 学号 -> True
+service_tickets = LRUCache(FAKE_CAS_STATE_SIZE)  # ST -> 学号，只能使用一次
+service_sessions = LRUCache(FAKE_CAS_STATE_SIZE)  # 业务系统会话 -> 学号
+ticket_granting_tickets = LRUCache(FAKE_CAS_STATE_SIZE)  # TGT -> 学号
+
+app = FastAPI(title="fake CAS", docs_url=None, redoc_url=None, openapi_url=None)
+
+
+@app.middleware("http")
+async def inject_faults(request: Request, call_next):
+    if request.url.path.startswith("/_fake"):
+        return await call_next(request)
+    stats[request.url.path] += 1
+    delay = config.latency_ms + random.uniform(-config.jitter_ms, config.jitter_ms)
+    if delay > 0:
+        await asyncio.sleep(delay / 1000)
+    roll = random.random()
+    if roll < config.failure_rate:
+        stats["failures"] += 1
+        return PlainTextResponse("Service Unavailable", status_code=503)
+    if roll < config.failure_rate + config.hang_rate:
+        stats["hangs"] += 1
+        await asyncio.sleep(config.hang_seconds)
+    return await call_next(request)
+
+
+@app.get("/_fake/stats")
+async def get_stats():
+    return dict(stats)
+
+
+@app.put("/_fake/config")
+async def put_config(new_config: FakeCASConfig):
+    global config
+    config = new_config
+    stats.clear()
+    return config
+
+
+def service_with_ticket(service: str, ticket: str) -> str:
+    return f"{service}{'&' if '?' in service else '?'}ticket={ticket}"
+
+
+def new_ticket(prefix: str) -> str:
+    return f"{prefix}-{secrets.token_hex(8)}-cas"
+
+
+@app.get("/cas/login", response_class=HTMLResponse)
+async def login_page(request: Request):
+    session_id = request.cookies.get("JSESSIONID") or secrets.token_hex(16)
+    lt = new_ticket("LT")
+    login_pages.put(session_id, lt)
+    response = HTMLResponse(
+        f'<form id="loginForm" method="post">'
+        f'<input type="hidden" id="lt" name="lt" value="{lt}" />'
+        f'<input type="hidden" name="execution" value="e1s1" />'
+        f'<input type="hidden" name="_eventId" value="submit" /></form>')
+    response.set_cookie("JSESSIONID", session_id, path="/cas", httponly=True)
+    return response
+
+
+@app.post("/cas/device")
+async def device(m: str = Form(), u: str = Form(""), p: str = Form(""), i: str = Form(""), c: str = Form("")):
+    match m:
+        case "1": # 设备检测
+            if str_dec(p) != FAKE_CAS_PASSWORD:
+                return {"info": "validErr"}
+            if not config.bind_required or bound_devices.get(str_dec(u)):
+                return {"info": "binded"}
+            return {"info": "bind", "m": "138****0000"}
+        case "2": # 发送短信验证码
+            return PlainTextResponse("send")
+        case "3": # 校验验证码并绑定
+            if c != FAKE_CAS_SMS_CODE:
+                return PlainTextResponse("codeErr")
+            bound_devices.put(i, True)
+            return PlainTextResponse("ok")
+    return Response(status_code=400)
+
+
+@app.post("/cas/login")
+async def login(request: Request, service: str, rsa: str = Form(), ul: int = Form(), pl: int = Form(),
+                lt: str = Form(), execution: str = Form(), event_id: str = Form(alias="_eventId")):
+    session_id = request.cookies.get("JSESSIONID", "")
+    if not lt or login_pages.get(session_id) != lt:
+        return await login_page(request)
+    login_pages.discard(session_id)  # lt 只能使用一次
+    plain = str_dec(rsa)
+    (sduid, password) = (plain[:ul], plain[ul:ul + pl])
+    if password != FAKE_CAS_PASSWORD or plain[ul + pl:] != lt:
+        return await login_page(request)  # 与真实页面一样，失败时返回登录页而不跳转
+    ticket = new_ticket("ST")
+    service_tickets.put(ticket, sduid)
+    return RedirectResponse(service_with_ticket(service, ticket), status_code=302)
+
+
+@app.get("/common/actionCasLogin")
+async def service_login(ticket: str):
+    sduid = service_tickets.get(ticket)
+    if sduid is None:
+        return PlainTextResponse("invalid ticket", status_code=403)
+    service_tickets.discard(ticket)
+    session_id = secrets.token_hex(16)
+    service_sessions.put(session_id, sduid)
+    response = RedirectResponse("/page/site/newPc?login_return=true", status_code=302)
+    response.set_cookie("sess", session_id, path="/", httponly=True)
+    return response
+
+
+@app.get("/site/user_info")
+async def user_info(request: Request):
+    sduid = service_sessions.get(request.cookies.get("sess", ""))
+    if sduid is None:
+        return JSONResponse({"e": 1, "m": "未登录"})
+    return {"e": 0, "d": {"user_number": sduid, "user_name": f"用户{sduid}"}}
+
+
+@app.post("/cas/restlet/tickets")
+async def grant_ticket(sduid: str = Form(), password: str = Form()):
+    if password != FAKE_CAS_PASSWORD:
+        return PlainTextResponse("error.authentication.credentials.bad", status_code=400)
+    tgt = new_ticket("TGT")
+    ticket_granting_tickets.put(tgt, sduid)
+    return PlainTextResponse(tgt, status_code=201)
+
+
+@app.post("/cas/restlet/tickets/{tgt}")
+async def grant_service_ticket(tgt: str):
+    sduid = ticket_granting_tickets.get(tgt)
+    if sduid is None:
+        return PlainTextResponse("TicketGrantingTicket could not be found", status_code=404)
+    ticket = new_ticket("ST")
+    service_tickets.put(ticket, sduid)
+    return PlainTextResponse(ticket)
+
+
+@app.get("/cas/serviceValidate")
+async def service_validate(ticket: str, service: str):
+    sduid = service_tickets.get(ticket)
+    service_tickets.discard(ticket)
+    if sduid is None:
+        body = (f'<cas:authenticationFailure code="INVALID_TICKET">未能识别出目标 {quote(ticket)} 票根'
+                f'</cas:authenticationFailure>')
+    else:
+        body = (f"<cas:authenticationSuccess><sso:user>{sduid}</sso:user><cas:attributes>"
+                f"<cas:USER_NAME>用户{sduid}</cas:USER_NAME></cas:attributes></cas:authenticationSuccess>")
+    return Response(f'<cas:serviceResponse xmlns:cas="http://www.yale.edu/tp/cas" xmlns:sso="http://www.sdu.edu.cn/sso">'
+                    f'{body}</cas:serviceResponse>', media_type="application/xml")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="本地模拟的山大统一认证")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=config.latency_ms)
+    parser.add_argument("--jitter-ms", type=float, default=config.jitter_ms)
+    parser.add_argument("--failure-rate", type=float, default=config.failure_rate)
+    parser.add_argument("--hang-rate", type=float, default=config.hang_rate)
+    parser.add_argument("--hang-seconds", type=float, default=config.hang_seconds)
+    parser.add_argument("--bind-required", action="store_true", default=config.bind_required)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    args = parse_args()
+    config = FakeCASConfig(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, failure_rate=args.failure_rate,
+                        hang_rate=args.hang_rate, hang_seconds=args.hang_seconds, bind_required=args.bind_required)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -1,5 +1,10 @@
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from sql.database import create_db_and_tables
+from sql.database import async_engine, AsyncSession
+from sql.migrations import pending_migrations
+from sql.project_status import status_scheduler
+from sql.submission_writer import submission_writer
 from routers import user, qa, ranking, sdulogin
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -20,8 +25,26 @@ tags_metadata = [
 ]
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    #* 表结构由部署时执行的 python -m sql.migrations 维护，启动时只做检查
+    async with AsyncSession(async_engine) as session:
+        migrations = await pending_migrations(session)
+    if migrations:
+        logging.getLogger("uvicorn.error").warning(
+            "数据库有 %d 个迁移尚未执行，请先运行 python -m sql.migrations", len(migrations))
+    status_scheduler.start(async_engine)
+    submission_writer.start(async_engine)
+    app.state.cas_client = sdulogin.CASClient()
+    app.state.cas_login_states = sdulogin.MemoryLoginStateStore()
+    yield
+    await app.state.cas_client.aclose()
+    await submission_writer.stop()  # 先写完排队中的提交
+    await status_scheduler.stop()
+
+
 app = FastAPI(title="党建问答系统", version="0.1.0", 
-            openapi_tags=tags_metadata)
+            openapi_tags=tags_metadata, lifespan=lifespan)
 
 
 app.include_router(user.router, tags=["用户模块"], prefix="/api")
@@ -38,8 +61,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-create_db_and_tables()
-
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app="main:app", host="127.0.0.1", port=8000, reload=True)
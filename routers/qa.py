@@ -1,38 +1,105 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 # from idna import valid_contextj
-from sqlmodel import Session, select, func
+from sqlmodel import select, insert
+from sqlalchemy.orm import selectinload
 import utils.schemas as schemas
-from sql.database import get_session
+import sql.queries as queries
+from sql.database import AsyncSession, async_engine, get_session
 from utils.authorization import *
 from uuid import uuid1
 import utils.response_format as rf
-import ast
-from datetime import datetime
+from utils.leaderboard import leaderboards
+from utils.cache import project_payloads
+from sql.project_status import project_status, status_scheduler
+from sql.stats import rebuild_user_stats, regrade_project_records
+from sql.submission_writer import Submission, DuplicateSubmission, submission_writer
+from utils.grading import answer_keys, compile_answer_key, GradingError, OPTION_BITS, option_mask
+from utils.answer_codec import encode_answers, mask_to_options
+from utils.export import EXPORT_FORMATS, ExportFormat
 from sqlalchemy.exc import IntegrityError
 
 
 router = APIRouter()
 
 
-def check_project_status(project_in_db, starttime, deadline, now_status, session):
-    now_time = datetime.now()
-    if now_time < starttime:
-        truth_status = 0  # 未开始
-    elif now_time > deadline:
-        truth_status = 2  # 已结束
-    else:
-        truth_status = 1  # 进行中
-    if truth_status != now_status:  # 状态发生变化，需要更新
-        project_in_db.status = truth_status
-        session.add(project_in_db)
-        session.commit()
-        session.refresh(project_in_db)
+async def get_answer_key(project, session):
+    """优先使用缓存的答案，未命中或版本落后于项目时一次查询编译出该项目的答案"""
+    answer_key = answer_keys.get(project.uuid, project.version)
+    if answer_key is None:
+        questions = (await session.exec(
+            select(models.Question.id, models.Question.answer).filter_by(project_uuid=project.uuid)
+        )).all()
+        answer_key = compile_answer_key(project.uuid, questions, project.version)
+        answer_keys.put(answer_key)
+    return answer_key
+
+
+async def insert_questions(session, project_uuid, questions):
+    """一条批量 INSERT 写入项目的全部题目，不提交事务
+
+    通过 RETURNING 一次取回各题的 (id, answer) 用于编译答案；编译只需 id 与答案的对应关系，
+    不要求返回顺序与提交顺序一致，因此不加 sort_by_parameter_order，否则 SQLite 会退化为逐行插入
+    """
+    if not questions:
+        return []
+    statement = insert(models.Question).returning(models.Question.id, models.Question.answer)
+    rows = [question.model_dump(exclude={"id"}) | {"project_uuid": project_uuid} for question in questions]
+    return (await session.exec(statement, params=rows)).all()
+
+
+def serialize_project(project) -> bytes:
+    """项目详情中不随时间与作答变化的部分，结果按版本缓存"""
+    project_data = project.model_dump(exclude={"status", "participate_num"})
+    project_data["starttime"] = project_data["starttime"].strftime("%Y-%m-%d %H:%M:%S")
+    project_data["deadline"] = project_data["deadline"].strftime("%Y-%m-%d %H:%M:%S")
+    project_data["questions"] = [
+        question.model_dump(exclude={"project_uuid"}) for question in project.questions
+    ]
+    return rf.json_fields(project_data)
+
+
+async def resolve_latest_project_uuid(session):
+    """最新一期项目的 uuid，缓存在进程内，本进程发布、修改、删除项目时失效；
+    其他进程发布的项目最迟在 LATEST_PROJECT_TTL_SECONDS 秒后成为最新一期"""
+    latest_uuid = project_payloads.latest_uuid
+    if latest_uuid is None:
+        latest_uuid = (await session.exec(
+            select(models.Project.uuid).order_by(models.Project.issue_num.desc()).limit(1)
+        )).first()
+        if latest_uuid is not None:
+            project_payloads.set_latest(latest_uuid)
+    return latest_uuid
+
+
+async def get_project_payload(session, project_uuid):
+    """返回 (缓存的项目详情, 随时变化的字段)，项目不存在时返回 None
+
+    每次只按主键读取版本号等几列，版本与缓存一致时不再加载题目、不再序列化
+    """
+    Project = models.Project
+    row = (await session.exec(
+        select(Project.version, Project.starttime, Project.deadline, Project.participate_num)
+        .where(Project.uuid == project_uuid)
+    )).first()
+    if row is None:
+        return None
+    payload = project_payloads.get(project_uuid, row.version)
+    if payload is None:
+        project = await session.get(Project, project_uuid, options=[selectinload(Project.questions)])
+        payload = serialize_project(project)
+        project_payloads.put(project.uuid, project.version, payload)
+    return payload, {
+        "status": project_status(row.starttime, row.deadline),
+        "participate_num": row.participate_num,
+    }
 
 
 @router.post("/admin/project",
             summary="管理员发布一期问答项目")
 async def create_project(project: schemas.ProjectCreateRequest, 
-session: Session=Depends(get_session),
+session: AsyncSession=Depends(get_session),
 admin=Depends(admin_verify_token)):
     """管理员上传题目并发布一期问答项目
 
@@ -41,38 +108,28 @@ admin=Depends(admin_verify_token)):
     返回创建的项目的uuid
     """
     project_uuid = str(uuid1())
-    now_time = datetime.now()
-    project_status = 0
-    if now_time < project.starttime:
-        project_status = 0  # 未开始
-    elif now_time > project.deadline:
-        project_status = 2  # 已结束
-    else:
-        project_status = 1  # 进行中
     project_for_db = models.Project(
         uuid=project_uuid,
         name=project.name,
         issue_num=project.issue_num,
         starttime=project.starttime,
         deadline=project.deadline,
-        status=project_status,
+        status=project_status(project.starttime, project.deadline),
         creater_id=admin.id
     )
+    #* 项目与全部题目在同一事务中写入，中途失败不会留下只发布了一半的项目
+    session.add(project_for_db)
     try:
-        session.add(project_for_db)
-        session.commit()
-        session.refresh(project_for_db)
+        await session.flush()
     except IntegrityError:
+        await session.rollback()
         return rf.res_400(message="该期号项目已经存在")
-    
-    for question in project.questions:
-        question_for_db = models.Question.model_validate(question,
-                update={
-                    "project_uuid": project_uuid
-            })
-        session.add(question_for_db)
-        session.commit()
-        session.refresh(question_for_db)
+    questions_for_db = await insert_questions(session, project_uuid, project.questions)
+    await session.commit()
+    answer_keys.put(compile_answer_key(project_uuid, questions_for_db))
+    leaderboards.invalidate_latest()
+    project_payloads.invalidate_latest()
+    status_scheduler.wake()  # 按新项目的开始/截止时间重新安排状态更新
     
     return rf.res_201(message="项目创建成功", data={
         "project_uuid": project_uuid,
@@ -83,18 +140,12 @@ admin=Depends(admin_verify_token)):
             summary="管理员获取项目详情(问题与答案)",
             dependencies=[Depends(admin_verify_token)])
 async def get_project(project_uuid: str, 
-session: Session=Depends(get_session)):
-    project = session.get(models.Project, project_uuid)
-    if not project:
+session: AsyncSession=Depends(get_session)):
+    project_payload = await get_project_payload(session, project_uuid)
+    if project_payload is None:
         return rf.res_404(message="项目不存在")
-    check_project_status(project, project.starttime, project.deadline, project.status, session)
-    project_data = project.model_dump()
-    project_data["starttime"] = project_data["starttime"].strftime("%Y-%m-%d %H:%M:%S")
-    project_data["deadline"] = project_data["deadline"].strftime("%Y-%m-%d %H:%M:%S")
-    project_data["questions"] = [
-        question.model_dump(exclude={"project_uuid"}) for question in project.questions
-    ]
-    return rf.res_200(message="项目详情获取成功", data=project_data)
+    (payload, project_data) = project_payload
+    return rf.res_200_spliced("项目详情获取成功", payload, rf.json_fields(project_data))
 
 
 @router.put("/admin/project/{project_uuid}",
@@ -102,73 +153,178 @@ session: Session=Depends(get_session)):
 async def update_project(project_uuid: str, 
 project: schemas.ProjectUpdateRequest, 
 admin=Depends(admin_verify_token),
-session: Session=Depends(get_session)):
+session: AsyncSession=Depends(get_session)):
     """前端把修改后的整个项目信息（不论单个字段是否做了更改）重新发一遍
+
+    与库中的项目逐题比较：修改有变化的题目、删除未列出的题目、插入新题目，已有作答记录保留；
+    每次更新项目版本加 1，答案发生变化时按新答案重算已有作答记录的答对数
     """
-    project_in_db = session.get(models.Project, project_uuid)
+    project_in_db = await session.get(models.Project, project_uuid, options=[selectinload(models.Project.questions)])
     if not project_in_db:
         return rf.res_404(message="项目不存在")
     project_uuid = project_in_db.uuid
-    # 删除原项目
-    session.delete(project_in_db)
-    session.commit()
-    # 创建新项目
-    now_time = datetime.now()
-    project_status = 0
-    if now_time < project.starttime:
-        project_status = 0  # 未开始
-    elif now_time > project.deadline:
-        project_status = 2  # 已结束
-    else:
-        project_status = 1  # 进行中
-    project_for_db = models.Project(
-        uuid=project_uuid,
-        name=project.name,
-        issue_num=project.issue_num,
-        starttime=project.starttime,
-        deadline=project.deadline,
-        status=project_status,
-        creater_id=admin.id
-    )
     try:
-        session.add(project_for_db)
-        session.commit()
-        session.refresh(project_for_db)
+        (matched, deleted, created) = diff_questions(project_in_db.questions, project.questions)
+    except ValueError as e:
+        return rf.res_400(message=str(e))
+    #* 所有修改在同一事务中完成，期号冲突时项目保持不变
+    answer_changed = bool(deleted or created)
+    for (question_in_db, question) in matched:
+        changes = {
+            field: value for (field, value) in question.model_dump(exclude={"id"}).items()
+            if getattr(question_in_db, field) != value
+        }
+        if changes:
+            answer_changed = answer_changed or "answer" in changes
+            question_in_db.sqlmodel_update(changes)
+            session.add(question_in_db)
+    for question_in_db in deleted:
+        await session.delete(question_in_db)
+    project_in_db.sqlmodel_update({
+        "name": project.name,
+        "issue_num": project.issue_num,
+        "starttime": project.starttime,
+        "deadline": project.deadline,
+        "status": project_status(project.starttime, project.deadline),
+        "creater_id": admin.id,
+    })
+    project_in_db.version += 1  # 缓存的项目详情与答案按版本失效
+    session.add(project_in_db)
+    try:
+        await session.flush()
     except IntegrityError:
+        await session.rollback()
         return rf.res_400(message="该期号项目已经存在")
-    
-    for question in project.questions:
-        question_for_db = models.Question.model_validate(question,
-                update={
-                    "project_uuid": project_uuid
-            })
-        session.add(question_for_db)
-        session.commit()
-        session.refresh(question_for_db)
+    created_rows = await insert_questions(session, project_uuid, created)
+    answer_key = compile_answer_key(project_uuid, [*(q for (q, _) in matched), *created_rows],
+                                    project_in_db.version)
+    regraded_ids = []
+    if answer_changed:
+        regraded_ids = await regrade_project_records(session, answer_key)
+    if regraded_ids:
+        await rebuild_user_stats(session, regraded_ids)  # 重算答对数有变化的用户的累计成绩
+    await session.commit()
+    answer_keys.put(answer_key)
+    if regraded_ids:
+        leaderboards.discard(project_uuid)
+    leaderboards.invalidate_latest()  # 名称、期号可能已修改
+    project_payloads.invalidate_latest()
+    status_scheduler.wake()
     
     return rf.res_200(message="项目更新成功", data={
         "project_uuid": project_uuid,
     })
 
 
+def diff_questions(questions_in_db, questions):
+    """把提交的题目与库中题目对应，返回 (对应上的 [(库中题目, 提交的题目)], 要删除的库中题目, 要新增的题目)
+
+    提交的题目带 id 时按 id 对应，不带 id 的视为新增；
+    全部不带 id 时（旧版前端整体重发）只有题目数不变才按顺序与库中题目对应：
+    中间增删过题目时按顺序对应会把后面的题目错位，已有作答与逐题统计按错位的题目重算，因此要求带上 id
+    """
+    questions_in_db = sorted(questions_in_db, key=lambda q: q.id)
+    if all(question.id is None for question in questions):
+        if questions_in_db and len(questions) != len(questions_in_db):
+            raise ValueError("题目数量有变化，请为已有题目带上 id 后重新提交")
+        matched = list(zip(questions_in_db, questions))
+        return (matched, [], questions[len(matched):])
+    questions_by_id = {question.id: question for question in questions_in_db}
+    matched, created, seen_ids = [], [], set()
+    for question in questions:
+        if question.id is None:
+            created.append(question)
+            continue
+        if question.id not in questions_by_id:
+            raise ValueError(f"题目 {question.id} 不属于该项目")
+        if question.id in seen_ids:
+            raise ValueError(f"题目 {question.id} 重复出现")
+        seen_ids.add(question.id)
+        matched.append((questions_by_id[question.id], question))
+    deleted = [question for question in questions_in_db if question.id not in seen_ids]
+    return (matched, deleted, created)
+
+
+@router.get("/admin/project/{project_uuid}/stats",
+            summary="管理员查看项目的逐题统计",
+            dependencies=[Depends(admin_verify_token)])
+async def get_project_stats(project_uuid: str, 
+session: AsyncSession=Depends(get_session)):
+    #* 读取随提交累加的逐题统计表，耗时只与题目数有关，与作答人数无关
+    project = await session.get(models.Project, project_uuid)
+    if not project:
+        return rf.res_404(message="项目不存在")
+    Question = models.Question
+    questions = (await session.exec(
+        select(Question.id, Question.type, Question.text, Question.answer)
+        .filter_by(project_uuid=project_uuid)
+        .order_by(Question.id)
+    )).all()
+    chosen = {question.id: {} for question in questions}
+    for row in await queries.question_answer_stats(session, project_uuid):
+        if row.question_id in chosen:
+            chosen[row.question_id][row.answer_mask] = row.chosen_num
+    return rf.res_200(message="项目统计获取成功", data={
+        "project_uuid": project_uuid,
+        "participate_num": project.participate_num,
+        "questions": [question_stats(question, chosen[question.id]) for question in questions],
+    })
+
+
+def question_stats(question, chosen: dict[int, int]) -> dict:
+    """chosen 为 选项位掩码 -> 被选次数；正确率按当前答案计算"""
+    answered_num = sum(chosen.values())
+    correct_num = chosen.get(option_mask(question.answer), 0)
+    return {
+        "question_id": question.id,
+        "type": question.type,
+        "text": question.text,
+        "answer": question.answer,
+        "answered_num": answered_num,
+        "correct_num": correct_num,
+        "accuracy": round(correct_num / answered_num, 4) if answered_num else 0,
+        "options": {  # 各选项被选次数，多选题一份作答计入多个选项
+            option: sum(num for (mask, num) in chosen.items() if mask & bit)
+            for (option, bit) in OPTION_BITS.items()
+        },
+        "answers": {mask_to_options(mask): num for (mask, num) in sorted(chosen.items()) if mask},
+    }
+
+
+@router.get("/admin/project/{project_uuid}/export",
+            summary="管理员导出项目的全部作答记录",
+            dependencies=[Depends(admin_verify_token)])
+async def export_project_records(project_uuid: str, 
+format: Literal["csv", "ndjson"] = Query(default="csv", description="导出格式"),
+session: AsyncSession=Depends(get_session)):
+    #* 边查询边发送，不把作答记录整体加载到内存
+    project = await session.get(models.Project, project_uuid)
+    if not project:
+        return rf.res_404(message="项目不存在")
+    export_format = EXPORT_FORMATS[format]
+    filename = f"project-{project.issue_num}-records.{format}"
+    return StreamingResponse(export_records(project_uuid, export_format), media_type=export_format.media_type,
+                            headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+
+async def export_records(project_uuid: str, export_format: ExportFormat):
+    """响应体发送时请求依赖中的会话可能已经关闭，导出使用自己的会话"""
+    if export_format.header:
+        yield export_format.header
+    async with AsyncSession(async_engine) as session:
+        async for rows in queries.iter_project_records(session, project_uuid):
+            yield export_format.encode_batch(rows)
+
+
 @router.get("/admin/projects",
             summary="管理员获取其创建的所有项目列表")
-async def get_projects(session: Session=Depends(get_session),
+async def get_projects(session: AsyncSession=Depends(get_session),
 admin=Depends(admin_verify_token)):
-    projects = session.exec(select(models.Project).filter_by(creater_id=admin.id)).all()
-    projects_data = []
-    for project in projects:
-        check_project_status(project, project.starttime, project.deadline, project.status, session)
-        project_data = {
-            "project_uuid": project.uuid,
-            "name": project.name,
-            "issue_num": project.issue_num,
-            "starttime": project.starttime.strftime("%Y-%m-%d %H:%M:%S"),
-            "deadline": project.deadline.strftime("%Y-%m-%d %H:%M:%S"),
-            "status": project.status,
-            "participate_num": len(project.records),
-        }
-        projects_data.append(project_data)
+    #* 参与人数由数据库计数，不加载作答记录
+    projects_data = [
+        project_row(row) | {"participate_num": row.participate_num}
+        for row in await queries.admin_projects(session, admin.id)
+    ]
     return rf.res_200(message="项目列表获取成功", data=projects_data)
 
 
@@ -176,143 +332,154 @@ admin=Depends(admin_verify_token)):
             summary="管理员删除项目",
             dependencies=[Depends(admin_verify_token)])
 async def delete_project(project_uuid: str, 
-session: Session=Depends(get_session)):
-    project = session.get(models.Project, project_uuid)
+session: AsyncSession=Depends(get_session)):
+    project = await session.get(models.Project, project_uuid)
     if not project:
         return rf.res_404(message="项目不存在")
-    session.delete(project)
-    session.commit()
+    participant_ids = (await session.exec(select(models.Record.student_id).filter_by(project_uuid=project_uuid))).all()
+    #* 删除项目与重建受影响用户的累计成绩在同一事务中提交
+    await session.delete(project)
+    await session.flush()
+    await rebuild_user_stats(session, participant_ids)
+    await session.commit()
+    leaderboards.discard(project_uuid)
+    answer_keys.discard(project_uuid)
+    project_payloads.invalidate_latest()
     return rf.res_204(message="项目删除成功")
 
 
 @router.get("/user/project/{project_uuid}",
     summary="用户获取项目详情(问题与答案)")
 async def user_get_project(project_uuid: str, 
-student_id: str,
-session: Session=Depends(get_session)):
+student_id: str | None = Query(default=None, deprecated=True, description="学号，已废弃，改用学生令牌"),
+token_student: StudentPrincipal | None = Depends(student_token),
+session: AsyncSession=Depends(get_session)):
     """如果用户没有答题记录，返回题目与答案；
 
     如果用户有答题记录，还会返回其作答情况；
     """
     #* 如果project_uuid为latest，则返回最新发布的项目
     if project_uuid == "latest":
-        statement = select(func.max(models.Project.issue_num))
-        max_issue_num = session.exec(statement).first()
-        if not max_issue_num:
+        project_uuid = await resolve_latest_project_uuid(session)
+        if project_uuid is None:
             return rf.res_404(message="不存在任何项目")
-        project = session.exec(select(models.Project).filter_by(issue_num=max_issue_num)).first()
+        project_payload = await get_project_payload(session, project_uuid)
+        if project_payload is None: # 缓存的最新项目已被其他进程删除
+            project_payloads.invalidate_latest()
+            project_uuid = await resolve_latest_project_uuid(session)
+            if project_uuid is None:
+                return rf.res_404(message="不存在任何项目")
+            project_payload = await get_project_payload(session, project_uuid)
     
     #* 正常情况
     else:
-        project = session.get(models.Project, project_uuid)
-        if not project:
-            return rf.res_404(message="项目不存在")
-    project_uuid = project.uuid
-    check_project_status(project, project.starttime, project.deadline, project.status, session)
-    project_data = project.model_dump()
-    project_data["starttime"] = project_data["starttime"].strftime("%Y-%m-%d %H:%M:%S")
-    project_data["deadline"] = project_data["deadline"].strftime("%Y-%m-%d %H:%M:%S")
-    project_data["questions"] = [
-        question.model_dump(exclude={"project_uuid"}) for question in project.questions
-    ]
-    #* 先判断用户是否设置过党支部信息
-    student = session.get(models.User, student_id)
-    if not student:
+        project_payload = await get_project_payload(session, project_uuid)
+    if project_payload is None:
+        return rf.res_404(message="项目不存在")
+    #* 题目部分使用缓存的序列化结果，只拼接状态与用户的作答情况
+    (payload, project_data) = project_payload
+    #* 先判断用户是否设置过党支部信息，带令牌时由令牌声明判断
+    student = await resolve_student(session, token_student, student_id)
+    if not student or student.party_branch is None:
         return rf.res_404(message="请先设置党支部信息")
     #todo 再判断用户是否已经答过题
-    record = session.exec(select(models.Record).filter_by(student_id=student_id, project_uuid=project_uuid)).first()
+    record = (await session.exec(select(models.Record).filter_by(student_id=student.student_id, project_uuid=project_uuid))).first()
     if record: #. 用户已经答过题，还要返回其作答情况
         project_data["participate_status"] = 1  # 答题参与状态，0为尚未参与，1为已参与
-        project_data["record"] = ast.literal_eval(record.answer)
+        project_data["record"] = record.answer_sheet()
         project_data["correct_num"] = record.correct_num
         project_data["time_used_seconds"] = record.time_used_seconds
     else: #. 用户还没有答过题，只返回题目与答案
         project_data["participate_status"] = 0  # 答题参与状态，0为尚未参与，1为已参与
-    return rf.res_200(message="项目详情获取成功", data=project_data)
+    return rf.res_200_spliced("项目详情获取成功", payload, rf.json_fields(project_data))
     # return project
 
 
 @router.post("/user/project",
             summary="用户提交答案")
 async def commit_answer(commit_data: schemas.CommitAnswerRequest, 
-session: Session=Depends(get_session)):
-    project = session.get(models.Project, commit_data.project_uuid)
+token_student: StudentPrincipal | None = Depends(student_token),
+session: AsyncSession=Depends(get_session)):
+    try:
+        time_used_seconds = commit_data.parse_time_used_seconds()
+    except ValueError as e:
+        return rf.res_400(message=str(e))
+    project = await session.get(models.Project, commit_data.project_uuid)
     if not project:
         return rf.res_404(message="项目不存在")
-    student = session.get(models.User, commit_data.student_id)
-    if not student:
+    student = await resolve_student(session, token_student, commit_data.student_id)
+    if not student or student.party_branch is None:
         return rf.res_404(message="请先设置党支部信息")
-    record = session.exec(select(models.Record).filter_by(student_id=commit_data.student_id, project_uuid=commit_data.project_uuid)).first()
-    if record:
-        return rf.res_400(message="已经有答题记录，无法再次提交")
-    answers = []
-    for a in commit_data.user_answers:
-        answers.append(a.model_dump())
-    answer_data = str(answers)
-    if project.status == 2: # 作答已经结束的项目，不参与排位
+    #* 由服务端判分，不再采信客户端提交的答对数量
+    try:
+        correct_num = (await get_answer_key(project, session)).grade(commit_data.user_answers)
+    except GradingError as e:
+        return rf.res_400(message=str(e))
+    answer_data = encode_answers(commit_data.user_answers)
+    if project_status(project.starttime, project.deadline) == 2: # 作答已经结束的项目，不参与排位
         valid_flag = False
     else:
         valid_flag = True
-    record_for_db = models.Record(
-        student_id=commit_data.student_id,
+    #* 作答记录、用户汇总与参与人数由 submission_writer 与其他提交合并在一个事务中写入，落盘后才返回
+    #* 是否已经作答由唯一索引在插入时判断，不再事先查询
+    submission = Submission(
+        student_id=student.student_id,
         project_uuid=commit_data.project_uuid,
-        correct_num=commit_data.correct_num,
-        time_used_seconds=commit_data.time_used_seconds,
+        correct_num=correct_num,
+        time_used_seconds=time_used_seconds,
         answer=answer_data,
-        valid_flag=valid_flag
+        valid_flag=valid_flag,
+        idempotency_key=commit_data.idempotency_key
     )
-    session.add(record_for_db)
-    session.commit()
-    session.refresh(record_for_db)
-    # 项目参与人数+1
-    project.participate_num += 1
-    session.add(project)
-    session.commit()
-    session.refresh(project)
-    return rf.res_201(message="答案提交成功")
+    ranking_entry = (student.student_id, student.name, student.party_branch,
+                    submission.correct_num, submission.time_used_seconds)
+    try:
+        accepted = await submission_writer.submit(submission, session)
+    except DuplicateSubmission:
+        return rf.res_400(message="已经有答题记录，无法再次提交")
+    if valid_flag and not accepted.replayed: # 增量更新已加载的当期排行榜
+        leaderboards.add_record(commit_data.project_uuid, accepted.record_id, *ranking_entry)
+    return rf.res_201(message="答案提交成功", data={
+        "correct_num": accepted.correct_num,
+    })
 
 
 @router.get("/user/projects/all",
             summary="用户获取所有已开始的项目列表")
-async def user_get_all_projects(session: Session=Depends(get_session)):
-    projects = session.exec(select(models.Project).where(models.Project.status>0)).all()
-    projects_data = []
-    for project in projects:
-        check_project_status(project, project.starttime, project.deadline, project.status, session)
-        project_data = {
-            "project_uuid": project.uuid,
-            "name": project.name,
-            "issue_num": project.issue_num,
-            "starttime": project.starttime.strftime("%Y-%m-%d %H:%M:%S"),
-            "deadline": project.deadline.strftime("%Y-%m-%d %H:%M:%S"),
-            "status": project.status,
-            "participate_num": len(project.records),
-            "creater_username": project.creater.username
-        }
-        projects_data.append(project_data)
+async def user_get_all_projects(session: AsyncSession=Depends(get_session)):
+    #* 库中的状态由 status_scheduler 按时更新；创建者与参与人数随项目一条查询取回
+    projects_data = [
+        project_row(row) | {"participate_num": row.participate_num, "creater_username": row.creater_username}
+        for row in await queries.started_projects(session)
+    ]
     return rf.res_200(message="项目列表获取成功", data=projects_data)
 
 
 @router.get("/user/projects/participate",
             summary="用户获取参与过的所有项目预览")
-async def user_get_projects(student_id: str, 
-session: Session=Depends(get_session)):
-    student = session.get(models.User, student_id)
-    if not student:
+async def user_get_projects(student_id: str | None = Query(default=None, deprecated=True, description="学号，已废弃，改用学生令牌"), 
+token_student: StudentPrincipal | None = Depends(student_token),
+session: AsyncSession=Depends(get_session)):
+    student = await resolve_student(session, token_student, student_id)
+    if not student or student.party_branch is None:
         return rf.res_404(message="请先设置党支部信息")
-    records = session.exec(select(models.Record).filter_by(student_id=student_id)).all()
-    projects = []
-    for record in records:
-        project = {
-            "project_uuid": record.project_uuid,
-            "name": record.project.name,
-            "issue_num": record.project.issue_num,
-            "starttime": record.project.starttime.strftime("%Y-%m-%d %H:%M:%S"),
-            "deadline": record.project.deadline.strftime("%Y-%m-%d %H:%M:%S"),
-            "status": record.project.status,
-            "correct_num": record.correct_num,
-            "time_used_seconds": record.time_used_seconds,
-            "creater_username": record.project.creater.username
+    projects = [
+        project_row(row) | {
+            "correct_num": row.correct_num,
+            "time_used_seconds": row.time_used_seconds,
+            "creater_username": row.creater_username
         }
-        projects.append(project)
-    return rf.res_200(message="项目列表获取成功", data=projects)
\ No newline at end of file
+        for row in await queries.participated_projects(session, student.student_id)
+    ]
+    return rf.res_200(message="项目列表获取成功", data=projects)
+
+
+def project_row(row) -> dict:
+    return {
+        "project_uuid": row.uuid,
+        "name": row.name,
+        "issue_num": row.issue_num,
+        "starttime": row.starttime.strftime("%Y-%m-%d %H:%M:%S"),
+        "deadline": row.deadline.strftime("%Y-%m-%d %H:%M:%S"),
+        "status": project_status(row.starttime, row.deadline),
+    }
\ No newline at end of file
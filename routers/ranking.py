@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends
-from sqlmodel import Session, select, func
-from sql.database import get_session
+from fastapi import APIRouter, Depends, Query
+from sqlmodel import select
+from sql.database import AsyncSession, get_session
 import sql.models as models
+import sql.queries as queries
 import utils.response_format as rf
+from utils.authorization import StudentPrincipal, student_token
+from utils.leaderboard import leaderboards
 
 
 router = APIRouter()
@@ -10,77 +13,65 @@ router = APIRouter()
 
 @router.get("/ranking",
             summary="获取当期排行榜")
-async def get_ranking(student_id: str, session: Session=Depends(get_session)):
-    statement = select(func.max(models.Project.issue_num))
-    max_issue_num = session.exec(statement).first()
-    if not max_issue_num:
-        return rf.res_404(message="不存在任何项目")
-    project = session.exec(select(models.Project).filter_by(issue_num=max_issue_num)).first()
-    # print(max_issue_num)
-    # print(project.records)
-    ranking = []
-    for record in project.records:
-        if record.valid_flag: # 将有效作答的记录加入排行榜
-            record_data = {
-                "student_id": record.student_id,
-                "name": record.student.name,
-                "party_branch": record.student.party_branch,
-                "correct_num": record.correct_num,
-                "time_used_seconds": record.time_used_seconds,
-            }
-            ranking.append(record_data)
-    ranking.sort(key=lambda x: (-x["correct_num"], x["time_used_seconds"]))
-    self_ranking = {}
-    for (i, student) in enumerate(ranking):
-        student["rank"] = i + 1
-        if student["student_id"] == student_id:
-            self_ranking = student
+async def get_ranking(student_id: str | None = Query(default=None, deprecated=True, description="学号，已废弃，改用学生令牌"),
+token_student: StudentPrincipal | None = Depends(student_token),
+session: AsyncSession=Depends(get_session)):
+    if token_student is not None:
+        student_id = token_student.student_id
+    #* 最新一期项目的基本信息与排行榜都缓存在进程内，命中时不访问数据库；
+    #* 基本信息过期后用一条查询刷新，排行榜与数据库中的版本号、参与人数不一致时重新加载
+    latest_project = leaderboards.latest_project
+    if latest_project is None:
+        row = (await session.exec(
+            select(models.Project.uuid, models.Project.name, models.Admin.username, models.Project.issue_num,
+                models.Project.version, models.Project.participate_num)
+            .join(models.Admin).order_by(models.Project.issue_num.desc()).limit(1)
+        )).first()
+        if row is None:
+            return rf.res_404(message="不存在任何项目")
+        latest_project = {
+            "project_uuid": row.uuid,
+            "project_name": row.name,
+            "creater_name": row.username,
+            "issue_num": row.issue_num,
+        }
+        leaderboards.set_latest(latest_project, row.version, row.participate_num)
+    board = leaderboards.get(latest_project["project_uuid"])
+    if board is None:
+        board = await leaderboards.load(latest_project["project_uuid"],
+                                    queries.iter_project_ranking(session, latest_project["project_uuid"]))
     now_ranking_data = {
-        "project_uuid": project.uuid,
-        "project_name": project.name,
-        "creater_name": project.creater.username,
-        "issue_num": project.issue_num,
-        "self_ranking": self_ranking,
-        "ranking": ranking[:30]
+        **latest_project,
+        "self_ranking": board.rank_of(student_id),
+        "ranking": board.top(30)
     }
     return rf.res_200(message="获取当期排行榜成功", data=now_ranking_data)
 
 
 @router.get("/ranking/all",
             summary="获取往期累计排行榜")
-async def get_all_ranking(student_id: str, session: Session=Depends(get_session)):
-    # 获取所有用户
-    users = session.exec(select(models.User)).all()
-    ranking = []
-    for user in users:
-        # 统计每个用户的总成绩
-        user_total_correct_num = 0
-        user_total_time_used_seconds = 0
-        for record in user.records:
-            if record.valid_flag: # 将有效作答的记录加入排行榜
-                user_total_correct_num += record.correct_num
-                user_total_time_used_seconds += record.time_used_seconds
-        record_num = len(user.records)
-        if record_num > 0:
-            user_average_time_used_seconds = user_total_time_used_seconds / record_num
-        else:
-            user_average_time_used_seconds = 0
-        user_data = {
-            "student_id": user.student_id,
-            "name": user.name,
-            "party_branch": user.party_branch,
-            "total_correct_num": user_total_correct_num,
-            "average_time_used_seconds": user_average_time_used_seconds
-        }
-        ranking.append(user_data)
-    ranking.sort(key=lambda x: (-x["total_correct_num"], x["average_time_used_seconds"]))
-    self_ranking = {}
-    for (i, student) in enumerate(ranking):
-        student["rank"] = i + 1
-        if student["student_id"] == student_id:
-            self_ranking = student
+async def get_all_ranking(student_id: str | None = Query(default=None, deprecated=True, description="学号，已废弃，改用学生令牌"),
+token_student: StudentPrincipal | None = Depends(student_token),
+session: AsyncSession=Depends(get_session)):
+    if token_student is not None:
+        student_id = token_student.student_id
+    #* 名次由数据库按汇总表的排行索引计算，不再逐个用户统计作答记录
+    ranking = [ranking_row(row) for row in await queries.all_ranking_top(session, 30)]
+    self_row = await queries.all_ranking_of(session, student_id) if student_id else None
+    self_ranking = ranking_row(self_row) if self_row else {}
     all_ranking_data = {
         "self_ranking": self_ranking,
-        "ranking": ranking[:30]
+        "ranking": ranking
+    }
+    return rf.res_200(message="获取往期累计排行榜成功", data=all_ranking_data)
+
+
+def ranking_row(row) -> dict:
+    return {
+        "student_id": row.student_id,
+        "name": row.name,
+        "party_branch": row.party_branch,
+        "total_correct_num": row.total_correct_num,
+        "average_time_used_seconds": row.average_time_used_seconds,
+        "rank": row.rank
     }
-    return rf.res_200(message="获取往期累计排行榜成功", data=all_ranking_data)
\ No newline at end of file
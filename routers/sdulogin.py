@@ -1,1015 +1,393 @@
-from fastapi import APIRouter, Form, HTTPException
+from fastapi import APIRouter, Form, HTTPException, Depends, Request
 from sqlmodel import SQLModel, Field
-import httpx, re, hashlib, json
-from datetime import datetime
-import execjs
-
-
-
-js_code = """
-/** 
-* DES加密解密 
-* @Copyright Copyright (c) 2006 
-* @author Guapo 
-* @see DESCore 
-*/
-
-/* 
-* encrypt the string to string made up of hex 
-* return the encrypted string 
-*/
-function strEnc(data, firstKey, secondKey, thirdKey) {
-
-  var leng = data.length;
-  var encData = "";
-  var firstKeyBt, secondKeyBt, thirdKeyBt, firstLength, secondLength, thirdLength;
-  if (firstKey != null && firstKey != "") {
-    firstKeyBt = getKeyBytes(firstKey);
-    firstLength = firstKeyBt.length;
-  }
-  if (secondKey != null && secondKey != "") {
-    secondKeyBt = getKeyBytes(secondKey);
-    secondLength = secondKeyBt.length;
-  }
-  if (thirdKey != null && thirdKey != "") {
-    thirdKeyBt = getKeyBytes(thirdKey);
-    thirdLength = thirdKeyBt.length;
-  }
-
-  if (leng > 0) {
-    if (leng < 4) {
-      var bt = strToBt(data);
-      var encByte;
-      if (firstKey != null && firstKey != "" && secondKey != null && secondKey != "" && thirdKey != null && thirdKey != "") {
-        var tempBt;
-        var x, y, z;
-        tempBt = bt;
-        for (x = 0; x < firstLength; x++) {
-          tempBt = enc(tempBt, firstKeyBt[x]);
-        }
-        for (y = 0; y < secondLength; y++) {
-          tempBt = enc(tempBt, secondKeyBt[y]);
-        }
-        for (z = 0; z < thirdLength; z++) {
-          tempBt = enc(tempBt, thirdKeyBt[z]);
-        }
-        encByte = tempBt;
-      } else {
-        if (firstKey != null && firstKey != "" && secondKey != null && secondKey != "") {
-          var tempBt;
-          var x, y;
-          tempBt = bt;
-          for (x = 0; x < firstLength; x++) {
-            tempBt = enc(tempBt, firstKeyBt[x]);
-          }
-          for (y = 0; y < secondLength; y++) {
-            tempBt = enc(tempBt, secondKeyBt[y]);
-          }
-          encByte = tempBt;
-        } else {
-          if (firstKey != null && firstKey != "") {
-            var tempBt;
-            var x = 0;
-            tempBt = bt;
-            for (x = 0; x < firstLength; x++) {
-              tempBt = enc(tempBt, firstKeyBt[x]);
-            }
-            encByte = tempBt;
-          }
-        }
-      }
-      encData = bt64ToHex(encByte);
-    } else {
-      var iterator = parseInt(leng / 4);
-      var remainder = leng % 4;
-      var i = 0;
-      for (i = 0; i < iterator; i++) {
-        var tempData = data.substring(i * 4 + 0, i * 4 + 4);
-        var tempByte = strToBt(tempData);
-        var encByte;
-        if (firstKey != null && firstKey != "" && secondKey != null && secondKey != "" && thirdKey != null && thirdKey != "") {
-          var tempBt;
-          var x, y, z;
-          tempBt = tempByte;
-          for (x = 0; x < firstLength; x++) {
-            tempBt = enc(tempBt, firstKeyBt[x]);
-          }
-          for (y = 0; y < secondLength; y++) {
-            tempBt = enc(tempBt, secondKeyBt[y]);
-          }
-          for (z = 0; z < thirdLength; z++) {
-            tempBt = enc(tempBt, thirdKeyBt[z]);
-          }
-          encByte = tempBt;
-        } else {
-          if (firstKey != null && firstKey != "" && secondKey != null && secondKey != "") {
-            var tempBt;
-            var x, y;
-            tempBt = tempByte;
-            for (x = 0; x < firstLength; x++) {
-              tempBt = enc(tempBt, firstKeyBt[x]);
-            }
-            for (y = 0; y < secondLength; y++) {
-              tempBt = enc(tempBt, secondKeyBt[y]);
-            }
-            encByte = tempBt;
-          } else {
-            if (firstKey != null && firstKey != "") {
-              var tempBt;
-              var x;
-              tempBt = tempByte;
-              for (x = 0; x < firstLength; x++) {
-                tempBt = enc(tempBt, firstKeyBt[x]);
-              }
-              encByte = tempBt;
-            }
-          }
-        }
-        encData += bt64ToHex(encByte);
-      }
-      if (remainder > 0) {
-        var remainderData = data.substring(iterator * 4 + 0, leng);
-        var tempByte = strToBt(remainderData);
-        var encByte;
-        if (firstKey != null && firstKey != "" && secondKey != null && secondKey != "" && thirdKey != null && thirdKey != "") {
-          var tempBt;
-          var x, y, z;
-          tempBt = tempByte;
-          for (x = 0; x < firstLength; x++) {
-            tempBt = enc(tempBt, firstKeyBt[x]);
-          }
-          for (y = 0; y < secondLength; y++) {
-            tempBt = enc(tempBt, secondKeyBt[y]);
-          }
-          for (z = 0; z < thirdLength; z++) {
-            tempBt = enc(tempBt, thirdKeyBt[z]);
-          }
-          encByte = tempBt;
-        } else {
-          if (firstKey != null && firstKey != "" && secondKey != null && secondKey != "") {
-            var tempBt;
-            var x, y;
-            tempBt = tempByte;
-            for (x = 0; x < firstLength; x++) {
-              tempBt = enc(tempBt, firstKeyBt[x]);
-            }
-            for (y = 0; y < secondLength; y++) {
-              tempBt = enc(tempBt, secondKeyBt[y]);
-            }
-            encByte = tempBt;
-          } else {
-            if (firstKey != null && firstKey != "") {
-              var tempBt;
-              var x;
-              tempBt = tempByte;
-              for (x = 0; x < firstLength; x++) {
-                tempBt = enc(tempBt, firstKeyBt[x]);
-              }
-              encByte = tempBt;
-            }
-          }
-        }
-        encData += bt64ToHex(encByte);
-      }
-    }
-  }
-  return encData;
-}
+import httpx, re, hashlib, hmac, json, os, asyncio
+import xml.etree.ElementTree as ElementTree
+from abc import ABC, abstractmethod
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from urllib.parse import quote
+from utils.cas_des import str_enc
+from utils.authorization import SECRET_KEY, StudentPrincipal, create_student_token
+from utils.cache import TTLCache
+from sql.database import AsyncSession, get_session
+import sql.models as models
 
-/* 
-* decrypt the encrypted string to the original string  
-* 
-* return  the original string   
-*/
-function strDec(data, firstKey, secondKey, thirdKey) {
-  var leng = data.length;
-  var decStr = "";
-  var firstKeyBt, secondKeyBt, thirdKeyBt, firstLength, secondLength, thirdLength;
-  if (firstKey != null && firstKey != "") {
-    firstKeyBt = getKeyBytes(firstKey);
-    firstLength = firstKeyBt.length;
-  }
-  if (secondKey != null && secondKey != "") {
-    secondKeyBt = getKeyBytes(secondKey);
-    secondLength = secondKeyBt.length;
-  }
-  if (thirdKey != null && thirdKey != "") {
-    thirdKeyBt = getKeyBytes(thirdKey);
-    thirdLength = thirdKeyBt.length;
-  }
-
-  var iterator = parseInt(leng / 16);
-  var i = 0;
-  for (i = 0; i < iterator; i++) {
-    var tempData = data.substring(i * 16 + 0, i * 16 + 16);
-    var strByte = hexToBt64(tempData);
-    var intByte = new Array(64);
-    var j = 0;
-    for (j = 0; j < 64; j++) {
-      intByte[j] = parseInt(strByte.substring(j, j + 1));
-    }
-    var decByte;
-    if (firstKey != null && firstKey != "" && secondKey != null && secondKey != "" && thirdKey != null && thirdKey != "") {
-      var tempBt;
-      var x, y, z;
-      tempBt = intByte;
-      for (x = thirdLength - 1; x >= 0; x--) {
-        tempBt = dec(tempBt, thirdKeyBt[x]);
-      }
-      for (y = secondLength - 1; y >= 0; y--) {
-        tempBt = dec(tempBt, secondKeyBt[y]);
-      }
-      for (z = firstLength - 1; z >= 0; z--) {
-        tempBt = dec(tempBt, firstKeyBt[z]);
-      }
-      decByte = tempBt;
-    } else {
-      if (firstKey != null && firstKey != "" && secondKey != null && secondKey != "") {
-        var tempBt;
-        var x, y, z;
-        tempBt = intByte;
-        for (x = secondLength - 1; x >= 0; x--) {
-          tempBt = dec(tempBt, secondKeyBt[x]);
-        }
-        for (y = firstLength - 1; y >= 0; y--) {
-          tempBt = dec(tempBt, firstKeyBt[y]);
-        }
-        decByte = tempBt;
-      } else {
-        if (firstKey != null && firstKey != "") {
-          var tempBt;
-          var x, y, z;
-          tempBt = intByte;
-          for (x = firstLength - 1; x >= 0; x--) {
-            tempBt = dec(tempBt, firstKeyBt[x]);
-          }
-          decByte = tempBt;
-        }
-      }
-    }
-    decStr += byteToString(decByte);
-  }
-  return decStr;
-}
-/* 
-* chang the string into the bit array 
-*  
-* return bit array(it's length % 64 = 0) 
-*/
-function getKeyBytes(key) {
-  var keyBytes = new Array();
-  var leng = key.length;
-  var iterator = parseInt(leng / 4);
-  var remainder = leng % 4;
-  var i = 0;
-  for (i = 0; i < iterator; i++) {
-    keyBytes[i] = strToBt(key.substring(i * 4 + 0, i * 4 + 4));
-  }
-  if (remainder > 0) {
-    keyBytes[i] = strToBt(key.substring(i * 4 + 0, leng));
-  }
-  return keyBytes;
-}
 
-/* 
-* chang the string(it's length <= 4) into the bit array 
-*  
-* return bit array(it's length = 64) 
-*/
-function strToBt(str) {
-  var leng = str.length;
-  var bt = new Array(64);
-  if (leng < 4) {
-    var i = 0, j = 0, p = 0, q = 0;
-    for (i = 0; i < leng; i++) {
-      var k = str.charCodeAt(i);
-      for (j = 0; j < 16; j++) {
-        var pow = 1, m = 0;
-        for (m = 15; m > j; m--) {
-          pow *= 2;
-        }
-        bt[16 * i + j] = parseInt(k / pow) % 2;
-      }
-    }
-    for (p = leng; p < 4; p++) {
-      var k = 0;
-      for (q = 0; q < 16; q++) {
-        var pow = 1, m = 0;
-        for (m = 15; m > q; m--) {
-          pow *= 2;
-        }
-        bt[16 * p + q] = parseInt(k / pow) % 2;
-      }
-    }
-  } else {
-    for (i = 0; i < 4; i++) {
-      var k = str.charCodeAt(i);
-      for (j = 0; j < 16; j++) {
-        var pow = 1;
-        for (m = 15; m > j; m--) {
-          pow *= 2;
-        }
-        bt[16 * i + j] = parseInt(k / pow) % 2;
-      }
-    }
-  }
-  return bt;
-}
+router = APIRouter()
 
-/* 
-* chang the bit(it's length = 4) into the hex 
-*  
-* return hex 
-*/
-function bt4ToHex(binary) {
-  var hex;
-  switch (binary) {
-    case "0000": hex = "0"; break;
-    case "0001": hex = "1"; break;
-    case "0010": hex = "2"; break;
-    case "0011": hex = "3"; break;
-    case "0100": hex = "4"; break;
-    case "0101": hex = "5"; break;
-    case "0110": hex = "6"; break;
-    case "0111": hex = "7"; break;
-    case "1000": hex = "8"; break;
-    case "1001": hex = "9"; break;
-    case "1010": hex = "A"; break;
-    case "1011": hex = "B"; break;
-    case "1100": hex = "C"; break;
-    case "1101": hex = "D"; break;
-    case "1110": hex = "E"; break;
-    case "1111": hex = "F"; break;
-  }
-  return hex;
-}
 
-/* 
-* chang the hex into the bit(it's length = 4) 
-*  
-* return the bit(it's length = 4) 
-*/
-function hexToBt4(hex) {
-  var binary;
-  switch (hex) {
-    case "0": binary = "0000"; break;
-    case "1": binary = "0001"; break;
-    case "2": binary = "0010"; break;
-    case "3": binary = "0011"; break;
-    case "4": binary = "0100"; break;
-    case "5": binary = "0101"; break;
-    case "6": binary = "0110"; break;
-    case "7": binary = "0111"; break;
-    case "8": binary = "1000"; break;
-    case "9": binary = "1001"; break;
-    case "A": binary = "1010"; break;
-    case "B": binary = "1011"; break;
-    case "C": binary = "1100"; break;
-    case "D": binary = "1101"; break;
-    case "E": binary = "1110"; break;
-    case "F": binary = "1111"; break;
-  }
-  return binary;
+CAS_BASE_URL = os.environ.get("SDU_CAS_BASE_URL", "https://pass.sdu.edu.cn")
+AIASSIST_BASE_URL = os.environ.get("SDU_AIASSIST_BASE_URL", "https://aiassist.sdu.edu.cn")
+SERVICE_URL = (f"{AIASSIST_BASE_URL}/common/actionCasLogin?redirect_url="
+            + quote(f"{AIASSIST_BASE_URL}/page/site/newPc?login_return=true", safe=""))
+
+REST_SERVICE_URL = os.environ.get("SDU_CAS_REST_SERVICE_URL", "https://service.sdu.edu.cn/tp_up/view?m=up")
+
+#* /user/login 使用的登录方式：scrape 为模拟网页登录（含设备绑定），rest 为 CAS REST 接口（TGT -> ST -> serviceValidate）
+CAS_LOGIN_BACKEND = os.environ.get("SDU_CAS_LOGIN_BACKEND", "scrape")
+if CAS_LOGIN_BACKEND not in ("scrape", "rest"):
+    raise ValueError(f"SDU_CAS_LOGIN_BACKEND 只能是 scrape 或 rest，当前为 {CAS_LOGIN_BACKEND!r}")
+
+CAS_MAX_CONCURRENCY = int(os.environ.get("SDU_CAS_MAX_CONCURRENCY", "32"))  # 同时发往统一认证的请求数上限
+CAS_MAX_KEEPALIVE = int(os.environ.get("SDU_CAS_MAX_KEEPALIVE", "16"))
+CAS_LOGIN_STATE_TTL_SECONDS = float(os.environ.get("SDU_CAS_LOGIN_STATE_TTL_SECONDS", "300"))  # 等待短信验证码的时长
+CAS_LOGIN_STATE_MAX_SIZE = int(os.environ.get("SDU_CAS_LOGIN_STATE_MAX_SIZE", "10000"))
+CAS_TGT_TTL_SECONDS = float(os.environ.get("SDU_CAS_TGT_TTL_SECONDS", "7200"))  # 不超过统一认证中 TGT 的有效期
+CAS_TGT_CACHE_SIZE = int(os.environ.get("SDU_CAS_TGT_CACHE_SIZE", "10000"))
+# 各步骤的超时时间（秒）
+STEP_TIMEOUTS = {
+    "login_page": httpx.Timeout(10.0, connect=5.0),
+    "device": httpx.Timeout(10.0, connect=5.0),
+    "login": httpx.Timeout(15.0, connect=5.0),
+    "service": httpx.Timeout(10.0, connect=5.0),
+    "user_info": httpx.Timeout(10.0, connect=5.0),
+    "tgt": httpx.Timeout(10.0, connect=5.0),
+    "st": httpx.Timeout(10.0, connect=5.0),
+    "validate": httpx.Timeout(10.0, connect=5.0),
 }
 
-/* 
-* chang the bit(it's length = 64) into the string 
-*  
-* return string 
-*/
-function byteToString(byteData) {
-  var str = "";
-  for (i = 0; i < 4; i++) {
-    var count = 0;
-    for (j = 0; j < 16; j++) {
-      var pow = 1;
-      for (m = 15; m > j; m--) {
-        pow *= 2;
-      }
-      count += byteData[16 * i + j] * pow;
-    }
-    if (count != 0) {
-      str += String.fromCharCode(count);
-    }
-  }
-  return str;
-}
 
-function bt64ToHex(byteData) {
-  var hex = "";
-  for (i = 0; i < 16; i++) {
-    var bt = "";
-    for (j = 0; j < 4; j++) {
-      bt += byteData[i * 4 + j];
-    }
-    hex += bt4ToHex(bt);
-  }
-  return hex;
-}
+class LoginInfo(SQLModel):
+    sduid: str = Field(nullable=False, description="SDU ID")
+    rsa: str = Field(
+        nullable=False, description="strEnc(sduid+password+lt,'1','2','3')"
+    )
+    u: str = Field(nullable=False, description="strEnc(sduid,'1','2','3')")
+    p: str = Field(nullable=False, description="strEnc(password,'1','2','3')")
+    pl: int = Field(nullable=False, description="len(password)")
 
-function hexToBt64(hex) {
-  var binary = "";
-  for (i = 0; i < 16; i++) {
-    binary += hexToBt4(hex.substring(i, i + 1));
-  }
-  return binary;
-}
 
-/* 
-* the 64 bit des core arithmetic 
-*/
-
-function enc(dataByte, keyByte) {
-  var keys = generateKeys(keyByte);
-  var ipByte = initPermute(dataByte);
-  var ipLeft = new Array(32);
-  var ipRight = new Array(32);
-  var tempLeft = new Array(32);
-  var i = 0, j = 0, k = 0, m = 0, n = 0;
-  for (k = 0; k < 32; k++) {
-    ipLeft[k] = ipByte[k];
-    ipRight[k] = ipByte[32 + k];
-  }
-  for (i = 0; i < 16; i++) {
-    for (j = 0; j < 32; j++) {
-      tempLeft[j] = ipLeft[j];
-      ipLeft[j] = ipRight[j];
-    }
-    var key = new Array(48);
-    for (m = 0; m < 48; m++) {
-      key[m] = keys[i][m];
-    }
-    var tempRight = xor(pPermute(sBoxPermute(xor(expandPermute(ipRight), key))), tempLeft);
-    for (n = 0; n < 32; n++) {
-      ipRight[n] = tempRight[n];
-    }
+class CASClient:
+    """应用内共享的统一认证客户端，复用连接并限制并发
 
-  }
+    共享的 httpx.AsyncClient 不保存任何 cookie，cookie 由每次登录尝试各自持有。
+    """
 
+    def __init__(self, max_concurrency: int = CAS_MAX_CONCURRENCY, transport: httpx.AsyncBaseTransport | None = None):
+        self.http = httpx.AsyncClient(
+            transport=transport,  # 测试与基准中替换为模拟的统一认证
+            limits=httpx.Limits(max_connections=max_concurrency,
+                                max_keepalive_connections=CAS_MAX_KEEPALIVE),
+            timeout=httpx.Timeout(10.0, connect=5.0),
+            cookies=CookieJar(policy=DefaultCookiePolicy(allowed_domains=[])),
+        )
+        self.semaphore = asyncio.Semaphore(max_concurrency)
 
-  var finalData = new Array(64);
-  for (i = 0; i < 32; i++) {
-    finalData[i] = ipRight[i];
-    finalData[32 + i] = ipLeft[i];
-  }
-  return finallyPermute(finalData);
-}
+    async def aclose(self):
+        await self.http.aclose()
 
-function dec(dataByte, keyByte) {
-  var keys = generateKeys(keyByte);
-  var ipByte = initPermute(dataByte);
-  var ipLeft = new Array(32);
-  var ipRight = new Array(32);
-  var tempLeft = new Array(32);
-  var i = 0, j = 0, k = 0, m = 0, n = 0;
-  for (k = 0; k < 32; k++) {
-    ipLeft[k] = ipByte[k];
-    ipRight[k] = ipByte[32 + k];
-  }
-  for (i = 15; i >= 0; i--) {
-    for (j = 0; j < 32; j++) {
-      tempLeft[j] = ipLeft[j];
-      ipLeft[j] = ipRight[j];
-    }
-    var key = new Array(48);
-    for (m = 0; m < 48; m++) {
-      key[m] = keys[i][m];
-    }
+    async def send(self, cookies: httpx.Cookies, step: str, method: str, url: str, **kwargs) -> httpx.Response:
+        request = self.http.build_request(method, url, timeout=STEP_TIMEOUTS[step], **kwargs)
+        cookies.set_cookie_header(request)
+        try:
+            async with self.semaphore:
+                response = await self.http.send(request)
+        except httpx.TimeoutException:
+            raise HTTPException(504, detail="统一认证服务响应超时")
+        except httpx.HTTPError:
+            raise HTTPException(502, detail="无法连接统一认证服务")
+        if response.status_code >= 500: # 不把统一认证的故障当作密码错误或页面解析失败
+            raise HTTPException(502, detail="统一认证服务暂时不可用")
+        cookies.extract_cookies(response)
+        return response
 
-    var tempRight = xor(pPermute(sBoxPermute(xor(expandPermute(ipRight), key))), tempLeft);
-    for (n = 0; n < 32; n++) {
-      ipRight[n] = tempRight[n];
-    }
-  }
 
+def get_cas_client(request: Request) -> CASClient:
+    return request.app.state.cas_client
 
-  var finalData = new Array(64);
-  for (i = 0; i < 32; i++) {
-    finalData[i] = ipRight[i];
-    finalData[32 + i] = ipLeft[i];
-  }
-  return finallyPermute(finalData);
-}
 
-function initPermute(originalData) {
-  var ipByte = new Array(64);
-  for (i = 0, m = 1, n = 0; i < 4; i++, m += 2, n += 2) {
-    for (j = 7, k = 0; j >= 0; j--, k++) {
-      ipByte[i * 8 + k] = originalData[j * 8 + m];
-      ipByte[i * 8 + k + 32] = originalData[j * 8 + n];
-    }
-  }
-  return ipByte;
-}
+def credential_digest(sduid: str, password: str) -> str:
+    """账号密码的 HMAC 摘要，用于核对后续请求是否为同一账号密码，不保存明文密码"""
+    return hmac.new(SECRET_KEY.encode(), f"{sduid}\0{password}".encode(), hashlib.sha256).hexdigest()
 
-function expandPermute(rightData) {
-  var epByte = new Array(48);
-  for (i = 0; i < 8; i++) {
-    if (i == 0) {
-      epByte[i * 6 + 0] = rightData[31];
-    } else {
-      epByte[i * 6 + 0] = rightData[i * 4 - 1];
-    }
-    epByte[i * 6 + 1] = rightData[i * 4 + 0];
-    epByte[i * 6 + 2] = rightData[i * 4 + 1];
-    epByte[i * 6 + 3] = rightData[i * 4 + 2];
-    epByte[i * 6 + 4] = rightData[i * 4 + 3];
-    if (i == 7) {
-      epByte[i * 6 + 5] = rightData[0];
-    } else {
-      epByte[i * 6 + 5] = rightData[i * 4 + 4];
-    }
-  }
-  return epByte;
-}
 
-function xor(byteOne, byteTwo) {
-  var xorByte = new Array(byteOne.length);
-  for (i = 0; i < byteOne.length; i++) {
-    xorByte[i] = byteOne[i] ^ byteTwo[i];
-  }
-  return xorByte;
-}
+class LoginStateStore(ABC):
+    """/user/login 与 /user/msgcheck 之间待短信验证的登录状态，按学号保存
 
-function sBoxPermute(expandByte) {
-
-  var sBoxByte = new Array(32);
-  var binary = "";
-  var s1 = [
-    [14, 4, 13, 1, 2, 15, 11, 8, 3, 10, 6, 12, 5, 9, 0, 7],
-    [0, 15, 7, 4, 14, 2, 13, 1, 10, 6, 12, 11, 9, 5, 3, 8],
-    [4, 1, 14, 8, 13, 6, 2, 11, 15, 12, 9, 7, 3, 10, 5, 0],
-    [15, 12, 8, 2, 4, 9, 1, 7, 5, 11, 3, 14, 10, 0, 6, 13]];
-
-  /* Table - s2 */
-  var s2 = [
-    [15, 1, 8, 14, 6, 11, 3, 4, 9, 7, 2, 13, 12, 0, 5, 10],
-    [3, 13, 4, 7, 15, 2, 8, 14, 12, 0, 1, 10, 6, 9, 11, 5],
-    [0, 14, 7, 11, 10, 4, 13, 1, 5, 8, 12, 6, 9, 3, 2, 15],
-    [13, 8, 10, 1, 3, 15, 4, 2, 11, 6, 7, 12, 0, 5, 14, 9]];
-
-  /* Table - s3 */
-  var s3 = [
-    [10, 0, 9, 14, 6, 3, 15, 5, 1, 13, 12, 7, 11, 4, 2, 8],
-    [13, 7, 0, 9, 3, 4, 6, 10, 2, 8, 5, 14, 12, 11, 15, 1],
-    [13, 6, 4, 9, 8, 15, 3, 0, 11, 1, 2, 12, 5, 10, 14, 7],
-    [1, 10, 13, 0, 6, 9, 8, 7, 4, 15, 14, 3, 11, 5, 2, 12]];
-  /* Table - s4 */
-  var s4 = [
-    [7, 13, 14, 3, 0, 6, 9, 10, 1, 2, 8, 5, 11, 12, 4, 15],
-    [13, 8, 11, 5, 6, 15, 0, 3, 4, 7, 2, 12, 1, 10, 14, 9],
-    [10, 6, 9, 0, 12, 11, 7, 13, 15, 1, 3, 14, 5, 2, 8, 4],
-    [3, 15, 0, 6, 10, 1, 13, 8, 9, 4, 5, 11, 12, 7, 2, 14]];
-
-  /* Table - s5 */
-  var s5 = [
-    [2, 12, 4, 1, 7, 10, 11, 6, 8, 5, 3, 15, 13, 0, 14, 9],
-    [14, 11, 2, 12, 4, 7, 13, 1, 5, 0, 15, 10, 3, 9, 8, 6],
-    [4, 2, 1, 11, 10, 13, 7, 8, 15, 9, 12, 5, 6, 3, 0, 14],
-    [11, 8, 12, 7, 1, 14, 2, 13, 6, 15, 0, 9, 10, 4, 5, 3]];
-
-  /* Table - s6 */
-  var s6 = [
-    [12, 1, 10, 15, 9, 2, 6, 8, 0, 13, 3, 4, 14, 7, 5, 11],
-    [10, 15, 4, 2, 7, 12, 9, 5, 6, 1, 13, 14, 0, 11, 3, 8],
-    [9, 14, 15, 5, 2, 8, 12, 3, 7, 0, 4, 10, 1, 13, 11, 6],
-    [4, 3, 2, 12, 9, 5, 15, 10, 11, 14, 1, 7, 6, 0, 8, 13]];
-
-  /* Table - s7 */
-  var s7 = [
-    [4, 11, 2, 14, 15, 0, 8, 13, 3, 12, 9, 7, 5, 10, 6, 1],
-    [13, 0, 11, 7, 4, 9, 1, 10, 14, 3, 5, 12, 2, 15, 8, 6],
-    [1, 4, 11, 13, 12, 3, 7, 14, 10, 15, 6, 8, 0, 5, 9, 2],
-    [6, 11, 13, 8, 1, 4, 10, 7, 9, 5, 0, 15, 14, 2, 3, 12]];
-
-  /* Table - s8 */
-  var s8 = [
-    [13, 2, 8, 4, 6, 15, 11, 1, 10, 9, 3, 14, 5, 0, 12, 7],
-    [1, 15, 13, 8, 10, 3, 7, 4, 12, 5, 6, 11, 0, 14, 9, 2],
-    [7, 11, 4, 1, 9, 12, 14, 2, 0, 6, 10, 13, 15, 3, 5, 8],
-    [2, 1, 14, 7, 4, 10, 8, 13, 15, 12, 9, 0, 3, 5, 6, 11]];
-
-  for (m = 0; m < 8; m++) {
-    var i = 0, j = 0;
-    i = expandByte[m * 6 + 0] * 2 + expandByte[m * 6 + 5];
-    j = expandByte[m * 6 + 1] * 2 * 2 * 2
-      + expandByte[m * 6 + 2] * 2 * 2
-      + expandByte[m * 6 + 3] * 2
-      + expandByte[m * 6 + 4];
-    switch (m) {
-      case 0:
-        binary = getBoxBinary(s1[i][j]);
-        break;
-      case 1:
-        binary = getBoxBinary(s2[i][j]);
-        break;
-      case 2:
-        binary = getBoxBinary(s3[i][j]);
-        break;
-      case 3:
-        binary = getBoxBinary(s4[i][j]);
-        break;
-      case 4:
-        binary = getBoxBinary(s5[i][j]);
-        break;
-      case 5:
-        binary = getBoxBinary(s6[i][j]);
-        break;
-      case 6:
-        binary = getBoxBinary(s7[i][j]);
-        break;
-      case 7:
-        binary = getBoxBinary(s8[i][j]);
-        break;
-    }
-    sBoxByte[m * 4 + 0] = parseInt(binary.substring(0, 1));
-    sBoxByte[m * 4 + 1] = parseInt(binary.substring(1, 2));
-    sBoxByte[m * 4 + 2] = parseInt(binary.substring(2, 3));
-    sBoxByte[m * 4 + 3] = parseInt(binary.substring(3, 4));
-  }
-  return sBoxByte;
-}
+    状态是可 JSON 序列化的字典；多进程部署时可换成共享存储（如 Redis）的实现，
+    只需实现 get/put/discard 并在 main.py 的 lifespan 中替换；缺少任一方法的实现无法实例化
+    """
 
-function pPermute(sBoxByte) {
-  var pBoxPermute = new Array(32);
-  pBoxPermute[0] = sBoxByte[15];
-  pBoxPermute[1] = sBoxByte[6];
-  pBoxPermute[2] = sBoxByte[19];
-  pBoxPermute[3] = sBoxByte[20];
-  pBoxPermute[4] = sBoxByte[28];
-  pBoxPermute[5] = sBoxByte[11];
-  pBoxPermute[6] = sBoxByte[27];
-  pBoxPermute[7] = sBoxByte[16];
-  pBoxPermute[8] = sBoxByte[0];
-  pBoxPermute[9] = sBoxByte[14];
-  pBoxPermute[10] = sBoxByte[22];
-  pBoxPermute[11] = sBoxByte[25];
-  pBoxPermute[12] = sBoxByte[4];
-  pBoxPermute[13] = sBoxByte[17];
-  pBoxPermute[14] = sBoxByte[30];
-  pBoxPermute[15] = sBoxByte[9];
-  pBoxPermute[16] = sBoxByte[1];
-  pBoxPermute[17] = sBoxByte[7];
-  pBoxPermute[18] = sBoxByte[23];
-  pBoxPermute[19] = sBoxByte[13];
-  pBoxPermute[20] = sBoxByte[31];
-  pBoxPermute[21] = sBoxByte[26];
-  pBoxPermute[22] = sBoxByte[2];
-  pBoxPermute[23] = sBoxByte[8];
-  pBoxPermute[24] = sBoxByte[18];
-  pBoxPermute[25] = sBoxByte[12];
-  pBoxPermute[26] = sBoxByte[29];
-  pBoxPermute[27] = sBoxByte[5];
-  pBoxPermute[28] = sBoxByte[21];
-  pBoxPermute[29] = sBoxByte[10];
-  pBoxPermute[30] = sBoxByte[3];
-  pBoxPermute[31] = sBoxByte[24];
-  return pBoxPermute;
-}
+    @abstractmethod
+    async def get(self, sduid: str) -> dict | None:
+        ...
 
-function finallyPermute(endByte) {
-  var fpByte = new Array(64);
-  fpByte[0] = endByte[39];
-  fpByte[1] = endByte[7];
-  fpByte[2] = endByte[47];
-  fpByte[3] = endByte[15];
-  fpByte[4] = endByte[55];
-  fpByte[5] = endByte[23];
-  fpByte[6] = endByte[63];
-  fpByte[7] = endByte[31];
-  fpByte[8] = endByte[38];
-  fpByte[9] = endByte[6];
-  fpByte[10] = endByte[46];
-  fpByte[11] = endByte[14];
-  fpByte[12] = endByte[54];
-  fpByte[13] = endByte[22];
-  fpByte[14] = endByte[62];
-  fpByte[15] = endByte[30];
-  fpByte[16] = endByte[37];
-  fpByte[17] = endByte[5];
-  fpByte[18] = endByte[45];
-  fpByte[19] = endByte[13];
-  fpByte[20] = endByte[53];
-  fpByte[21] = endByte[21];
-  fpByte[22] = endByte[61];
-  fpByte[23] = endByte[29];
-  fpByte[24] = endByte[36];
-  fpByte[25] = endByte[4];
-  fpByte[26] = endByte[44];
-  fpByte[27] = endByte[12];
-  fpByte[28] = endByte[52];
-  fpByte[29] = endByte[20];
-  fpByte[30] = endByte[60];
-  fpByte[31] = endByte[28];
-  fpByte[32] = endByte[35];
-  fpByte[33] = endByte[3];
-  fpByte[34] = endByte[43];
-  fpByte[35] = endByte[11];
-  fpByte[36] = endByte[51];
-  fpByte[37] = endByte[19];
-  fpByte[38] = endByte[59];
-  fpByte[39] = endByte[27];
-  fpByte[40] = endByte[34];
-  fpByte[41] = endByte[2];
-  fpByte[42] = endByte[42];
-  fpByte[43] = endByte[10];
-  fpByte[44] = endByte[50];
-  fpByte[45] = endByte[18];
-  fpByte[46] = endByte[58];
-  fpByte[47] = endByte[26];
-  fpByte[48] = endByte[33];
-  fpByte[49] = endByte[1];
-  fpByte[50] = endByte[41];
-  fpByte[51] = endByte[9];
-  fpByte[52] = endByte[49];
-  fpByte[53] = endByte[17];
-  fpByte[54] = endByte[57];
-  fpByte[55] = endByte[25];
-  fpByte[56] = endByte[32];
-  fpByte[57] = endByte[0];
-  fpByte[58] = endByte[40];
-  fpByte[59] = endByte[8];
-  fpByte[60] = endByte[48];
-  fpByte[61] = endByte[16];
-  fpByte[62] = endByte[56];
-  fpByte[63] = endByte[24];
-  return fpByte;
-}
+    @abstractmethod
+    async def put(self, sduid: str, state: dict):
+        ...
 
-function getBoxBinary(i) {
-  var binary = "";
-  switch (i) {
-    case 0: binary = "0000"; break;
-    case 1: binary = "0001"; break;
-    case 2: binary = "0010"; break;
-    case 3: binary = "0011"; break;
-    case 4: binary = "0100"; break;
-    case 5: binary = "0101"; break;
-    case 6: binary = "0110"; break;
-    case 7: binary = "0111"; break;
-    case 8: binary = "1000"; break;
-    case 9: binary = "1001"; break;
-    case 10: binary = "1010"; break;
-    case 11: binary = "1011"; break;
-    case 12: binary = "1100"; break;
-    case 13: binary = "1101"; break;
-    case 14: binary = "1110"; break;
-    case 15: binary = "1111"; break;
-  }
-  return binary;
-}
-/* 
-* generate 16 keys for xor 
-* 
-*/
-function generateKeys(keyByte) {
-  var key = new Array(56);
-  var keys = new Array();
-
-  keys[0] = new Array();
-  keys[1] = new Array();
-  keys[2] = new Array();
-  keys[3] = new Array();
-  keys[4] = new Array();
-  keys[5] = new Array();
-  keys[6] = new Array();
-  keys[7] = new Array();
-  keys[8] = new Array();
-  keys[9] = new Array();
-  keys[10] = new Array();
-  keys[11] = new Array();
-  keys[12] = new Array();
-  keys[13] = new Array();
-  keys[14] = new Array();
-  keys[15] = new Array();
-  var loop = [1, 1, 2, 2, 2, 2, 2, 2, 1, 2, 2, 2, 2, 2, 2, 1];
-
-  for (i = 0; i < 7; i++) {
-    for (j = 0, k = 7; j < 8; j++, k--) {
-      key[i * 8 + j] = keyByte[8 * k + i];
-    }
-  }
-
-  var i = 0;
-  for (i = 0; i < 16; i++) {
-    var tempLeft = 0;
-    var tempRight = 0;
-    for (j = 0; j < loop[i]; j++) {
-      tempLeft = key[0];
-      tempRight = key[28];
-      for (k = 0; k < 27; k++) {
-        key[k] = key[k + 1];
-        key[28 + k] = key[29 + k];
-      }
-      key[27] = tempLeft;
-      key[55] = tempRight;
-    }
-    var tempKey = new Array(48);
-    tempKey[0] = key[13];
-    tempKey[1] = key[16];
-    tempKey[2] = key[10];
-    tempKey[3] = key[23];
-    tempKey[4] = key[0];
-    tempKey[5] = key[4];
-    tempKey[6] = key[2];
-    tempKey[7] = key[27];
-    tempKey[8] = key[14];
-    tempKey[9] = key[5];
-    tempKey[10] = key[20];
-    tempKey[11] = key[9];
-    tempKey[12] = key[22];
-    tempKey[13] = key[18];
-    tempKey[14] = key[11];
-    tempKey[15] = key[3];
-    tempKey[16] = key[25];
-    tempKey[17] = key[7];
-    tempKey[18] = key[15];
-    tempKey[19] = key[6];
-    tempKey[20] = key[26];
-    tempKey[21] = key[19];
-    tempKey[22] = key[12];
-    tempKey[23] = key[1];
-    tempKey[24] = key[40];
-    tempKey[25] = key[51];
-    tempKey[26] = key[30];
-    tempKey[27] = key[36];
-    tempKey[28] = key[46];
-    tempKey[29] = key[54];
-    tempKey[30] = key[29];
-    tempKey[31] = key[39];
-    tempKey[32] = key[50];
-    tempKey[33] = key[44];
-    tempKey[34] = key[32];
-    tempKey[35] = key[47];
-    tempKey[36] = key[43];
-    tempKey[37] = key[48];
-    tempKey[38] = key[38];
-    tempKey[39] = key[55];
-    tempKey[40] = key[33];
-    tempKey[41] = key[52];
-    tempKey[42] = key[45];
-    tempKey[43] = key[41];
-    tempKey[44] = key[49];
-    tempKey[45] = key[35];
-    tempKey[46] = key[28];
-    tempKey[47] = key[31];
-    switch (i) {
-      case 0: for (m = 0; m < 48; m++) { keys[0][m] = tempKey[m]; } break;
-      case 1: for (m = 0; m < 48; m++) { keys[1][m] = tempKey[m]; } break;
-      case 2: for (m = 0; m < 48; m++) { keys[2][m] = tempKey[m]; } break;
-      case 3: for (m = 0; m < 48; m++) { keys[3][m] = tempKey[m]; } break;
-      case 4: for (m = 0; m < 48; m++) { keys[4][m] = tempKey[m]; } break;
-      case 5: for (m = 0; m < 48; m++) { keys[5][m] = tempKey[m]; } break;
-      case 6: for (m = 0; m < 48; m++) { keys[6][m] = tempKey[m]; } break;
-      case 7: for (m = 0; m < 48; m++) { keys[7][m] = tempKey[m]; } break;
-      case 8: for (m = 0; m < 48; m++) { keys[8][m] = tempKey[m]; } break;
-      case 9: for (m = 0; m < 48; m++) { keys[9][m] = tempKey[m]; } break;
-      case 10: for (m = 0; m < 48; m++) { keys[10][m] = tempKey[m]; } break;
-      case 11: for (m = 0; m < 48; m++) { keys[11][m] = tempKey[m]; } break;
-      case 12: for (m = 0; m < 48; m++) { keys[12][m] = tempKey[m]; } break;
-      case 13: for (m = 0; m < 48; m++) { keys[13][m] = tempKey[m]; } break;
-      case 14: for (m = 0; m < 48; m++) { keys[14][m] = tempKey[m]; } break;
-      case 15: for (m = 0; m < 48; m++) { keys[15][m] = tempKey[m]; } break;
-    }
-  }
-  return keys;
-}  
-"""
+    @abstractmethod
+    async def discard(self, sduid: str):
+        ...
 
 
-router = APIRouter()
+class MemoryLoginStateStore(LoginStateStore):
+    """进程内的实现，超过有效期或容量时淘汰"""
 
+    def __init__(self, maxsize: int = CAS_LOGIN_STATE_MAX_SIZE, ttl_seconds: float = CAS_LOGIN_STATE_TTL_SECONDS):
+        self._states = TTLCache(maxsize, ttl_seconds)
 
-class LoginInfo(SQLModel):
-    sduid: str = Field(nullable=False, description="SDU ID")
-    rsa: str = Field(
-        nullable=False, description="strEnc(sduid+password+lt,'1','2','3')"
-    )
-    u: str = Field(nullable=False, description="strEnc(sduid,'1','2','3')")
-    p: str = Field(nullable=False, description="strEnc(password,'1','2','3')")
-    pl: int = Field(nullable=False, description="len(password)")
+    async def get(self, sduid: str) -> dict | None:
+        return self._states.get(sduid)
 
+    async def put(self, sduid: str, state: dict):
+        self._states.put(sduid, state)
 
-@router.post("/user/login", summary="山大统一认证登录")
-async def user_login(
-    sduid: str = Form(description="学号"),
-    password: str = Form(description="密码")
-):
-    #* 获取lt凭证
-    page = httpx.get(
-        "https://pass.sdu.edu.cn/cas/login",
-        params={
-            "service": "https://aiassist.sdu.edu.cn/common/actionCasLogin"
-            "?redirect_url=https%3A%2F%2Faiassist.sdu.edu.cn%2F"
-            "page%2Fsite%2FnewPc%3Flogin_return%3Dtrue"
-        },
-    )
-    login_infos: dict[str, dict] = {}
-    login_infos[sduid] = {
-        "cookies": page.cookies,
-        "time": datetime.now(),
-        "lt": re.findall(r'"lt" value="(.*?)"', page.text)[0],
-        "execution": re.findall('"execution" value="(.*?)"', page.text)[0], # "e1s1"
-        "event_id": re.findall('"_eventId" value="(.*?)"', page.text)[0], # "submit"
-    }
-    print(login_infos[sduid])
-    
-    #* 设备检测
-    fingerprint = sduid
-    cookies = login_infos[sduid]["cookies"]
-    murmur_s = hashlib.sha256(fingerprint.encode()).hexdigest()
-    ctx = execjs.compile(js_code)
-    device_status = json.loads(
-        httpx.post(
-            "https://pass.sdu.edu.cn/cas/device",
+    async def discard(self, sduid: str):
+        self._states.discard(sduid)
+
+
+def get_login_states(request: Request) -> LoginStateStore:
+    return request.app.state.cas_login_states
+
+
+class CASLoginAttempt:
+    """一次统一认证登录尝试，持有本次尝试独立的 cookie 与 lt 凭证"""
+
+    def __init__(self, cas: CASClient, sduid: str, password: str):
+        self.cas = cas
+        self.sduid = sduid
+        self.password = password
+        self.cookies = httpx.Cookies()
+        self.fingerprint = sduid
+        self.lt = self.execution = self.event_id = None
+
+    async def send(self, step: str, method: str, url: str, **kwargs) -> httpx.Response:
+        return await self.cas.send(self.cookies, step, method, url, **kwargs)
+
+    def export_state(self) -> dict:
+        """登录页凭证与 cookie，短信验证后据此继续本次登录"""
+        return {
+            "lt": self.lt,
+            "execution": self.execution,
+            "event_id": self.event_id,
+            "cookies": [[cookie.name, cookie.value, cookie.domain, cookie.path] for cookie in self.cookies.jar],
+            "credential": credential_digest(self.sduid, self.password),
+        }
+
+    @classmethod
+    def restore(cls, cas: CASClient, sduid: str, password: str, state: dict | None) -> "CASLoginAttempt | None":
+        """从 export_state 的结果恢复；没有状态或账号密码不一致时返回 None"""
+        if state is None or not hmac.compare_digest(state["credential"], credential_digest(sduid, password)):
+            return None
+        attempt = cls(cas, sduid, password)
+        attempt.lt, attempt.execution, attempt.event_id = state["lt"], state["execution"], state["event_id"]
+        for (name, value, domain, path) in state["cookies"]:
+            attempt.cookies.set(name, value, domain=domain, path=path)
+        return attempt
+
+    async def fetch_login_page(self):
+        """获取lt凭证"""
+        page = await self.send("login_page", "GET", f"{CAS_BASE_URL}/cas/login",
+                            params={"service": SERVICE_URL})
+        try:
+            self.lt = re.findall(r'"lt" value="(.*?)"', page.text)[0]
+            self.execution = re.findall('"execution" value="(.*?)"', page.text)[0] # "e1s1"
+            self.event_id = re.findall('"_eventId" value="(.*?)"', page.text)[0] # "submit"
+        except IndexError:
+            raise HTTPException(502, detail="统一认证登录页解析失败")
+
+    async def check_device(self) -> tuple[str, str]:
+        """设备检测，返回 (status, detail)"""
+        murmur_s = hashlib.sha256(self.fingerprint.encode()).hexdigest()
+        u, p = str_enc(self.sduid), str_enc(self.password)
+        response = await self.send(
+            "device", "POST", f"{CAS_BASE_URL}/cas/device",
             data={
-                "u": ctx.call("strEnc", sduid, "1", "2", "3"),
-                "p": ctx.call("strEnc", password, "1", "2", "3"),
+                "u": u,
+                "p": p,
                 "m": "1",
-                "d": fingerprint,
+                "d": self.fingerprint,
                 "d_s": murmur_s,
                 "d_md5": hashlib.md5(murmur_s.encode()).hexdigest(),
             },
-            cookies=cookies,
-        ).text
-    )
-    status = device_status.get("info")
-    match status:
-        case "binded" | "pass":
-            detail = status = "binded"
-        case "bind":
-            tmp = httpx.post(
-                "https://pass.sdu.edu.cn/cas/device", data={"m": "2"}, cookies=cookies
-            ).text
-            if "send" in tmp:
-                detail = "2FA:" + device_status.get("m")
-            else:
-                raise HTTPException(503, detail=tmp)
-        case _:
-            raise HTTPException(400, detail=device_status)
-    print({"status": status, "info": detail})
-    
-    #* 登录
-    if detail == "binded":
-        try: 
+        )
+        try:
+            device_status = json.loads(response.text)
+        except ValueError:
+            raise HTTPException(502, detail="统一认证设备检测结果解析失败")
+        status = device_status.get("info")
+        match status:
+            case "binded" | "pass":
+                detail = status = "binded"
+            case "bind":
+                tmp = (await self.send("device", "POST", f"{CAS_BASE_URL}/cas/device", data={"m": "2"})).text
+                if "send" in tmp:
+                    detail = "2FA:" + device_status.get("m")
+                else:
+                    raise HTTPException(503, detail=tmp)
+            case _:
+                raise HTTPException(400, detail=device_status)
+        return status, detail
+
+    async def bind_device(self, code: str):
+        """用短信验证码绑定设备"""
+        k = (await self.send(
+            "device", "POST", f"{CAS_BASE_URL}/cas/device",
+            data={
+                "d": hashlib.sha256(self.sduid.encode()).hexdigest(),
+                "i": self.sduid,
+                "m": 3,
+                "u": self.sduid,
+                "c": code,
+                "s": 1,
+            },
+        )).text
+        if "ok" not in k:
+            raise HTTPException(401, detail=k)
+
+    async def login(self) -> dict:
+        """提交登录表单，跟随跳转拿到业务系统会话后读取用户信息"""
+        login_response = await self.send(
+            "login", "POST", f"{CAS_BASE_URL}/cas/login",
+            params={"service": SERVICE_URL},
+            data={
+                "rsa": str_enc(self.sduid + self.password + self.lt),
+                "ul": len(self.sduid),
+                "pl": len(self.password),
+                "lt": self.lt,
+                "execution": self.execution,
+                "_eventId": self.event_id,
+            },
+        )
+        location = login_response.headers.get("location")
+        if not location:
+            raise HTTPException(401, detail="用户名或密码错误")
+        await self.send("service", "GET", location)
+        try:
             user_info = json.loads(
-                httpx.get(
-                    "https://aiassist.sdu.edu.cn/site/user_info",
-                    cookies=httpx.get(
-                        httpx.post(
-                            "https://pass.sdu.edu.cn/cas/login",
-                            cookies=login_infos[sduid]["cookies"],
-                            params={
-                                "service": "https://aiassist.sdu.edu.cn/common/actionCasLogin"
-                                "?redirect_url=https%3A%2F%2Faiassist.sdu.edu.cn%2F"
-                                "page%2Fsite%2FnewPc%3Flogin_return%3Dtrue"
-                            },
-                            data={
-                                "rsa": ctx.call("strEnc", sduid+password+login_infos[sduid]["lt"], "1", "2", "3"),
-                                "ul": len(sduid),
-                                "pl": len(password),
-                                "lt": login_infos[sduid]["lt"],
-                                "execution": login_infos[sduid]["execution"],
-                                "_eventId": login_infos[sduid]["event_id"],
-                            },
-                        ).headers["location"]
-                    ).cookies,
-                ).text
+                (await self.send("user_info", "GET", f"{AIASSIST_BASE_URL}/site/user_info")).text
             )["d"]
-        except KeyError:
+        except (KeyError, ValueError):
+            raise HTTPException(401, detail="用户名或密码错误")
+        return {"sduid": user_info["user_number"], "name": user_info["user_name"]}
+
+    async def run(self) -> dict:
+        """设备已绑定时直接登录，否则返回需要短信验证的提示"""
+        status, detail = await self.check_device()
+        if detail != "binded":
+            return {"status": status, "info": detail}
+        return await self.login()
+
+
+# credential_digest(sduid, password) -> TGT；以账号密码的摘要为键，密码错误时不会命中
+ticket_granting_tickets = TTLCache(CAS_TGT_CACHE_SIZE, CAS_TGT_TTL_SECONDS)
+
+
+def parse_service_response(text: str) -> dict:
+    """解析 serviceValidate 返回的 XML，按不带命名空间的标签名取学号与姓名"""
+    try:
+        root = ElementTree.fromstring(text)
+    except ElementTree.ParseError:
+        raise HTTPException(502, detail="统一认证票据校验结果解析失败")
+    values = {}
+    for element in root.iter():
+        tag = element.tag.rpartition("}")[2]
+        if tag == "authenticationFailure":
+            raise HTTPException(401, detail="统一认证票据校验失败")
+        if tag in ("user", "USER_NAME") and element.text:
+            values.setdefault(tag, element.text.strip())
+    if "user" not in values:
+        raise HTTPException(502, detail="统一认证票据校验结果缺少学号")
+    return {"sduid": values["user"], "name": values.get("USER_NAME", "")}
+
+
+class CASRestLogin:
+    """通过 CAS REST 接口登录：申请 TGT，用 TGT 换 ST，再校验 ST 取得用户信息
+
+    不需要解析网页、DES 加密与设备绑定；TGT 在有效期内缓存，再次登录只需后两步
+    """
+
+    def __init__(self, cas: CASClient, sduid: str, password: str):
+        self.cas = cas
+        self.sduid = sduid
+        self.password = password
+        self.cookies = httpx.Cookies()  # REST 接口不依赖 cookie，仅供 CASClient.send 使用
+        self.key = credential_digest(sduid, password)
+
+    async def send(self, step: str, method: str, url: str, **kwargs) -> httpx.Response:
+        return await self.cas.send(self.cookies, step, method, url, **kwargs)
+
+    async def ticket_granting_ticket(self) -> str:
+        tgt = (await self.send("tgt", "POST", f"{CAS_BASE_URL}/cas/restlet/tickets",
+                            data={"sduid": self.sduid, "password": self.password})).text.strip()
+        if not tgt.startswith("TGT"):
             raise HTTPException(401, detail="用户名或密码错误")
-    return {"sduid": user_info["user_number"], "name": user_info["user_name"]}
+        ticket_granting_tickets.put(self.key, tgt)
+        return tgt
+
+    async def service_ticket(self, tgt: str) -> str | None:
+        """TGT 已失效时返回 None"""
+        st = (await self.send("st", "POST", f"{CAS_BASE_URL}/cas/restlet/tickets/{tgt}",
+                            content=f"service={REST_SERVICE_URL}",
+                            headers={"Content-Type": "text/plain"})).text.strip()
+        return st if st.startswith("ST") else None
+
+    async def run(self) -> dict:
+        tgt = ticket_granting_tickets.get(self.key)
+        st = await self.service_ticket(tgt) if tgt is not None else None
+        if st is None: # 没有缓存或缓存的 TGT 已在统一认证过期，重新申请一次
+            ticket_granting_tickets.discard(self.key)
+            st = await self.service_ticket(await self.ticket_granting_ticket())
+            if st is None:
+                raise HTTPException(502, detail="统一认证未签发服务票据")
+        response = await self.send("validate", "GET", f"{CAS_BASE_URL}/cas/serviceValidate",
+                                params={"ticket": st, "service": REST_SERVICE_URL})
+        return parse_service_response(response.text)
+
+
+async def issue_student_token(session: AsyncSession, user_info: dict) -> dict:
+    """统一认证通过后签发学生令牌，此后的请求凭令牌识别身份，不必再次认证或传学号"""
+    user = await session.get(models.User, user_info["sduid"])
+    student = StudentPrincipal(
+        student_id=user_info["sduid"],
+        name=user.name if user else user_info["name"],
+        party_branch=user.party_branch if user else None,
+    )
+    return user_info | {
+        "party_branch": student.party_branch,
+        "access_token": create_student_token(student),
+        "token_type": "bearer",
+    }
+
+
+@router.post("/user/login", summary="山大统一认证登录")
+async def user_login(
+    sduid: str = Form(description="学号"),
+    password: str = Form(description="密码"),
+    cas: CASClient = Depends(get_cas_client),
+    login_states: LoginStateStore = Depends(get_login_states),
+    session: AsyncSession = Depends(get_session)
+):
+    """登录方式由环境变量 SDU_CAS_LOGIN_BACKEND 选择，rest 方式不会要求短信验证"""
+    if CAS_LOGIN_BACKEND == "rest":
+        return await issue_student_token(session, await CASRestLogin(cas, sduid, password).run())
+    attempt = CASLoginAttempt(cas, sduid, password)
+    await attempt.fetch_login_page()
+    result = await attempt.run()
+    if "sduid" not in result: # 需要短信验证码绑定设备，保存本次登录的状态供 /user/msgcheck 继续
+        await login_states.put(sduid, attempt.export_state())
+        return result
+    return await issue_student_token(session, result)
 
 
 @router.post("/user/msgcheck", summary="统一认证登录用短信验证码绑定设备")
 async def user_msgcheck(
     sduid: str = Form(description="学号"),
     password: str = Form(description="密码"),
-    code: str = Form(description="短信验证码")
+    code: str = Form(description="短信验证码"),
+    cas: CASClient = Depends(get_cas_client),
+    login_states: LoginStateStore = Depends(get_login_states),
+    session: AsyncSession = Depends(get_session)
 ):
-    #* 绑定设备
-    page = httpx.get(
-        "https://pass.sdu.edu.cn/cas/login",
-        params={
-            "service": "https://aiassist.sdu.edu.cn/common/actionCasLogin"
-            "?redirect_url=https%3A%2F%2Faiassist.sdu.edu.cn%2F"
-            "page%2Fsite%2FnewPc%3Flogin_return%3Dtrue"
-        },
-    )
-    k = httpx.post(
-        "https://pass.sdu.edu.cn/cas/device",
-        data={
-            "d": hashlib.sha256(sduid.encode()).hexdigest(),
-            "i": sduid,
-            "m": 3,
-            "u": sduid,
-            "c": code,
-            "s": 1,
-        },
-        cookies=page.cookies,
-    ).text
-    if "ok" in k:
-        print({"status": "ok"})
-    else:
-        raise HTTPException(401, detail=k)
-    user_login(sduid, password)
\ No newline at end of file
+    #* 接着 /user/login 保存的登录状态绑定设备并登录，不再重新获取登录页；
+    #* 状态已过期或账号密码不一致时退回到重新获取
+    attempt = CASLoginAttempt.restore(cas, sduid, password, await login_states.get(sduid))
+    if attempt is None:
+        attempt = CASLoginAttempt(cas, sduid, password)
+        await attempt.fetch_login_page()
+    await attempt.bind_device(code)  # 验证码错误时保留状态，可以重新提交
+    await login_states.discard(sduid)
+    result = await attempt.run()
+    if "sduid" not in result:
+        return result
+    return await issue_student_token(session, result)
@@ -1,30 +1,52 @@
-from fastapi import APIRouter, Depends, Body, status, HTTPException
-from sqlmodel import Session
+import os
+from fastapi import APIRouter, Depends, Body, Request, status, HTTPException
 import sql.models as models
-from sql.database import get_session
+from sql.database import AsyncSession, get_session
 import utils.schemas as schemas
 from utils.authorization import *
 import utils.response_format as rf
+from utils.leaderboard import leaderboards
+from utils.rate_limit import RateLimiter
 from sqlalchemy.exc import IntegrityError
 from fastapi.security import OAuth2PasswordRequestForm
 
 router = APIRouter()
 
 
+ADMIN_LOGIN_RATE_PER_MINUTE = float(os.getenv("ADMIN_LOGIN_RATE_PER_MINUTE", "10"))  # 每个用户名
+ADMIN_LOGIN_IP_RATE_PER_MINUTE = float(os.getenv("ADMIN_LOGIN_IP_RATE_PER_MINUTE", "60"))  # 每个 IP
+
+#* 密码校验每次要占用一个 bcrypt 线程，先按用户名与 IP 限流，集中的登录尝试不会挤占答题与排行榜接口
+login_username_limiter = RateLimiter(ADMIN_LOGIN_RATE_PER_MINUTE / 60, burst=5)
+login_ip_limiter = RateLimiter(ADMIN_LOGIN_IP_RATE_PER_MINUTE / 60, burst=20)
+
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
 @router.post("/admin/register",
             summary="管理员账号注册",
             status_code=status.HTTP_201_CREATED)
-async def admin_register(admin: schemas.AdminRegisterRequest, 
-session: Session=Depends(get_session)):
+async def admin_register(admin: schemas.AdminRegisterRequest, request: Request,
+session: AsyncSession=Depends(get_session)):
     """内部接口，不对外开放
     """
+    retry_after = login_ip_limiter.acquire(client_ip(request))
+    if retry_after:
+        return rf.res_429(message="请求过于频繁，请稍后再试", retry_after=retry_after)
+    try:
+        hashed_password = await password_pool.hash(admin.password)
+    except PasswordPoolBusy:
+        return rf.res_429(message="服务器繁忙，请稍后再试")
     admin_for_db = models.Admin(username=admin.username, 
-                            hashed_password=get_password_hash(admin.password))
+                            hashed_password=hashed_password)
     try:
         session.add(admin_for_db)
-        session.commit()
-        session.refresh(admin_for_db)
+        await session.commit()
+        await session.refresh(admin_for_db)
     except IntegrityError: 
+        await session.rollback()
         return rf.res_400(message="用户名已存在")
     return rf.res_201(message="注册成功", 
         data={
@@ -35,8 +57,8 @@ session: Session=Depends(get_session)):
 
 @router.post("/admin/login",
             summary="管理员账号登录")
-async def admin_login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
-session: Session=Depends(get_session)):
+async def admin_login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()], request: Request,
+session: AsyncSession=Depends(get_session)):
     """请求体中包含以下字段：
     - **username**: 用户名
     - **password**: 密码
@@ -46,13 +68,21 @@ session: Session=Depends(get_session)):
     
     须以表单形式提交。
     """
-    user = session.exec(select(models.Admin).filter_by(username=form_data.username)).first()
+    retry_after = max(login_ip_limiter.acquire(client_ip(request)),
+                    login_username_limiter.acquire(form_data.username))
+    if retry_after:
+        return rf.res_429(message="登录尝试过于频繁，请稍后再试", retry_after=retry_after)
+    user = (await session.exec(select(models.Admin).filter_by(username=form_data.username))).first()
     if not user:
         return rf.res_401(message="账号或密码错误")
-    if not verify_password(form_data.password, user.hashed_password):
+    try:
+        password_ok = await password_pool.verify(form_data.password, user.hashed_password)
+    except PasswordPoolBusy:
+        return rf.res_429(message="服务器繁忙，请稍后再试")
+    if not password_ok:
         return rf.res_401(message="账号或密码错误")
-    access_token = create_access_token(data={"sub": user.username})
-    refresh_token = create_refresh_token(data={"sub": user.username})
+    access_token = create_access_token(data=admin_token_data(user))
+    refresh_token = create_refresh_token(data=admin_token_data(user))
     token = Token(access_token=access_token, refresh_token=refresh_token,
                 token_type="bearer", username=user.username)
     return rf.res_200(message="登录成功", data=token.model_dump())
@@ -61,43 +91,39 @@ session: Session=Depends(get_session)):
 @router.delete("/admin/delete",
             summary="删除管理员账号")
 async def admin_delete(admin=Depends(admin_verify_token),
-session: Session=Depends(get_session)):
+session: AsyncSession=Depends(get_session)):
     """内部接口, 不对外开放
     """
     if admin.id:
-        admin_in_db = session.get(models.Admin, admin.id)
+        admin_in_db = await session.get(models.Admin, admin.id)
         if not admin_in_db:
             return rf.res_404(message="该账号不存在")
-        session.delete(admin_in_db)
-        session.commit()
+        await session.delete(admin_in_db)
+        await session.commit()
+        admin_principals.discard(admin.username)  # 已签发的令牌随即失效
         return rf.res_204(message="账号删除成功")
 
 
 @router.get("/admin/refresh-token", response_model=Token,
             summary="当access_token过期时，用refresh_token获取新的access_token和refresh_token")
 async def admin_refresh_token(refresh_token: Annotated[str, Depends(oauth2_scheme)], 
-                session: Session = Depends(get_session)):
+                session: AsyncSession = Depends(get_session)):
     """在请求头添加`Authorization`字段并设置值为`Bearer <refresh_token>`。"""
     # refresh_token_exception = HTTPException(
     #     status_code=status.HTTP_401_UNAUTHORIZED,
     #     detail="无效的身份验证凭据",
     #     headers={"WWW-Authenticate": "Bearer"})
-    try:
-        payload = jwt.decode(refresh_token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            # raise refresh_token_exception
-            return rf.res_401(message="无效的身份验证凭据")
-        token_data = TokenData(username=username)
-    except InvalidTokenError:
+    token_data = decode_admin_token(refresh_token)
+    if token_data is None:
         # raise refresh_token_exception
-            return rf.res_401(message="无效的身份验证凭据")
-    user = session.exec(select(models.Admin).filter_by(username=token_data.username)).first()
+        return rf.res_401(message="无效的身份验证凭据")
+    #* 与其他管理员接口共用身份缓存，不必每次刷新都查询管理员
+    user = await get_admin_principal(session, token_data)
     if not user:
         # raise refresh_token_exception
         return rf.res_401(message="无效的身份验证凭据")
-    access_token = create_access_token(data={"sub": user.username})
-    refresh_token = create_refresh_token(data={"sub": user.username})
+    access_token = create_access_token(data=admin_token_data(user))
+    refresh_token = create_refresh_token(data=admin_token_data(user))
     return rf.res_200(message="刷新成功", data=Token(access_token=access_token, refresh_token=refresh_token,
             username=user.username, token_type="bearer").model_dump())
 
@@ -105,32 +131,49 @@ async def admin_refresh_token(refresh_token: Annotated[str, Depends(oauth2_schem
 @router.post("/user",
             summary="用户修改党支部信息")
 async def create_user(user: schemas.UserChangePartyBranchRequest, 
-session: Session=Depends(get_session)):
+token_student: StudentPrincipal | None = Depends(student_token),
+session: AsyncSession=Depends(get_session)):
     """如果用户是初次修改党支部信息，则在数据库中创建一个用户。
     如果用户已经存在，则更新其党支部信息。
+
+    带学生令牌时学号与姓名取自令牌，并返回带有新党支部信息的令牌，之后的请求应改用新令牌。
     """
-    user_in_db = session.get(models.User, user.student_id)
+    if token_student is not None:
+        student_id, name = token_student.student_id, token_student.name
+    else:
+        student_id, name = user.student_id, user.name
+        if not student_id or not name:
+            return rf.res_400(message="缺少学号或姓名")
+    user_in_db = await session.get(models.User, student_id)
     if not user_in_db: # 数据库中无此用户，创建新用户
-        user_for_db = models.User.model_validate(user)
-        session.add(user_for_db)
-        session.commit()
-        session.refresh(user_for_db)
-        return rf.res_201(message="党支部信息创建成功",
-            data=user_for_db.model_dump())
+        user_in_db = models.User(student_id=student_id, name=name, party_branch=user.party_branch)
+        session.add(user_in_db)
+        session.add(models.UserStats(student_id=student_id))
+        await session.commit()
+        await session.refresh(user_in_db)
+        (status_code, message) = (201, "党支部信息创建成功")
     else: # 数据库已有此用户，更新其党支部信息
         user_in_db.party_branch = user.party_branch
         session.add(user_in_db)
-        session.commit()
-        session.refresh(user_in_db)
-        return rf.res_200(message="党支部信息更新成功",
-            data=user_in_db.model_dump())
+        await session.commit()
+        await session.refresh(user_in_db)
+        leaderboards.update_student(user_in_db.student_id, user_in_db.name, user_in_db.party_branch)
+        (status_code, message) = (200, "党支部信息更新成功")
+    data = user_in_db.model_dump()
+    if token_student is not None:
+        data["access_token"] = create_student_token(StudentPrincipal(
+            student_id=user_in_db.student_id, name=user_in_db.name, party_branch=user_in_db.party_branch))
+        data["token_type"] = "bearer"
+    if status_code == 201:
+        return rf.res_201(message=message, data=data)
+    return rf.res_200(message=message, data=data)
 
 
 @router.get("/user/{student_id}",
             summary="获取用户党支部信息")
 async def get_user(student_id: str, 
-session: Session=Depends(get_session)):
-    student = session.get(models.User, student_id)
+session: AsyncSession=Depends(get_session)):
+    student = await session.get(models.User, student_id)
     if not student:
         return rf.res_404(message="请先设置党支部信息")
     return rf.res_200(message="获取党支部信息成功",
@@ -0,0 +1,46 @@
+from sqlmodel import select, update, bindparam
+from sqlmodel.ext.asyncio.session import AsyncSession
+import sql.models as models
+from utils.answer_codec import ANSWER_FORMAT_V1, encode_answers, decode_legacy_answers
+from utils.grading import GradingError
+from utils.schemas import CommitAnswer
+
+
+MIGRATION_BATCH_SIZE = 500
+
+
+async def migrate_answers(session: AsyncSession) -> tuple[int, int]:
+    """把旧格式 str(list[dict]) 的作答记录改写为 v1 格式，按 id 分批处理并逐批提交
+
+    返回 (改写条数, 无法解析而保留原样的条数)
+    """
+    Record = models.Record
+    migrated_num, skipped_num = 0, 0
+    last_id = 0
+    while True:
+        rows = (await session.exec(
+            select(Record.id, Record.answer)
+            .where(Record.id > last_id, Record.answer.not_like(f"{ANSWER_FORMAT_V1}%"))
+            .order_by(Record.id)
+            .limit(MIGRATION_BATCH_SIZE)
+        )).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        updates = []
+        for row in rows:
+            try:
+                answers = [CommitAnswer.model_validate(a) for a in decode_legacy_answers(row.answer)]
+                updates.append({"record_id": row.id, "new_answer": encode_answers(answers)})
+            except (ValueError, SyntaxError, GradingError):
+                skipped_num += 1
+        if updates:
+            await session.exec(
+                update(Record.__table__)
+                .where(Record.__table__.c.id == bindparam("record_id"))
+                .values(answer=bindparam("new_answer")),
+                params=updates,
+            )
+            await session.commit()
+            migrated_num += len(updates)
+    return migrated_num, skipped_num
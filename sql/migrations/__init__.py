@@ -0,0 +1,85 @@
+"""数据库结构迁移
+
+每个迁移是本包中名为 m<四位版本号>_<说明>.py 的模块，提供 async def upgrade(session)。
+已执行的版本记录在 schema_migrations 表中，部署时执行一次即可，不再随应用启动建表：
+    python -m sql.migrations              # 执行尚未执行的迁移，并检查热点查询的执行计划
+    python -m sql.migrations status       # 查看各迁移的执行状态
+    python -m sql.migrations check-plans  # 只检查热点查询的执行计划
+数据维护命令也在这里：
+    python -m sql.migrations rebuild-stats       # 由作答记录重建用户累计成绩与逐题统计
+    python -m sql.migrations rebuild-user-stats  # 只重建用户累计成绩
+    python -m sql.migrations migrate-answers     # 把旧格式的作答记录改写为 v1 格式
+
+迁移应当可以重复执行（IF NOT EXISTS、checkfirst 等），中途失败后重新执行即可。
+"""
+import importlib
+import pkgutil
+import re
+from datetime import datetime
+from typing import NamedTuple
+from types import ModuleType
+from sqlalchemy import Table, Column, Integer, String, DateTime, MetaData, inspect
+from sqlmodel import select, insert
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+MIGRATION_MODULE_PATTERN = re.compile(r"^m(\d{4})_(\w+)$")
+
+# 不放进 SQLModel.metadata，避免被业务表的建表逻辑管理
+migration_table = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    module: ModuleType
+
+
+def discover_migrations() -> list[Migration]:
+    migrations = []
+    for module_info in pkgutil.iter_modules(__path__):
+        match = MIGRATION_MODULE_PATTERN.match(module_info.name)
+        if match:
+            module = importlib.import_module(f"{__name__}.{module_info.name}")
+            migrations.append(Migration(int(match.group(1)), match.group(2), module))
+    migrations.sort(key=lambda migration: migration.version)
+    return migrations
+
+
+async def applied_versions(session: AsyncSession) -> set[int]:
+    """已执行的迁移版本；迁移表尚不存在时视为一个都没有执行"""
+    has_table = await session.run_sync(
+        lambda sync_session: inspect(sync_session.connection()).has_table(migration_table.name)
+    )
+    if not has_table:
+        return set()
+    return set((await session.exec(select(migration_table.c.version))).all())
+
+
+async def pending_migrations(session: AsyncSession) -> list[Migration]:
+    applied = await applied_versions(session)
+    return [migration for migration in discover_migrations() if migration.version not in applied]
+
+
+async def upgrade(session: AsyncSession) -> list[Migration]:
+    """按版本顺序执行尚未执行的迁移，每个迁移执行完即提交并登记，返回本次执行的迁移"""
+    await session.run_sync(
+        lambda sync_session: migration_table.create(sync_session.connection(), checkfirst=True)
+    )
+    await session.commit()
+    migrations = await pending_migrations(session)
+    for migration in migrations:
+        await migration.module.upgrade(session)
+        await session.exec(insert(migration_table).values(
+            version=migration.version,
+            name=migration.name,
+            applied_at=datetime.now(),
+        ))
+        await session.commit()
+    return migrations
@@ -0,0 +1,85 @@
+"""用法：python -m sql.migrations [upgrade|status|check-plans|rebuild-stats|rebuild-user-stats|migrate-answers]"""
+import argparse
+import asyncio
+import logging
+import sys
+
+from sql.database import async_engine, AsyncSession
+from sql.migrations import upgrade, discover_migrations, applied_versions
+from sql.migrations.query_plans import check_query_plans
+from sql.stats import rebuild_user_stats, rebuild_question_stats
+from sql.answer_migration import migrate_answers
+
+
+async def run_upgrade() -> bool:
+    async with AsyncSession(async_engine) as session:
+        migrations = await upgrade(session)
+        for migration in migrations:
+            print(f"已执行迁移 {migration.version:04d} {migration.name}")
+        if not migrations:
+            print("数据库结构已是最新")
+        return await check_query_plans(session)
+
+
+async def show_status() -> bool:
+    async with AsyncSession(async_engine) as session:
+        applied = await applied_versions(session)
+    for migration in discover_migrations():
+        print(f"{migration.version:04d} {migration.name}：{'已执行' if migration.version in applied else '未执行'}")
+    return True
+
+
+async def run_check_plans() -> bool:
+    async with AsyncSession(async_engine) as session:
+        return await check_query_plans(session)
+
+
+async def run_rebuild_stats() -> bool:
+    """由作答记录重建用户累计成绩与逐题统计"""
+    async with AsyncSession(async_engine) as session:
+        print(f"已重建 {await rebuild_user_stats(session)} 名用户的累计成绩")
+        print(f"已重建逐题统计 {await rebuild_question_stats(session)} 行")
+        await session.commit()
+    return True
+
+
+async def run_rebuild_user_stats() -> bool:
+    """只重建用户累计成绩"""
+    async with AsyncSession(async_engine) as session:
+        print(f"已重建 {await rebuild_user_stats(session)} 名用户的累计成绩")
+        await session.commit()
+    return True
+
+
+async def run_migrate_answers() -> bool:
+    """把旧格式的作答记录改写为 v1 格式"""
+    async with AsyncSession(async_engine) as session:
+        (migrated_num, skipped_num) = await migrate_answers(session)
+    print(f"作答记录格式迁移完成，改写 {migrated_num} 条，无法解析 {skipped_num} 条")
+    return True
+
+
+COMMANDS = {
+    "upgrade": run_upgrade,
+    "status": show_status,
+    "check-plans": run_check_plans,
+    "rebuild-stats": run_rebuild_stats,
+    "rebuild-user-stats": run_rebuild_user_stats,
+    "migrate-answers": run_migrate_answers,
+}
+
+
+async def run(command: str) -> bool:
+    try:
+        return await COMMANDS[command]()
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m sql.migrations", description="数据库结构迁移与数据维护")
+    parser.add_argument("command", nargs="?", default="upgrade", choices=COMMANDS.keys())
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")  # 显示迁移中清理、回填数据的说明
+    if not asyncio.run(run(args.command)):
+        sys.exit(1)
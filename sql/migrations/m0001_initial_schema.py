@@ -0,0 +1,141 @@
+"""建表，并补齐热点查询所需的索引与作答记录的 (student_id, project_uuid) 唯一约束
+
+此前由 create_all 建立的数据库缺少后来在模型中声明的表与索引；
+应用层“每人每期只能作答一次”的检查在并发提交时可能失效，建唯一索引前先清理重复记录，
+保留每人每期最早的一条（即最先提交的作答），并重算受影响项目的参与人数与用户累计成绩。
+用户累计成绩表为本次新建时，由已有作答记录回填全部用户。
+
+表与索引按本版本时的结构写死，不随模型变化；此后的结构变化只在后续迁移中进行。
+"""
+import logging
+from sqlalchemy import (MetaData, Table, Column, Index, ForeignKey,
+                        Integer, String, DateTime, Float, Boolean)
+from sqlmodel import select, update, delete, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sql.stats import rebuild_user_stats
+
+
+logger = logging.getLogger(__name__)
+
+metadata = MetaData()
+
+user = Table(
+    "user", metadata,
+    Column("student_id", String, primary_key=True, unique=True),
+    Column("name", String, nullable=False),
+    Column("party_branch", String, nullable=False),
+)
+
+admin = Table(
+    "admin", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("username", String, nullable=False, unique=True),
+    Column("hashed_password", String, nullable=False),
+)
+
+project = Table(
+    "project", metadata,
+    Column("uuid", String, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("issue_num", Integer, nullable=False, unique=True),
+    Column("starttime", DateTime, nullable=False),
+    Column("deadline", DateTime, nullable=False),
+    Column("status", Integer, nullable=False, index=True),
+    Column("participate_num", Integer, nullable=False),
+    Column("creater_id", Integer, ForeignKey("admin.id", ondelete="CASCADE"), nullable=False, index=True),
+)
+
+question = Table(
+    "question", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("type", Integer, nullable=False),
+    Column("text", String, nullable=False),
+    Column("A", String, nullable=False),
+    Column("B", String, nullable=False),
+    Column("C", String, nullable=False),
+    Column("D", String, nullable=False),
+    Column("answer", String, nullable=False),
+    Column("project_uuid", String, ForeignKey("project.uuid", ondelete="CASCADE"), nullable=False, index=True),
+)
+
+record = Table(
+    "record", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("student_id", String, ForeignKey("user.student_id", ondelete="CASCADE"), nullable=False),
+    Column("project_uuid", String, ForeignKey("project.uuid", ondelete="CASCADE"), nullable=False),
+    Column("answer", String, nullable=False),
+    Column("correct_num", Integer, nullable=False),
+    Column("time_used_seconds", Float, nullable=False),
+    Column("valid_flag", Boolean, nullable=False),
+)
+Index("ix_record_ranking", record.c.project_uuid, record.c.valid_flag, record.c.correct_num.desc(),
+    record.c.time_used_seconds, record.c.id, record.c.student_id)
+Index("ux_record_student_project", record.c.student_id, record.c.project_uuid, unique=True)
+
+userstats = Table(
+    "userstats", metadata,
+    Column("student_id", String, ForeignKey("user.student_id", ondelete="CASCADE"), primary_key=True),
+    Column("total_correct_num", Integer, nullable=False),
+    Column("total_time_used_seconds", Float, nullable=False),
+    Column("record_num", Integer, nullable=False),
+    Column("average_time_used_seconds", Float, nullable=False),
+)
+Index("ix_userstats_ranking", userstats.c.total_correct_num.desc(), userstats.c.average_time_used_seconds,
+    userstats.c.student_id)
+
+
+def create_tables(connection):
+    # 只创建尚不存在的表，已存在的表不会补建索引
+    metadata.create_all(connection)
+
+
+def create_indexes(connection):
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+async def remove_duplicate_records(session: AsyncSession) -> tuple[set[str], set[str]]:
+    """删除同一用户同一期的重复作答记录，返回受影响的 (学号集合, 项目 uuid 集合)"""
+    duplicates = (await session.exec(
+        select(record.c.student_id, record.c.project_uuid, func.min(record.c.id))
+        .group_by(record.c.student_id, record.c.project_uuid)
+        .having(func.count(record.c.id) > 1)
+    )).all()
+    student_ids, project_uuids = set(), set()
+    for (student_id, project_uuid, first_record_id) in duplicates:
+        await session.exec(
+            delete(record)
+            .where(record.c.student_id == student_id,
+                record.c.project_uuid == project_uuid,
+                record.c.id != first_record_id)
+        )
+        student_ids.add(student_id)
+        project_uuids.add(project_uuid)
+    if project_uuids:
+        await session.exec(
+            update(project)
+            .where(project.c.uuid.in_(project_uuids))
+            .values(participate_num=(
+                select(func.count(record.c.id))
+                .where(record.c.project_uuid == project.c.uuid)
+                .scalar_subquery()
+            ))
+        )
+    return student_ids, project_uuids
+
+
+async def upgrade(session: AsyncSession):
+    await session.run_sync(lambda sync_session: create_tables(sync_session.connection()))
+    student_ids, project_uuids = await remove_duplicate_records(session)
+    if student_ids:
+        logger.info("已清理重复作答记录，涉及 %d 名用户、%d 期项目", len(student_ids), len(project_uuids))
+    #* 汇总表为空（本次新建，或上次执行在回填前中断）时由已有作答记录回填全部用户，
+    #* 否则只重算清理了重复记录的用户
+    if (await session.exec(select(func.count()).select_from(userstats))).one() == 0:
+        user_num = await rebuild_user_stats(session)
+        if user_num:
+            logger.info("已回填 %d 名用户的累计成绩", user_num)
+    elif student_ids:
+        await rebuild_user_stats(session, list(student_ids))
+    await session.run_sync(lambda sync_session: create_indexes(sync_session.connection()))
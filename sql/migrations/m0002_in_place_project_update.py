@@ -0,0 +1,54 @@
+"""支持按差异原地更新项目
+
+- 项目增加 version 列，项目内容每修改一次加 1
+- SQLite 下题目表改为 AUTOINCREMENT，删除的题目 id 不再被新题目复用
+
+列已存在、题目表已是 AUTOINCREMENT 时跳过对应步骤，中途失败后可重新执行。
+"""
+from sqlalchemy import MetaData, inspect, text
+from sqlmodel.ext.asyncio.session import AsyncSession
+import sql.models as models
+
+
+def has_column(connection, table_name: str, column_name: str) -> bool:
+    return any(column["name"] == column_name for column in inspect(connection).get_columns(table_name))
+
+
+def rebuild_question_table(connection):
+    """SQLite 不能修改已有表的主键定义，按新定义建表后整体拷贝
+
+    先建 question_new、删除旧表后再改名：若先把 question 改名，SQLite 会把其他表中
+    指向 question 的外键一并改为指向改名后的表
+    """
+    table_sql = connection.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'question'"
+    ).scalar()
+    if table_sql is None: # 上次执行在删除旧表之后、改名之前中断，数据已在 question_new 中
+        connection.exec_driver_sql("ALTER TABLE question_new RENAME TO question")
+        for index in models.Question.__table__.indexes:
+            index.create(connection, checkfirst=True)
+        return
+    if "AUTOINCREMENT" in table_sql.upper():
+        return
+    columns = ", ".join(f'"{column.name}"' for column in models.Question.__table__.columns)
+    for index in models.Question.__table__.indexes:
+        connection.exec_driver_sql(f"DROP INDEX IF EXISTS {index.name}")
+    connection.exec_driver_sql("DROP TABLE IF EXISTS question_new")  # 上次执行中途失败留下的
+    metadata = MetaData()  # 不放进 SQLModel.metadata，复制被引用的表供解析外键
+    for constraint in models.Question.__table__.foreign_key_constraints:
+        constraint.referred_table.to_metadata(metadata)
+    new_table = models.Question.__table__.to_metadata(metadata, name="question_new")
+    new_table.indexes.clear()  # 复制出的索引会按新表名命名，改名后再按模型建索引
+    new_table.create(connection)
+    connection.exec_driver_sql(f"INSERT INTO question_new ({columns}) SELECT {columns} FROM question")
+    connection.exec_driver_sql("DROP TABLE question")
+    connection.exec_driver_sql("ALTER TABLE question_new RENAME TO question")
+    for index in models.Question.__table__.indexes:
+        index.create(connection)
+
+
+async def upgrade(session: AsyncSession):
+    if not await session.run_sync(lambda sync_session: has_column(sync_session.connection(), "project", "version")):
+        await session.exec(text("ALTER TABLE project ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+    if session.get_bind().dialect.name == "sqlite":
+        await session.run_sync(lambda sync_session: rebuild_question_table(sync_session.connection()))
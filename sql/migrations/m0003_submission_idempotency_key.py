@@ -0,0 +1,13 @@
+"""作答记录增加 idempotency_key 列
+
+客户端重试提交时带上同一标识，与已有记录的标识相同即返回首次提交的结果。
+列已存在（上次执行在登记前中断）时跳过。
+"""
+from sqlalchemy import text
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sql.migrations.m0002_in_place_project_update import has_column
+
+
+async def upgrade(session: AsyncSession):
+    if not await session.run_sync(lambda sync_session: has_column(sync_session.connection(), "record", "idempotency_key")):
+        await session.exec(text("ALTER TABLE record ADD COLUMN idempotency_key VARCHAR(64)"))
@@ -0,0 +1,25 @@
+"""建立逐题统计表，并由已有作答记录回填
+
+此后逐题统计随答案提交累加；统计与作答记录不一致时可执行 python -m sql.migrations rebuild-stats 重建。
+"""
+import logging
+from sqlmodel.ext.asyncio.session import AsyncSession
+import sql.models as models
+from sql.stats import rebuild_question_stats
+
+
+logger = logging.getLogger(__name__)
+
+
+def create_table(connection):
+    table = models.QuestionAnswerStats.__table__
+    table.create(connection, checkfirst=True)
+    for index in table.indexes:
+        index.create(connection, checkfirst=True)
+
+
+async def upgrade(session: AsyncSession):
+    await session.run_sync(lambda sync_session: create_table(sync_session.connection()))
+    row_num = await rebuild_question_stats(session)
+    if row_num:
+        logger.info("已回填逐题统计 %d 行", row_num)
@@ -0,0 +1,67 @@
+"""检查热点查询的执行计划是否走预期的索引（仅 SQLite）
+
+用 EXPLAIN QUERY PLAN 查看与路由中相同写法的查询，计划中出现预期的索引名、
+且没有对 record/project/question 等表的全表扫描即视为通过。
+"""
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+import sql.models as models
+from sql.queries import all_ranking_of_statement, project_ranking_statement
+
+
+HOT_TABLES = ("record", "project", "question", "questionanswerstats", "userstats")
+
+
+def hot_queries():
+    """(说明, 查询, 预期使用的索引)"""
+    Record, Project, Question = models.Record, models.Project, models.Question
+    return [
+        ("用户某期的作答记录",
+            select(Record).filter_by(student_id="s", project_uuid="p"), "ux_record_student_project"),
+        ("用户参与过的项目",
+            select(Record).filter_by(student_id="s"), "ux_record_student_project"),
+        ("项目的参与者",
+            select(Record.student_id).filter_by(project_uuid="p"), "ix_record_ranking"),
+        ("项目列表中的参与人数",
+            select(func.count(Record.id)).where(Record.project_uuid == "p"), "ix_record_ranking"),
+        ("当期排行榜",
+            project_ranking_statement("p"), "ix_record_ranking"),
+        ("往期累计排行榜中的本人名次",
+            all_ranking_of_statement("s"), "ix_userstats_ranking"),
+        ("管理员创建的项目",
+            select(Project).filter_by(creater_id=1), "ix_project_creater_id"),
+        ("已开始的项目",
+            select(Project).where(Project.status > 0), "ix_project_status"),
+        ("项目的题目",
+            select(Question).filter_by(project_uuid="p"), "ix_question_project_uuid"),
+        ("项目的逐题统计",
+            select(models.QuestionAnswerStats).filter_by(project_uuid="p"), "ix_questionanswerstats_project_uuid"),
+    ]
+
+
+def is_full_scan(detail: str) -> bool:
+    # 形如 "SCAN record"；"SCAN record USING COVERING INDEX ..." 是按索引顺序扫描，不算全表扫描
+    words = detail.split()
+    return (len(words) == 2 and words[0] == "SCAN" and words[1] in HOT_TABLES)
+
+
+async def check_query_plans(session: AsyncSession) -> bool:
+    """逐条打印检查结果，全部通过时返回 True"""
+    bind = session.get_bind()
+    if bind.dialect.name != "sqlite":
+        print(f"跳过执行计划检查：仅支持 SQLite，当前为 {bind.dialect.name}")
+        return True
+    all_passed = True
+    for (description, statement, index_name) in hot_queries():
+        sql = str(statement.compile(dialect=bind.dialect, compile_kwargs={"literal_binds": True}))
+        details = [row[-1] for row in await session.run_sync(
+            lambda sync_session: sync_session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()
+        )]
+        passed = (any(index_name in detail for detail in details)
+                and not any(is_full_scan(detail) for detail in details))
+        all_passed = all_passed and passed
+        print(f"[{'通过' if passed else '未通过'}] {description}：预期 {index_name}")
+        if not passed:
+            for detail in details:
+                print(f"    {detail}")
+    return all_passed
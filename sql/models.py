@@ -1,5 +1,6 @@
-from sqlmodel import SQLModel, Field, Relationship
+from sqlmodel import SQLModel, Field, Relationship, Index
 from datetime import datetime, time
+from utils.answer_codec import decode_answers
 
 
 class User(SQLModel, table=True):
@@ -7,6 +8,7 @@ class User(SQLModel, table=True):
     name: str
     party_branch: str
     records: list["Record"] = Relationship(back_populates="student", cascade_delete=True)
+    stats: "UserStats" = Relationship(back_populates="student", cascade_delete=True)
 
 
 class Admin(SQLModel, table=True):
@@ -22,15 +24,19 @@ class Project(SQLModel, table=True):
     issue_num: int = Field(unique=True)
     starttime: datetime
     deadline: datetime
-    status: int = Field(default=0)  # 0为未开始，1为进行中，2为已结束
+    status: int = Field(default=0, index=True)  # 0为未开始，1为进行中，2为已结束
     questions: list["Question"] = Relationship(back_populates="project", cascade_delete=True)
     records: list["Record"] = Relationship(back_populates="project", cascade_delete=True)
     participate_num: int = Field(default=0)
-    creater_id: int = Field(foreign_key="admin.id", ondelete="CASCADE")
+    version: int = Field(default=1)  # 项目内容每修改一次加 1，供缓存与判分判断是否过期
+    creater_id: int = Field(foreign_key="admin.id", ondelete="CASCADE", index=True)
     creater: Admin = Relationship(back_populates="projects")
 
 
 class Question(SQLModel, table=True):
+    # 题目可单独删除；SQLite 下不复用已删除的 id，避免旧答卷中的题目 id 对应到新题目上
+    __table_args__ = {"sqlite_autoincrement": True}
+
     id: int | None = Field(default=None, primary_key=True)
     type: int = Field(description="题目类型，0为单选，1为多选")
     text: str
@@ -39,7 +45,7 @@ class Question(SQLModel, table=True):
     C: str
     D: str
     answer: str
-    project_uuid: str = Field(foreign_key="project.uuid", ondelete="CASCADE")
+    project_uuid: str = Field(foreign_key="project.uuid", ondelete="CASCADE", index=True)
     project: Project = Relationship(back_populates="questions")
 
 
@@ -53,3 +59,51 @@ class Record(SQLModel, table=True):
     correct_num: int
     time_used_seconds: float
     valid_flag: bool = Field(default=True)  # 0为超期无效作答，1为期内有效作答
+    idempotency_key: str | None = Field(default=None, max_length=64)  # 客户端生成的提交标识，重试时原样带上
+
+    def answer_sheet(self) -> list[dict]:
+        """按需解码作答详情，格式见 utils/answer_codec.py"""
+        return decode_answers(self.answer)
+
+
+# 当期排行榜按此顺序读取；末尾的 id、student_id 使名次计算与关联用户无需回表
+# 以 project_uuid 开头，按项目查询作答记录（含级联删除）也走此索引
+Index("ix_record_ranking",
+    Record.project_uuid,
+    Record.valid_flag,
+    Record.correct_num.desc(),
+    Record.time_used_seconds,
+    Record.id,
+    Record.student_id)
+
+# 每个用户每期只能作答一次；同时用于按学号查询作答记录
+Index("ux_record_student_project", Record.student_id, Record.project_uuid, unique=True)
+
+
+class UserStats(SQLModel, table=True):
+    """用户累计成绩汇总，随答案提交在同一事务中更新，供往期累计排行榜直接读取"""
+    student_id: str = Field(primary_key=True, foreign_key="user.student_id", ondelete="CASCADE")
+    student: User = Relationship(back_populates="stats")
+    total_correct_num: int = Field(default=0)  # 有效作答的累计答对数
+    total_time_used_seconds: float = Field(default=0)  # 有效作答的累计用时
+    record_num: int = Field(default=0)  # 全部作答记录数（含超期作答）
+    average_time_used_seconds: float = Field(default=0)  # total_time_used_seconds / record_num
+
+
+# 往期累计排行榜按此顺序读取，无需每次全表排序
+Index("ix_userstats_ranking",
+    UserStats.total_correct_num.desc(),
+    UserStats.average_time_used_seconds,
+    UserStats.student_id)
+
+
+class QuestionAnswerStats(SQLModel, table=True):
+    """每道题每种作答被选的次数，随答案提交在同一事务中累加，供逐题统计直接读取
+
+    按整个作答（选项位掩码）而不是单个选项计数：各选项的选择人数由掩码求和得到，
+    正确率在读取时与当前答案比较得到，修改答案后无需重算
+    """
+    question_id: int = Field(primary_key=True, foreign_key="question.id", ondelete="CASCADE")
+    answer_mask: int = Field(primary_key=True)  # 见 utils/grading.py 的 option_mask，0 为未选
+    project_uuid: str = Field(foreign_key="project.uuid", ondelete="CASCADE", index=True)
+    chosen_num: int = Field(default=0)
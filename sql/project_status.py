@@ -0,0 +1,105 @@
+"""项目状态：0为未开始，1为进行中，2为已结束
+
+接口返回的状态总是按开始/截止时间现算，GET 接口不再写库；
+库中的 Project.status 只供按状态筛选的查询使用，由 ProjectStatusScheduler
+在最近的开始/截止时间点批量更新。
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime
+from sqlmodel import select, update, func, case
+from sqlmodel.ext.asyncio.session import AsyncSession
+import sql.models as models
+
+
+STATUS_MAX_SLEEP_SECONDS = float(os.getenv("STATUS_MAX_SLEEP_SECONDS", "300"))  # 没有待到来的时间点时的检查间隔
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def project_status(starttime: datetime, deadline: datetime, now: datetime | None = None) -> int:
+    now = now or datetime.now()
+    if now < starttime:
+        return 0  # 未开始
+    elif now > deadline:
+        return 2  # 已结束
+    else:
+        return 1  # 进行中
+
+
+def status_expression(now: datetime):
+    """与 project_status 等价的 SQL 表达式"""
+    Project = models.Project
+    return case((Project.starttime > now, 0), (Project.deadline < now, 2), else_=1)
+
+
+async def sync_project_statuses(session: AsyncSession, now: datetime) -> int:
+    """一条 UPDATE 修正所有状态已过期的项目并提交，返回修正的项目数"""
+    truth_status = status_expression(now)
+    result = await session.exec(
+        update(models.Project)
+        .where(models.Project.status != truth_status)
+        .values(status=truth_status)
+    )
+    await session.commit()
+    return result.rowcount
+
+
+async def next_status_change(session: AsyncSession, now: datetime) -> datetime | None:
+    """now 之后最近的一个开始或截止时间"""
+    Project = models.Project
+    next_starttime = (await session.exec(select(func.min(Project.starttime)).where(Project.starttime > now))).one()
+    next_deadline = (await session.exec(select(func.min(Project.deadline)).where(Project.deadline >= now))).one()
+    candidates = [t for t in (next_starttime, next_deadline) if t is not None]
+    return min(candidates) if candidates else None
+
+
+class ProjectStatusScheduler:
+    """进程内的状态调度：睡到最近的开始/截止时间点，醒来后批量更新状态
+
+    项目发布或修改时间后调用 wake()，立即按新的时间点重新计算。
+    """
+
+    def __init__(self, max_sleep_seconds: float = STATUS_MAX_SLEEP_SECONDS):
+        self.max_sleep_seconds = max_sleep_seconds
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def start(self, engine):
+        self._task = asyncio.create_task(self._run(engine))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def wake(self):
+        self._wakeup.set()
+
+    async def _run(self, engine):
+        while True:
+            self._wakeup.clear()  # 先清除再查询，查询期间的 wake() 不会丢失
+            now = datetime.now()
+            try:
+                async with AsyncSession(engine) as session:
+                    await sync_project_statuses(session, now)
+                    next_time = await next_status_change(session, now)
+            except Exception:
+                logger.exception("项目状态更新失败，稍后重试")
+                next_time = None
+            if next_time is None:
+                delay = self.max_sleep_seconds
+            else: # 截止时间之后才算已结束，略晚于时间点醒来
+                delay = min(max((next_time - datetime.now()).total_seconds(), 0) + 0.001, self.max_sleep_seconds)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except TimeoutError:
+                pass
+
+
+status_scheduler = ProjectStatusScheduler()
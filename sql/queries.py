@@ -0,0 +1,191 @@
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import aliased
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+import sql.models as models
+
+
+RANKING_BATCH_SIZE = 500  # 流式读取排行榜时每批取出的行数
+EXPORT_BATCH_SIZE = 1000  # 导出作答记录时每批取出的行数
+
+
+def project_ranking_statement(project_uuid: str):
+    """单期项目有效作答按名次排序，名次由排行榜加载时按行的顺序确定
+
+    并列时按记录 id（即答题先后）排序；只取排行榜需要的列，
+    可沿 ix_record_ranking 索引顺序流式输出。
+    """
+    Record = models.Record
+    return (
+        select(
+            Record.id.label("record_id"),
+            Record.student_id,
+            models.User.name,
+            models.User.party_branch,
+            Record.correct_num,
+            Record.time_used_seconds,
+        )
+        .join(models.User)
+        .where(Record.project_uuid == project_uuid, Record.valid_flag == True)
+        .order_by(Record.correct_num.desc(), Record.time_used_seconds, Record.id)
+    )
+
+
+async def iter_project_ranking(session: AsyncSession, project_uuid: str):
+    """按名次顺序流式读取单期排行榜，不加载 Record/User 模型"""
+    statement = project_ranking_statement(project_uuid).execution_options(yield_per=RANKING_BATCH_SIZE)
+    async for row in await session.stream(statement):
+        yield row
+
+
+def all_ranking_order():
+    UserStats = models.UserStats
+    return (UserStats.total_correct_num.desc(),
+            UserStats.average_time_used_seconds,
+            UserStats.student_id)
+
+
+async def all_ranking_top(session: AsyncSession, limit: int = 30):
+    """往期累计排行榜前 limit 名，沿 ix_userstats_ranking 索引读取，取够即止"""
+    UserStats = models.UserStats
+    statement = (
+        select(
+            UserStats.student_id,
+            models.User.name,
+            models.User.party_branch,
+            UserStats.total_correct_num,
+            UserStats.average_time_used_seconds,
+            func.row_number().over(order_by=all_ranking_order()).label("rank"),
+        )
+        .join(models.User)
+        .order_by(*all_ranking_order())
+        .limit(limit)
+    )
+    return (await session.exec(statement)).all()
+
+
+def all_ranking_of_statement(student_id: str):
+    """单个用户在往期累计排行榜中的名次：1 + 排在其前面的用户数
+
+    排在前面即 (total_correct_num, average_time_used_seconds, student_id) 按排行顺序更靠前，
+    计数只需沿 ix_userstats_ranking 做 total_correct_num >= 本人答对数的范围扫描，不必给全表编号。
+    """
+    UserStats = models.UserStats
+    ahead = aliased(UserStats)
+    rank = (
+        select(func.count() + 1)
+        .select_from(ahead)
+        .where(
+            ahead.total_correct_num >= UserStats.total_correct_num,
+            or_(
+                ahead.total_correct_num > UserStats.total_correct_num,
+                ahead.average_time_used_seconds < UserStats.average_time_used_seconds,
+                and_(ahead.average_time_used_seconds == UserStats.average_time_used_seconds,
+                    ahead.student_id < UserStats.student_id),
+            ),
+        )
+        .scalar_subquery()
+    )
+    return (
+        select(UserStats.student_id, models.User.name, models.User.party_branch,
+            UserStats.total_correct_num, UserStats.average_time_used_seconds, rank.label("rank"))
+        .join(models.User)
+        .where(UserStats.student_id == student_id)
+    )
+
+
+async def all_ranking_of(session: AsyncSession, student_id: str):
+    return (await session.exec(all_ranking_of_statement(student_id))).first()
+
+
+def participate_num_column():
+    """项目的参与人数，按 ix_record_ranking 的 project_uuid 前缀计数，不加载作答记录"""
+    Record = models.Record
+    return (
+        select(func.count(Record.id))
+        .where(Record.project_uuid == models.Project.uuid)
+        .scalar_subquery()
+        .label("participate_num")
+    )
+
+
+def project_list_columns():
+    Project = models.Project
+    return (Project.uuid, Project.name, Project.issue_num, Project.starttime, Project.deadline)
+
+
+async def admin_projects(session: AsyncSession, creater_id: int):
+    """管理员创建的项目列表，一条查询取回参与人数"""
+    Project = models.Project
+    statement = (
+        select(*project_list_columns(), participate_num_column())
+        .where(Project.creater_id == creater_id)
+        .order_by(Project.issue_num)
+    )
+    return (await session.exec(statement)).all()
+
+
+async def started_projects(session: AsyncSession):
+    """已开始的项目列表，连同创建者用户名与参与人数一条查询取回"""
+    Project = models.Project
+    statement = (
+        select(*project_list_columns(), participate_num_column(),
+            models.Admin.username.label("creater_username"))
+        .join(models.Admin)
+        .where(Project.status > 0)
+        .order_by(Project.issue_num)
+    )
+    return (await session.exec(statement)).all()
+
+
+async def participated_projects(session: AsyncSession, student_id: str):
+    """用户参与过的项目及其成绩，作答记录、项目与创建者一条查询取回"""
+    Record = models.Record
+    statement = (
+        select(*project_list_columns(), Record.correct_num, Record.time_used_seconds,
+            models.Admin.username.label("creater_username"))
+        .select_from(Record)
+        .join(models.Project)
+        .join(models.Admin)
+        .where(Record.student_id == student_id)
+        .order_by(models.Project.issue_num)
+    )
+    return (await session.exec(statement)).all()
+
+
+async def question_answer_stats(session: AsyncSession, project_uuid: str):
+    """项目各题各种作答的被选次数，直接读取逐题统计表，不读取作答记录"""
+    QuestionAnswerStats = models.QuestionAnswerStats
+    statement = (
+        select(QuestionAnswerStats.question_id, QuestionAnswerStats.answer_mask, QuestionAnswerStats.chosen_num)
+        .where(QuestionAnswerStats.project_uuid == project_uuid)
+    )
+    return (await session.exec(statement)).all()
+
+
+def project_records_statement(project_uuid: str):
+    """单期项目的全部作答记录（含超期作答）及作答人信息，按提交先后排序"""
+    Record = models.Record
+    return (
+        select(
+            Record.id.label("record_id"),
+            Record.student_id,
+            models.User.name,
+            models.User.party_branch,
+            Record.correct_num,
+            Record.time_used_seconds,
+            Record.valid_flag,
+            Record.answer,
+        )
+        .join(models.User)
+        .where(Record.project_uuid == project_uuid)
+        .order_by(Record.id)
+    )
+
+
+async def iter_project_records(session: AsyncSession, project_uuid: str):
+    """分批流式读取单期项目的作答记录，每次产出一批行，内存占用与记录总数无关"""
+    statement = project_records_statement(project_uuid).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    result = await session.stream(statement)
+    async for rows in result.partitions():
+        yield rows
@@ -0,0 +1,169 @@
+import os
+from collections import Counter
+from sqlmodel import select, func, delete, update, insert, case, bindparam
+from sqlmodel.ext.asyncio.session import AsyncSession
+import sql.models as models
+from sql.database import conflict_insert
+from utils.answer_codec import decode_answer_masks
+from utils.grading import AnswerKey, GradingError
+
+
+async def add_record_to_user_stats(session: AsyncSession, student_id: str, correct_num: int,
+                            time_used_seconds: float, valid_flag: bool):
+    """把一条新作答记录累加到用户汇总表，不提交事务，由调用方与记录插入一并提交"""
+    if valid_flag:
+        add_correct_num, add_time_used_seconds = correct_num, time_used_seconds
+    else: # 超期作答只计入作答次数
+        add_correct_num, add_time_used_seconds = 0, 0
+    UserStats = models.UserStats
+    result = await session.exec(
+        update(UserStats)
+        .where(UserStats.student_id == student_id)
+        .values(
+            total_correct_num=UserStats.total_correct_num + add_correct_num,
+            total_time_used_seconds=UserStats.total_time_used_seconds + add_time_used_seconds,
+            record_num=UserStats.record_num + 1,
+            average_time_used_seconds=(UserStats.total_time_used_seconds + add_time_used_seconds)
+                                    / (UserStats.record_num + 1),
+        )
+    )
+    if result.rowcount == 0: # 汇总行尚不存在（如未执行过回填）
+        session.add(models.UserStats(
+            student_id=student_id,
+            total_correct_num=add_correct_num,
+            total_time_used_seconds=add_time_used_seconds,
+            record_num=1,
+            average_time_used_seconds=add_time_used_seconds,
+        ))
+
+
+STATS_REBUILD_BATCH_SIZE = int(os.getenv("STATS_REBUILD_BATCH_SIZE", "1000"))  # 重建逐题统计时每批读取的记录数
+
+
+async def rebuild_user_stats(session: AsyncSession, student_ids: list[str] | None = None) -> int:
+    """根据作答记录重建用户汇总表，返回重建的用户数；不提交，由调用方与引起重建的修改一并提交
+
+    不指定 student_ids 时全量重建，否则只重建这些用户（如项目被删除后受影响的用户）
+    """
+    Record = models.Record
+    valid_correct_num = func.coalesce(func.sum(case((Record.valid_flag, Record.correct_num), else_=0)), 0)
+    valid_time_used_seconds = func.coalesce(func.sum(case((Record.valid_flag, Record.time_used_seconds), else_=0)), 0)
+    record_num = func.count(Record.id)
+    statement = (
+        select(
+            models.User.student_id,
+            valid_correct_num,
+            valid_time_used_seconds,
+            record_num,
+            case((record_num > 0, valid_time_used_seconds * 1.0 / record_num), else_=0),
+        )
+        .outerjoin(Record, Record.student_id == models.User.student_id)
+        .group_by(models.User.student_id)
+    )
+    if student_ids is None:
+        await session.exec(delete(models.UserStats))
+    else:
+        statement = statement.where(models.User.student_id.in_(student_ids))
+        await session.exec(delete(models.UserStats).where(models.UserStats.student_id.in_(student_ids)))
+    await session.exec(insert(models.UserStats).from_select(
+        ["student_id", "total_correct_num", "total_time_used_seconds",
+         "record_num", "average_time_used_seconds"],
+        statement,
+    ))
+    if student_ids is None:
+        return (await session.exec(select(func.count()).select_from(models.UserStats))).one()
+    return len(student_ids)
+
+
+async def regrade_project_records(session: AsyncSession, answer_key: AnswerKey) -> list[str]:
+    """项目答案修改后按新答案重算该项目全部作答记录的答对数，不提交事务
+
+    返回答对数发生变化的用户学号，调用方据此重建用户汇总；无法解析的旧格式记录保持原样
+    """
+    Record = models.Record
+    rows = (await session.exec(
+        select(Record.id, Record.student_id, Record.answer, Record.correct_num)
+        .where(Record.project_uuid == answer_key.project_uuid)
+    )).all()
+    updates, student_ids = [], []
+    for row in rows:
+        try:
+            correct_num = answer_key.regrade(decode_answer_masks(row.answer))
+        except (ValueError, SyntaxError, KeyError, GradingError):
+            continue
+        if correct_num != row.correct_num:
+            updates.append({"record_id": row.id, "new_correct_num": correct_num})
+            student_ids.append(row.student_id)
+    if updates:
+        await session.exec(
+            update(Record.__table__)
+            .where(Record.__table__.c.id == bindparam("record_id"))
+            .values(correct_num=bindparam("new_correct_num")),
+            params=updates,
+        )
+    return student_ids
+
+
+def count_answer_masks(rows) -> Counter:
+    """rows 的每一项为 (项目 uuid, Record.answer)，返回 (项目 uuid, 题目 id, 选项位掩码) -> 次数
+
+    无法解析的旧格式记录不计入
+    """
+    counts = Counter()
+    for (project_uuid, answer) in rows:
+        try:
+            answer_masks = decode_answer_masks(answer)
+        except (ValueError, SyntaxError, KeyError, GradingError):
+            continue
+        for (question_id, mask) in answer_masks.items():
+            counts[(project_uuid, question_id, mask)] += 1
+    return counts
+
+
+async def add_answers_to_question_stats(session: AsyncSession, counts: Counter) -> int:
+    """把 count_answer_masks 的计数累加到逐题统计表，不提交事务，返回写入的计数行数
+
+    已被删除的题目（项目修改与提交同时发生时）不再计入
+    """
+    QuestionAnswerStats = models.QuestionAnswerStats
+    question_ids = {question_id for (_, question_id, _) in counts}
+    if not question_ids:
+        return 0
+    existing_ids = set((await session.exec(
+        select(models.Question.id).where(models.Question.id.in_(question_ids))
+    )).all())
+    rows = [
+        {"question_id": question_id, "answer_mask": mask, "project_uuid": project_uuid, "chosen_num": num}
+        for ((project_uuid, question_id, mask), num) in counts.items() if question_id in existing_ids
+    ]
+    if not rows:
+        return 0
+    statement = conflict_insert(session, QuestionAnswerStats)
+    await session.exec(
+        statement.on_conflict_do_update(
+            index_elements=[QuestionAnswerStats.question_id, QuestionAnswerStats.answer_mask],
+            set_={"chosen_num": QuestionAnswerStats.chosen_num + statement.excluded.chosen_num},
+        ),
+        params=rows,
+    )
+    return len(rows)
+
+
+async def rebuild_question_stats(session: AsyncSession, project_uuids: list[str] | None = None) -> int:
+    """根据作答记录重建逐题统计，返回重建的计数行数；不提交
+
+    分批流式读取作答记录，内存中只保留计数；不指定 project_uuids 时全量重建
+    """
+    Record, QuestionAnswerStats = models.Record, models.QuestionAnswerStats
+    statement = select(Record.project_uuid, Record.answer)
+    if project_uuids is not None:
+        statement = statement.where(Record.project_uuid.in_(project_uuids))
+    counts = Counter()
+    result = await session.stream(statement.execution_options(yield_per=STATS_REBUILD_BATCH_SIZE))
+    async for rows in result.partitions():
+        counts.update(count_answer_masks(rows))
+    if project_uuids is None:
+        await session.exec(delete(QuestionAnswerStats))
+    else:
+        await session.exec(delete(QuestionAnswerStats).where(QuestionAnswerStats.project_uuid.in_(project_uuids)))
+    return await add_answers_to_question_stats(session, counts)
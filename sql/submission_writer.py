@@ -0,0 +1,222 @@
+"""答案提交的合并写入（group commit）
+
+提交接口完成校验与判分后把作答记录放入进程内队列，由单个写入任务取出，
+凑满 SUBMIT_BATCH_SIZE 条或等待 SUBMIT_BATCH_DELAY_MS 毫秒后在一个事务中写入：
+批量插入作答记录、累加用户汇总与逐题统计、按项目原子地 participate_num = participate_num + k，
+提交（落盘）后才通知各个调用方。批次越大、等待越久，每次落盘分摊的提交越多，单次提交的延迟也越高。
+
+“每人每期只能作答一次”由 (student_id, project_uuid) 唯一索引保证：插入时 ON CONFLICT DO NOTHING，
+未插入的即为重复提交，无需事先查询。重复提交带有与已有记录相同的 idempotency_key 时视为重试，
+返回首次提交的结果。
+"""
+import asyncio
+import logging
+import os
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import NamedTuple
+from sqlmodel import select, update, tuple_
+from sqlmodel.ext.asyncio.session import AsyncSession
+import sql.models as models
+from sql.database import conflict_insert
+from sql.stats import add_record_to_user_stats, add_answers_to_question_stats, count_answer_masks
+
+
+SUBMIT_BATCH_SIZE = int(os.getenv("SUBMIT_BATCH_SIZE", "64"))  # 每个事务最多写入的记录数
+SUBMIT_BATCH_DELAY_MS = float(os.getenv("SUBMIT_BATCH_DELAY_MS", "5"))  # 凑批次时最多等待的时间，0 表示只取已在队列中的
+SUBMIT_QUEUE_SIZE = int(os.getenv("SUBMIT_QUEUE_SIZE", "10000"))  # 队列满时提交接口等待，形成背压
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class DuplicateSubmission(Exception):
+    """同一用户在同一期已有作答记录"""
+
+
+@dataclass
+class Submission:
+    student_id: str
+    project_uuid: str
+    correct_num: int
+    time_used_seconds: float
+    answer: str
+    valid_flag: bool
+    idempotency_key: str | None = None
+    future: asyncio.Future | None = field(default=None, repr=False)
+
+    @property
+    def key(self) -> tuple[str, str]:
+        return (self.student_id, self.project_uuid)
+
+
+class Accepted(NamedTuple):
+    record_id: int
+    correct_num: int
+    replayed: bool = False  # 重试的提交，返回的是首次提交的结果
+
+
+def insert_ignoring_duplicates(session: AsyncSession):
+    Record = models.Record
+    return (conflict_insert(session, Record)
+            .on_conflict_do_nothing(index_elements=[Record.student_id, Record.project_uuid])
+            .returning(Record.id, Record.student_id, Record.project_uuid))
+
+
+async def write_submissions(session: AsyncSession, submissions: list[Submission]) -> dict[tuple[str, str], int]:
+    """在当前事务中写入一批互不重复的作答记录，不提交事务
+
+    已有记录的提交被跳过，只为实际插入的记录累加用户汇总、逐题统计与参与人数；返回 (学号, 项目 uuid) -> 新记录 id
+    """
+    rows = (await session.exec(
+        insert_ignoring_duplicates(session),
+        params=[{
+            "student_id": s.student_id,
+            "project_uuid": s.project_uuid,
+            "correct_num": s.correct_num,
+            "time_used_seconds": s.time_used_seconds,
+            "answer": s.answer,
+            "valid_flag": s.valid_flag,
+            "idempotency_key": s.idempotency_key,
+        } for s in submissions],
+    )).all()
+    record_ids = {(row.student_id, row.project_uuid): row.id for row in rows}
+    inserted = [s for s in submissions if s.key in record_ids]
+    for s in inserted:
+        await add_record_to_user_stats(session, s.student_id, s.correct_num, s.time_used_seconds, s.valid_flag)
+    await add_answers_to_question_stats(session, count_answer_masks((s.project_uuid, s.answer) for s in inserted))
+    Project = models.Project
+    for (project_uuid, num) in Counter(s.project_uuid for s in inserted).items():
+        await session.exec(
+            update(Project)
+            .where(Project.uuid == project_uuid)
+            .values(participate_num=Project.participate_num + num)
+        )
+    return record_ids
+
+
+async def existing_records(session: AsyncSession, submissions: list[Submission]) -> dict[tuple[str, str], tuple]:
+    """(学号, 项目 uuid) -> 已有记录的 (id, correct_num, idempotency_key)"""
+    Record = models.Record
+    rows = (await session.exec(
+        select(Record.student_id, Record.project_uuid, Record.id, Record.correct_num, Record.idempotency_key)
+        .where(tuple_(Record.student_id, Record.project_uuid).in_({s.key for s in submissions}))
+    )).all()
+    return {(row.student_id, row.project_uuid): (row.id, row.correct_num, row.idempotency_key) for row in rows}
+
+
+async def commit_submissions(session: AsyncSession, submissions: list[Submission]) -> list[Accepted | Exception]:
+    """一个事务写入一批提交并提交，按顺序返回每条提交的结果
+
+    同一 (学号, 项目) 只有批次内的第一条参与插入；其余的以及与库中记录冲突的，
+    带有相同 idempotency_key 时返回已有记录，否则为 DuplicateSubmission
+    """
+    first = {}
+    for s in submissions:
+        first.setdefault(s.key, s)
+    record_ids = await write_submissions(session, list(first.values()))
+    await session.commit()
+    conflicts = [s for s in submissions if not (s.key in record_ids and first[s.key] is s)]
+    existing = await existing_records(session, conflicts) if conflicts else {}
+    results = []
+    for s in submissions:
+        if s.key in record_ids and first[s.key] is s:
+            results.append(Accepted(record_ids[s.key], s.correct_num))
+        elif (s.key in existing and s.idempotency_key is not None
+                and existing[s.key][2] == s.idempotency_key):
+            (record_id, correct_num, _) = existing[s.key]
+            results.append(Accepted(record_id, correct_num, replayed=True))
+        else:
+            results.append(DuplicateSubmission())
+    return results
+
+
+class SubmissionWriter:
+    """单个写入任务消费提交队列，按批次合并提交"""
+
+    def __init__(self, batch_size: int = SUBMIT_BATCH_SIZE, batch_delay_ms: float = SUBMIT_BATCH_DELAY_MS,
+                queue_size: int = SUBMIT_QUEUE_SIZE):
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay_ms / 1000
+        self.queue_size = queue_size
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self, engine):
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.create_task(self._run(engine))
+
+    async def stop(self):
+        """写完队列中剩余的提交后退出"""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+        self._queue = None
+
+    async def submit(self, submission: Submission, session: AsyncSession) -> Accepted:
+        """提交落盘后返回结果，重复提交抛出 DuplicateSubmission
+
+        写入任务未启动时（如脚本中直接调用）用调用方的会话立即写入
+        """
+        if self._task is None:
+            (result,) = await commit_submissions(session, [submission])
+        else: # 等待期间归还调用方占用的连接，避免排队的请求占满连接池、写入任务拿不到连接
+            await session.close()
+            submission.future = asyncio.get_running_loop().create_future()
+            await self._queue.put(submission)
+            result = await submission.future
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def _collect_batch(self, first: Submission) -> tuple[list[Submission], bool]:
+        """以 first 开头凑一个批次，返回 (批次, 是否收到停止信号)"""
+        batch = [first]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_delay
+        while len(batch) < self.batch_size:
+            try:
+                submission = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    submission = await asyncio.wait_for(self._queue.get(), timeout)
+                except TimeoutError:
+                    break
+            if submission is None:
+                return batch, True
+            batch.append(submission)
+        return batch, False
+
+    async def _commit_batch(self, engine, batch: list[Submission]) -> list[Accepted | Exception]:
+        """整批写入失败时（如某条提交违反约束，或项目已被并发删除）逐条重试，只让出错的那条失败"""
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as session:
+                return await commit_submissions(session, batch)
+        except Exception as e:
+            if len(batch) == 1:
+                logger.exception("写入作答记录失败")
+                return [e]
+            logger.warning("批量写入作答记录失败，逐条重试，共 %d 条", len(batch), exc_info=True)
+        results = []
+        for submission in batch:
+            results.extend(await self._commit_batch(engine, [submission]))
+        return results
+
+    async def _run(self, engine):
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                break
+            (batch, stopping) = await self._collect_batch(first)
+            results = await self._commit_batch(engine, batch)
+            for (s, result) in zip(batch, results):
+                if not s.future.done():
+                    s.future.set_result(result)
+
+
+submission_writer = SubmissionWriter()
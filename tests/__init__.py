@@ -0,0 +1,29 @@
+"""测试共用的临时数据库"""
+import tempfile
+import unittest
+from pathlib import Path
+
+from sql.database import build_engine, AsyncSession
+from sql.migrations import upgrade
+
+
+def temporary_directory(test: unittest.TestCase) -> Path:
+    """用例结束时删除的临时目录"""
+    directory = tempfile.TemporaryDirectory()
+    test.addCleanup(directory.cleanup)
+    return Path(directory.name)
+
+
+async def temporary_engine(test: unittest.IsolatedAsyncioTestCase, path: Path | None = None, migrate: bool = True):
+    """临时目录中的 SQLite 数据库（与线上相同的 PRAGMA），默认执行全部迁移；用例结束时释放连接
+
+    path 为已有的数据库文件时在其上建引擎
+    """
+    if path is None:
+        path = temporary_directory(test) / "test.db"
+    engine = build_engine(f"sqlite+aiosqlite:///{path}")
+    test.addAsyncCleanup(engine.dispose)
+    if migrate:
+        async with AsyncSession(engine) as session:
+            await upgrade(session)
+    return engine
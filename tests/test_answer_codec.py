@@ -0,0 +1,101 @@
+"""作答记录的 v1 存储格式，以及旧格式记录的迁移
+
+用法：python -m unittest tests.test_answer_codec
+"""
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from sqlmodel import select
+
+import sql.answer_migration as answer_migration
+import sql.models as models
+from sql.answer_migration import migrate_answers
+from sql.database import AsyncSession
+from tests import temporary_engine
+from utils.answer_codec import decode_answer_masks, decode_answers, encode_answers
+from utils.grading import GradingError
+from utils.schemas import CommitAnswer
+
+
+def answers(*pairs) -> list[CommitAnswer]:
+    return [CommitAnswer(question_id=question_id, user_answer=user_answer) for (question_id, user_answer) in pairs]
+
+
+class AnswerCodecTest(unittest.TestCase):
+
+    def test_encode(self):
+        """按题目 id 升序排列，选项顺序不影响编码"""
+        self.assertEqual(encode_answers(answers((2, "DCBA"), (1, "B"))), "v1:12,2f")
+        self.assertEqual(encode_answers(answers((10, ""))), "v1:100")
+        self.assertEqual(encode_answers([]), "v1:")
+        with self.assertRaises(GradingError):
+            encode_answers(answers((1, "E")))
+
+    def test_round_trip(self):
+        encoded = encode_answers(answers((1, "B"), (2, "ACD"), (13, "")))
+        self.assertEqual(decode_answers(encoded), [
+            {"question_id": 1, "user_answer": "B"},
+            {"question_id": 2, "user_answer": "ACD"},
+            {"question_id": 13, "user_answer": ""},
+        ])
+        self.assertEqual(decode_answer_masks(encoded), {1: 2, 2: 13, 13: 0})
+        self.assertEqual(decode_answers("v1:"), [])
+        self.assertEqual(decode_answer_masks("v1:"), {})
+
+    def test_legacy_format(self):
+        """不以 v1: 开头的按旧格式 str(list[dict]) 解码"""
+        legacy = str([{"question_id": 2, "user_answer": "CA"}, {"question_id": 1, "user_answer": "B"}])
+        self.assertEqual(decode_answers(legacy),
+                        [{"question_id": 2, "user_answer": "CA"}, {"question_id": 1, "user_answer": "B"}])
+        self.assertEqual(decode_answer_masks(legacy), {1: 2, 2: 5})
+        self.assertEqual(decode_answers("[]"), [])
+
+
+class MigrateAnswersTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.engine = await temporary_engine(self)
+        now = datetime.now()
+        self.answers = [
+            str([{"question_id": 1, "user_answer": "B"}, {"question_id": 2, "user_answer": "ACD"}]),
+            "v1:14",
+            "not a list",  # 无法解析
+            str([{"question_id": 1, "user_answer": "E"}]),  # 非法选项
+            str([{"question_id": 1}]),  # 缺少字段
+            "[]",
+            str([{"question_id": 3, "user_answer": "D"}]),
+        ]
+        async with AsyncSession(self.engine) as session:
+            session.add(models.Admin(id=1, username="admin", hashed_password=""))
+            session.add(models.Project(uuid="p1", name="p", issue_num=1, starttime=now,
+                                    deadline=now + timedelta(days=1), status=1, creater_id=1))
+            for (i, answer) in enumerate(self.answers):
+                session.add(models.User(student_id=f"s{i}", name=f"n{i}", party_branch="b"))
+                session.add(models.Record(id=i + 1, student_id=f"s{i}", project_uuid="p1", answer=answer,
+                                        correct_num=0, time_used_seconds=10.0))
+            await session.commit()
+
+    async def stored_answers(self) -> list[str]:
+        async with AsyncSession(self.engine) as session:
+            return list((await session.exec(select(models.Record.answer).order_by(models.Record.id))).all())
+
+    async def test_migrate(self):
+        """分批改写可解析的旧格式记录，无法解析的保留原样，重复执行不再改写"""
+        with mock.patch.object(answer_migration, "MIGRATION_BATCH_SIZE", 2):
+            async with AsyncSession(self.engine) as session:
+                self.assertEqual(await migrate_answers(session), (3, 3))
+            self.assertEqual(await self.stored_answers(), [
+                "v1:12,2d",
+                "v1:14",
+                *self.answers[2:5],
+                "v1:",
+                "v1:38",
+            ])
+            async with AsyncSession(self.engine) as session:
+                self.assertEqual(await migrate_answers(session), (0, 3))
+        self.assertEqual((await self.stored_answers())[2:5], self.answers[2:5])
+
+
+if __name__ == "__main__":
+    unittest.main()
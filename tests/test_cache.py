@@ -0,0 +1,48 @@
+"""进程内缓存的有效期
+
+用法：python -m unittest tests.test_cache
+"""
+import unittest
+
+from utils.cache import ProjectPayloadCache, TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TTLCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+
+    def test_expires(self):
+        cache = TTLCache(4, ttl_seconds=5, clock=self.clock)
+        cache.put("a", 1)
+        self.clock.now += 4.9
+        self.assertEqual(cache.get("a"), 1)
+        self.clock.now += 0.1
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_latest_project_expires(self):
+        """其他进程发布新一期后，本进程缓存的最新一期 uuid 最迟在有效期后重新查询"""
+        payloads = ProjectPayloadCache(latest_ttl_seconds=5, clock=self.clock)
+        payloads.set_latest("p1")
+        self.assertEqual(payloads.latest_uuid, "p1")
+        self.clock.now += 5
+        self.assertIsNone(payloads.latest_uuid)
+
+    def test_latest_project_invalidated(self):
+        payloads = ProjectPayloadCache(latest_ttl_seconds=5, clock=self.clock)
+        payloads.set_latest("p1")
+        payloads.invalidate_latest()
+        self.assertIsNone(payloads.latest_uuid)
+
+
+if __name__ == "__main__":
+    unittest.main()
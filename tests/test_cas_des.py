@@ -0,0 +1,40 @@
+"""strEnc 的 Python 实现与原 des.js 输出一致，str_dec 可还原
+
+用法：python -m unittest tests.test_cas_des
+"""
+import unittest
+
+from utils.cas_des import str_dec, str_enc
+
+
+# (data, firstKey, secondKey, thirdKey) -> 原 JS strEnc 的输出
+GOLDEN_VECTORS = [
+    (("", "1", "2", "3"), ""),
+    (("a", "1", "2", "3"), "A62B4F77D5F8C6C7"),
+    (("abcd", "1", "2", "3"), "A9CF2704230383D1"),
+    (("202500996677", "1", "2", "3"), "675A2C95C6B79BFB3CA4DDCA2180C59D1D96C50D04DE2EAD"),
+    (("Passw0rd!", "1", "2", "3"), "7D6B982EC91FCCA440D6C5A9B2ABE5BEBD2D248631100F73"),
+    (("202500996677Passw0rd!LT-1024-aBcDeFgHiJkLmNoP-cas", "1", "2", "3"),
+     "675A2C95C6B79BFB3CA4DDCA2180C59D1D96C50D04DE2EAD7D6B982EC91FCCA440D6C5A9B2ABE5BE"
+     "16D1E65602BB03D67A15CB5703ACE44C80617EBF99DF2BFC00371D981BDEA5F1E0B62FC51DCF727F"
+     "9F9795B42799C8B626B4D44340138F08B2DA8880EA270330"),
+    (("张三😀", "1", "2", "3"), "ACDB1AB62D6CE0AE"),
+    (("hello world", "longkey12345", "zz", "q"), "880C350E3C701B86B86E88DDACF530722E67949E95DDB8FA"),
+]
+
+
+class StrEncTest(unittest.TestCase):
+
+    def test_golden_vectors(self):
+        for (args, expected) in GOLDEN_VECTORS:
+            with self.subTest(args=args):
+                self.assertEqual(str_enc(*args), expected)
+
+    def test_round_trip(self):
+        for ((data, *keys), encrypted) in GOLDEN_VECTORS:
+            with self.subTest(data=data):
+                self.assertEqual(str_dec(encrypted, *keys), data)
+
+
+if __name__ == "__main__":
+    unittest.main()
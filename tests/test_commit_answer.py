@@ -0,0 +1,38 @@
+"""提交答案时用时字段的校验
+
+用法：python -m unittest tests.test_commit_answer
+"""
+import unittest
+
+from fastapi.testclient import TestClient
+
+from main import app
+from utils.schemas import CommitAnswerRequest
+
+
+def commit_request(time_used_seconds: str) -> CommitAnswerRequest:
+    return CommitAnswerRequest(project_uuid="p1", time_used_seconds=time_used_seconds)
+
+
+class TimeUsedSecondsTest(unittest.TestCase):
+
+    def test_valid(self):
+        self.assertEqual(commit_request("111.22").parse_time_used_seconds(), 111.22)
+        self.assertEqual(commit_request("0").parse_time_used_seconds(), 0)
+
+    def test_invalid(self):
+        for value in ("abc", "", "nan", "NaN", "inf", "-inf", "1e400", "-1"):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                commit_request(value).parse_time_used_seconds()
+
+    def test_route_returns_400(self):
+        client = TestClient(app)  # 不执行 lifespan；校验在访问数据库之前
+        for value in ("abc", "nan", "inf", "-1"):
+            with self.subTest(value=value):
+                response = client.post("/api/user/project", json={
+                    "student_id": "s1", "project_uuid": "p1", "time_used_seconds": value, "user_answers": []})
+                self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+"""更新项目时提交的题目与库中题目的对应
+
+用法：python -m unittest tests.test_diff_questions
+"""
+import unittest
+
+import sql.models as models
+from routers.qa import diff_questions
+from utils.schemas import QuestionUpdateRequest
+
+
+def question_in_db(question_id: int) -> models.Question:
+    return models.Question(id=question_id, type=0, text=f"t{question_id}", A="a", B="b", C="c", D="d",
+                        answer="A", project_uuid="p1")
+
+
+def question(text: str, question_id: int | None = None) -> QuestionUpdateRequest:
+    return QuestionUpdateRequest(id=question_id, type=0, text=text, A="a", B="b", C="c", D="d", answer="A")
+
+
+class DiffQuestionsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.questions_in_db = [question_in_db(3), question_in_db(1), question_in_db(2)]
+
+    def test_match_by_id(self):
+        (matched, deleted, created) = diff_questions(
+            self.questions_in_db, [question("new"), question("t3", 3), question("t1", 1)])
+        self.assertEqual([(q.id, submitted.text) for (q, submitted) in matched], [(3, "t3"), (1, "t1")])
+        self.assertEqual([q.id for q in deleted], [2])
+        self.assertEqual([q.text for q in created], ["new"])
+
+    def test_unknown_or_repeated_id(self):
+        with self.assertRaises(ValueError):
+            diff_questions(self.questions_in_db, [question("t", 9)])
+        with self.assertRaises(ValueError):
+            diff_questions(self.questions_in_db, [question("t", 1), question("t", 1)])
+
+    def test_match_by_position(self):
+        """旧版前端整体重发、题目数不变时按 id 顺序对应"""
+        (matched, deleted, created) = diff_questions(self.questions_in_db, [question("x"), question("y"), question("z")])
+        self.assertEqual([(q.id, submitted.text) for (q, submitted) in matched], [(1, "x"), (2, "y"), (3, "z")])
+        self.assertEqual((deleted, created), ([], []))
+
+    def test_position_rejected_when_length_changes(self):
+        """题目数有变化时按顺序对应会错位，要求带上 id"""
+        for questions in ([question("x"), question("z")], [question(text) for text in "wxyz"]):
+            with self.subTest(num=len(questions)), self.assertRaises(ValueError):
+                diff_questions(self.questions_in_db, questions)
+
+    def test_position_into_empty_project(self):
+        (matched, deleted, created) = diff_questions([], [question("x")])
+        self.assertEqual((matched, deleted, [q.text for q in created]), ([], [], ["x"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+"""编译后的答案对答卷判分
+
+用法：python -m unittest tests.test_grading
+"""
+import unittest
+from types import SimpleNamespace
+
+from utils.grading import GradingError, compile_answer_key, option_mask
+
+
+def answers(*pairs) -> list[SimpleNamespace]:
+    return [SimpleNamespace(question_id=question_id, user_answer=user_answer) for (question_id, user_answer) in pairs]
+
+
+class GradeTest(unittest.TestCase):
+
+    def setUp(self):
+        questions = [SimpleNamespace(id=1, answer="B"), SimpleNamespace(id=2, answer="ACD")]
+        self.answer_key = compile_answer_key("p1", questions)
+
+    def test_option_mask(self):
+        self.assertEqual(option_mask("ABD"), 0b1011)
+        self.assertEqual(option_mask("DBA"), option_mask("ABD"))
+        with self.assertRaises(GradingError):
+            option_mask("E")
+
+    def test_single_choice(self):
+        self.assertEqual(self.answer_key.grade(answers((1, "B"))), 1)
+        self.assertEqual(self.answer_key.grade(answers((1, "A"))), 0)
+
+    def test_multi_choice(self):
+        """多选题选项顺序不影响判分"""
+        self.assertEqual(self.answer_key.grade(answers((2, "ACD"))), 1)
+        self.assertEqual(self.answer_key.grade(answers((2, "DCA"))), 1)
+        self.assertEqual(self.answer_key.grade(answers((1, "B"), (2, "CAD"))), 2)
+
+    def test_partially_selected_multi_choice(self):
+        """多选题少选、多选均不得分"""
+        self.assertEqual(self.answer_key.grade(answers((2, "AC"))), 0)
+        self.assertEqual(self.answer_key.grade(answers((2, "ABCD"))), 0)
+
+    def test_empty_answer(self):
+        self.assertEqual(self.answer_key.grade(answers((1, ""), (2, ""))), 0)
+        self.assertEqual(self.answer_key.grade([]), 0)
+
+    def test_question_not_in_key(self):
+        with self.assertRaises(GradingError):
+            self.answer_key.grade(answers((1, "B"), (3, "A")))
+
+    def test_repeated_question(self):
+        with self.assertRaises(GradingError):
+            self.answer_key.grade(answers((1, "B"), (1, "B")))
+
+
+if __name__ == "__main__":
+    unittest.main()
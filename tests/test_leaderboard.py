@@ -0,0 +1,58 @@
+"""排行榜缓存的刷新
+
+用法：python -m unittest tests.test_leaderboard
+"""
+import unittest
+from types import SimpleNamespace
+
+from utils.leaderboard import LeaderboardRegistry
+
+
+def header(project_uuid: str) -> dict:
+    return {"project_uuid": project_uuid, "project_name": project_uuid, "creater_name": "admin", "issue_num": 1}
+
+
+async def rows(*records):
+    for (record_id, student_id, correct_num) in records:
+        yield SimpleNamespace(record_id=record_id, student_id=student_id, name=student_id, party_branch="b",
+                            correct_num=correct_num, time_used_seconds=10.0)
+
+
+class LeaderboardRefreshTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        self.registry = LeaderboardRegistry(refresh_seconds=5, clock=lambda: self.now)
+
+    async def test_latest_project_expires(self):
+        self.registry.set_latest(header("p1"), 1, 0)
+        self.now += 5
+        self.assertIsNone(self.registry.latest_project)
+
+    async def test_board_kept_while_in_sync(self):
+        """本进程增量插入的记录计入参与人数，与数据库一致时沿用已加载的排行榜"""
+        self.registry.set_latest(header("p1"), 1, 1)
+        await self.registry.load("p1", rows((1, "s1", 1)))
+        self.registry.add_record("p1", 2, "s2", "s2", "b", 2, 5.0)
+        self.registry.set_latest(header("p1"), 1, 2)
+        self.assertEqual([entry["student_id"] for entry in self.registry.get("p1").top()], ["s2", "s1"])
+
+    async def test_board_reloaded_after_foreign_write(self):
+        """其他进程写入作答记录或修改项目后，刷新时丢弃排行榜"""
+        self.registry.set_latest(header("p1"), 1, 1)
+        await self.registry.load("p1", rows((1, "s1", 1)))
+        self.registry.set_latest(header("p1"), 1, 2)
+        self.assertIsNone(self.registry.get("p1"))
+        await self.registry.load("p1", rows((1, "s1", 1), (2, "s2", 2)))
+        self.registry.set_latest(header("p1"), 2, 2)
+        self.assertIsNone(self.registry.get("p1"))
+
+    async def test_superseded_board_dropped(self):
+        self.registry.set_latest(header("p1"), 1, 1)
+        await self.registry.load("p1", rows((1, "s1", 1)))
+        self.registry.set_latest(header("p2"), 1, 0)
+        self.assertIsNone(self.registry.get("p1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+"""在基线版本（由 create_all 建表、没有迁移表）的数据库上执行全部迁移
+
+用法：python -m unittest tests.test_migrations
+"""
+import sqlite3
+import unittest
+from pathlib import Path
+
+from sqlalchemy import create_engine, inspect
+from sqlmodel import SQLModel, select
+
+from sql.database import AsyncSession
+from sql.migrations import upgrade, applied_versions
+from sql.stats import add_answers_to_question_stats, count_answer_masks
+import sql.models as models
+from tests import temporary_directory, temporary_engine
+
+
+# 基线版本的 SQLModel.metadata.create_all 建出的表
+BASELINE_SCHEMA = """
+CREATE TABLE user (
+    student_id VARCHAR NOT NULL, name VARCHAR NOT NULL, party_branch VARCHAR NOT NULL,
+    PRIMARY KEY (student_id), UNIQUE (student_id)
+);
+CREATE TABLE admin (
+    id INTEGER NOT NULL, username VARCHAR NOT NULL, hashed_password VARCHAR NOT NULL,
+    PRIMARY KEY (id), UNIQUE (username)
+);
+CREATE TABLE project (
+    uuid VARCHAR NOT NULL, name VARCHAR NOT NULL, issue_num INTEGER NOT NULL,
+    starttime DATETIME NOT NULL, deadline DATETIME NOT NULL, status INTEGER NOT NULL,
+    participate_num INTEGER NOT NULL, creater_id INTEGER NOT NULL,
+    PRIMARY KEY (uuid), UNIQUE (issue_num),
+    FOREIGN KEY(creater_id) REFERENCES admin (id) ON DELETE CASCADE
+);
+CREATE TABLE question (
+    id INTEGER NOT NULL, type INTEGER NOT NULL, text VARCHAR NOT NULL,
+    "A" VARCHAR NOT NULL, "B" VARCHAR NOT NULL, "C" VARCHAR NOT NULL, "D" VARCHAR NOT NULL,
+    answer VARCHAR NOT NULL, project_uuid VARCHAR NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(project_uuid) REFERENCES project (uuid) ON DELETE CASCADE
+);
+CREATE TABLE record (
+    id INTEGER NOT NULL, student_id VARCHAR NOT NULL, project_uuid VARCHAR NOT NULL,
+    answer VARCHAR NOT NULL, correct_num INTEGER NOT NULL, time_used_seconds FLOAT NOT NULL,
+    valid_flag BOOLEAN NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(student_id) REFERENCES user (student_id) ON DELETE CASCADE,
+    FOREIGN KEY(project_uuid) REFERENCES project (uuid) ON DELETE CASCADE
+);
+"""
+
+BASELINE_DATA = """
+INSERT INTO admin VALUES (1, 'admin', 'x');
+INSERT INTO project VALUES ('p1', '第一期', 1, '2025-01-01 00:00:00', '2025-01-08 00:00:00', 2, 2, 1);
+INSERT INTO question VALUES (1, 0, 't1', 'a', 'b', 'c', 'd', 'B', 'p1');
+INSERT INTO question VALUES (2, 1, 't2', 'a', 'b', 'c', 'd', 'ABD', 'p1');
+INSERT INTO user VALUES ('s1', '张三', '一支部');
+INSERT INTO user VALUES ('s2', '李四', '二支部');
+INSERT INTO user VALUES ('s3', '王五', '二支部');
+INSERT INTO record VALUES (1, 's1', 'p1', '[{''question_id'': 1, ''user_answer'': ''B''}, {''question_id'': 2, ''user_answer'': ''ABD''}]', 2, 30.0, 1);
+INSERT INTO record VALUES (2, 's2', 'p1', '[{''question_id'': 1, ''user_answer'': ''A''}, {''question_id'': 2, ''user_answer'': ''ABD''}]', 1, 50.0, 1);
+"""
+
+
+def create_baseline_database(directory: Path) -> Path:
+    path = directory / "baseline.db"
+    connection = sqlite3.connect(path)
+    connection.executescript(BASELINE_SCHEMA + BASELINE_DATA)
+    connection.close()
+    return path
+
+
+class BaselineUpgradeTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.path = create_baseline_database(temporary_directory(self))
+        self.engine = await temporary_engine(self, self.path)
+
+    def test_no_reference_to_renamed_tables(self):
+        with sqlite3.connect(self.path) as connection:
+            schema = [sql for (sql,) in connection.execute("SELECT sql FROM sqlite_master WHERE sql IS NOT NULL")]
+            foreign_key_errors = connection.execute("PRAGMA foreign_key_check").fetchall()
+        connection.close()
+        self.assertFalse([sql for sql in schema if "question_old" in sql or "question_new" in sql])
+        self.assertEqual(foreign_key_errors, [])
+
+    async def test_question_answer_stats_backfilled(self):
+        async with AsyncSession(self.engine) as session:
+            rows = (await session.exec(
+                select(models.QuestionAnswerStats.question_id, models.QuestionAnswerStats.answer_mask,
+                    models.QuestionAnswerStats.chosen_num)
+                .order_by(models.QuestionAnswerStats.question_id, models.QuestionAnswerStats.answer_mask)
+            )).all()
+        self.assertEqual([tuple(row) for row in rows], [(1, 0b0001, 1), (1, 0b0010, 1), (2, 0b1011, 2)])
+
+    async def test_question_answer_stats_upsert_after_upgrade(self):
+        async with AsyncSession(self.engine) as session:
+            counts = count_answer_masks([("p1", "[{'question_id': 1, 'user_answer': 'B'}]")])
+            await add_answers_to_question_stats(session, counts)
+            await session.commit()
+            chosen_num = (await session.exec(
+                select(models.QuestionAnswerStats.chosen_num)
+                .where(models.QuestionAnswerStats.question_id == 1, models.QuestionAnswerStats.answer_mask == 0b0010)
+            )).one()
+        self.assertEqual(chosen_num, 2)
+
+    async def test_user_stats_backfilled(self):
+        async with AsyncSession(self.engine) as session:
+            rows = (await session.exec(
+                select(models.UserStats.student_id, models.UserStats.total_correct_num,
+                    models.UserStats.record_num, models.UserStats.average_time_used_seconds)
+                .order_by(models.UserStats.student_id)
+            )).all()
+        self.assertEqual([tuple(row) for row in rows], [("s1", 2, 1, 30.0), ("s2", 1, 1, 50.0), ("s3", 0, 0, 0)])
+
+    async def test_questions_preserved(self):
+        async with AsyncSession(self.engine) as session:
+            question_ids = (await session.exec(select(models.Question.id).order_by(models.Question.id))).all()
+        self.assertEqual(question_ids, [1, 2])
+
+
+def describe_schema(connection) -> dict:
+    """各表的列、索引与外键，用于比较两个数据库的结构"""
+    inspector = inspect(connection)
+    return {
+        table_name: (
+            sorted((column["name"], str(column["type"]), column["nullable"])
+                for column in inspector.get_columns(table_name)),
+            sorted((index["name"], tuple(index["column_names"]), bool(index["unique"]))
+                for index in inspector.get_indexes(table_name)),
+            sorted((tuple(fk["constrained_columns"]), fk["referred_table"], tuple(fk["referred_columns"]))
+                for fk in inspector.get_foreign_keys(table_name)),
+        )
+        for table_name in inspector.get_table_names() if table_name != "schema_migrations"
+    }
+
+
+class FreshUpgradeTest(unittest.IsolatedAsyncioTestCase):
+    """0001 按当时的结构建表，空数据库依次执行全部迁移后与按当前模型建表一致"""
+
+    async def test_schema_matches_models(self):
+        directory = temporary_directory(self)
+        engine = await temporary_engine(self, directory / "migrated.db")
+        async with engine.connect() as connection:
+            migrated = await connection.run_sync(describe_schema)
+        expected_engine = create_engine(f"sqlite:///{directory / 'expected.db'}")
+        self.addCleanup(expected_engine.dispose)
+        SQLModel.metadata.create_all(expected_engine)
+        with expected_engine.connect() as connection:
+            expected = describe_schema(connection)
+        self.assertEqual(migrated, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
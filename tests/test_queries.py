@@ -0,0 +1,115 @@
+"""往期累计排行榜的名次与整表排序一致；项目列表接口的 SQL 条数不随数据量增长
+
+用法：python -m unittest tests.test_queries
+"""
+import unittest
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import event
+
+from main import app
+from sql.database import AsyncSession, get_session
+from sql.queries import all_ranking_of, all_ranking_top
+import sql.models as models
+from tests import temporary_engine
+
+
+# (学号, 累计答对数, 平均用时)，含答对数相同、平均用时也相同的并列
+STATS = [("s1", 5, 30.0), ("s2", 5, 20.0), ("s3", 7, 90.0), ("s4", 5, 20.0), ("s0", 5, 20.0), ("s5", 0, 0.0)]
+
+
+class AllRankingTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.engine = await temporary_engine(self)
+        async with AsyncSession(self.engine) as session:
+            for (student_id, total_correct_num, average) in STATS:
+                session.add(models.User(student_id=student_id, name=student_id, party_branch="b"))
+                session.add(models.UserStats(student_id=student_id, total_correct_num=total_correct_num,
+                                            average_time_used_seconds=average, record_num=1))
+            await session.commit()
+
+    async def test_rank_matches_top(self):
+        async with AsyncSession(self.engine) as session:
+            top = {row.student_id: row.rank for row in await all_ranking_top(session, len(STATS))}
+            self.assertEqual(top, {"s3": 1, "s0": 2, "s2": 3, "s4": 4, "s1": 5, "s5": 6})
+            for (student_id, rank) in top.items():
+                self.assertEqual((await all_ranking_of(session, student_id)).rank, rank)
+            self.assertIsNone(await all_ranking_of(session, "missing"))
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+class ProjectListQueryNumTest(unittest.IsolatedAsyncioTestCase):
+    """防止 N+1 查询回归：项目数、作答记录数增长时各列表接口执行的 SQL 条数不变"""
+
+    RECORDS_PER_PROJECT = 5
+    # 接口 -> 预期的 SQL 条数；造数据时已用同一管理员令牌请求过，管理员身份已在缓存中，鉴权不再查询
+    EXPECTED_QUERY_NUM = {
+        "/api/admin/projects": 1,
+        "/api/user/projects/all": 1,
+        "/api/user/projects/participate": 2,
+    }
+
+    async def asyncSetUp(self):
+        engine = await temporary_engine(self)
+
+        async def test_session():
+            async with AsyncSession(engine, expire_on_commit=False) as session:
+                yield session
+
+        app.dependency_overrides[get_session] = test_session
+        self.addCleanup(app.dependency_overrides.pop, get_session)
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+        self.addAsyncCleanup(self.client.aclose)
+        self.counter = QueryCounter()
+        event.listen(engine.sync_engine, "before_cursor_execute", self.counter)
+        self.addCleanup(event.remove, engine.sync_engine, "before_cursor_execute", self.counter)
+        await self.client.post("/api/admin/register", json={"username": "query_num", "password": "query_num"})
+        token = (await self.client.post("/api/admin/login", data={"username": "query_num", "password": "query_num"})
+                ).json()["data"]["access_token"]
+        self.headers = {"Authorization": f"Bearer {token}"}
+        for i in range(self.RECORDS_PER_PROJECT):
+            await self.client.post("/api/user", json={"name": f"n{i}", "student_id": f"s{i}", "party_branch": "b"})
+
+    async def seed(self, issue_num: int):
+        now = datetime.now()
+        project = {"name": f"第{issue_num}期", "issue_num": issue_num,
+                "starttime": str(now - timedelta(hours=1)), "deadline": str(now + timedelta(hours=1)),
+                "questions": [{"type": 0, "text": "t", "A": "a", "B": "b", "C": "c", "D": "d", "answer": "B"}]}
+        response = await self.client.post("/api/admin/project", json=project, headers=self.headers)
+        project_uuid = response.json()["data"]["project_uuid"]
+        response = await self.client.get(f"/api/admin/project/{project_uuid}", headers=self.headers)
+        question_id = response.json()["data"]["questions"][0]["id"]
+        for i in range(self.RECORDS_PER_PROJECT):
+            response = await self.client.post("/api/user/project", json={
+                "student_id": f"s{i}", "project_uuid": project_uuid, "time_used_seconds": "10",
+                "user_answers": [{"question_id": question_id, "user_answer": "B"}]})
+            self.assertEqual(response.status_code, 201, response.text)
+
+    async def test_query_num_constant(self):
+        seeded = 0
+        for project_num in (1, 4, 8):
+            for issue_num in range(seeded + 1, project_num + 1):
+                await self.seed(issue_num)
+            seeded = project_num
+            for (url, expected) in self.EXPECTED_QUERY_NUM.items():
+                #* 学生接口会把 Authorization 当作学生令牌校验，只给管理员接口带管理员令牌
+                headers = self.headers if url.startswith("/api/admin/") else {}
+                with self.subTest(url=url, project_num=project_num):
+                    self.counter.count = 0
+                    response = await self.client.get(url, headers=headers, params={"student_id": "s0"})
+                    self.assertEqual(response.status_code, 200, response.text)
+                    self.assertEqual(len(response.json()["data"]), project_num)
+                    self.assertEqual(self.counter.count, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""登录限流的令牌桶，以及在线程池中计算密码哈希
+
+用法：python -m unittest tests.test_rate_limit
+"""
+import asyncio
+import threading
+import unittest
+
+from utils.authorization import PasswordPool, PasswordPoolBusy
+from utils.rate_limit import RateLimiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class RateLimiterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        self.limiter = RateLimiter(rate_per_second=0.5, burst=2, clock=self.clock)
+
+    def test_rejects_when_empty(self):
+        self.assertEqual(self.limiter.acquire("a"), 0)
+        self.assertEqual(self.limiter.acquire("a"), 0)
+        self.assertAlmostEqual(self.limiter.acquire("a"), 2)
+        self.assertEqual(self.limiter.acquire("b"), 0)  # 各键的桶互不影响
+
+    def test_refill(self):
+        for _ in range(2):
+            self.limiter.acquire("a")
+        self.clock.now += 1
+        self.assertAlmostEqual(self.limiter.acquire("a"), 1)  # 补充了半个令牌，还需等 1 秒
+        self.clock.now += 1
+        self.assertEqual(self.limiter.acquire("a"), 0)
+
+    def test_refill_capped_at_burst(self):
+        self.limiter.acquire("a")
+        self.clock.now += 3600
+        self.assertEqual(self.limiter.acquire("a"), 0)
+        self.assertEqual(self.limiter.acquire("a"), 0)
+        self.assertGreater(self.limiter.acquire("a"), 0)
+
+
+class PasswordPoolTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.pool = PasswordPool(workers=1, max_pending=1)
+        self.addCleanup(self.pool._executor.shutdown)
+
+    async def test_hash_and_verify(self):
+        hashed_password = await self.pool.hash("secret")
+        self.assertTrue(await self.pool.verify("secret", hashed_password))
+        self.assertFalse(await self.pool.verify("wrong", hashed_password))
+
+    async def test_runs_in_worker_thread(self):
+        thread_name = await self.pool.run(lambda: threading.current_thread().name)
+        self.assertTrue(thread_name.startswith("password"))
+
+    async def test_rejects_when_busy(self):
+        """排队任务达到 max_pending 时直接拒绝，完成后恢复接受"""
+        release = threading.Event()
+        task = asyncio.create_task(self.pool.run(release.wait))
+        await asyncio.sleep(0)
+        with self.assertRaises(PasswordPoolBusy):
+            await self.pool.run(lambda: None)
+        release.set()
+        self.assertTrue(await task)
+        self.assertEqual(await self.pool.run(lambda: 1), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
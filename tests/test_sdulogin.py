@@ -0,0 +1,148 @@
+"""统一认证登录：在 benchmarks.fake_cas 上检验网页登录、REST 登录、短信绑定与错误处理
+
+用法：python -m unittest tests.test_sdulogin
+"""
+import unittest
+from unittest import mock
+
+import httpx
+from fastapi import FastAPI, HTTPException
+
+import benchmarks.fake_cas as fake_cas
+import routers.sdulogin as sdulogin
+from routers.sdulogin import CASClient, CASLoginAttempt, CASRestLogin, LoginStateStore, MemoryLoginStateStore
+from sql.database import get_session, AsyncSession
+from tests import temporary_engine
+
+
+SDUID = "202500000001"
+
+
+class FakeCASTestCase(unittest.IsolatedAsyncioTestCase):
+    """每个用例使用新的 fake CAS 配置与状态，统一认证客户端经 ASGI 直接调用 fake CAS"""
+
+    bind_required = False
+
+    async def asyncSetUp(self):
+        fake_cas.config = fake_cas.FakeCASConfig(bind_required=self.bind_required)
+        fake_cas.stats.clear()
+        for state in (fake_cas.login_pages, fake_cas.bound_devices, fake_cas.service_tickets,
+                    fake_cas.service_sessions, fake_cas.ticket_granting_tickets):
+            state.clear()
+        sdulogin.ticket_granting_tickets.clear()
+        self.cas = CASClient(transport=httpx.ASGITransport(app=fake_cas.app))
+
+    async def asyncTearDown(self):
+        await self.cas.aclose()
+
+    async def assertHTTPError(self, status_code: int, awaitable):
+        with self.assertRaises(HTTPException) as context:
+            await awaitable
+        self.assertEqual(context.exception.status_code, status_code)
+
+
+class ScrapeLoginTest(FakeCASTestCase):
+
+    async def scrape_login(self, password: str = fake_cas.FAKE_CAS_PASSWORD) -> dict:
+        attempt = CASLoginAttempt(self.cas, SDUID, password)
+        await attempt.fetch_login_page()
+        return await attempt.run()
+
+    async def test_login(self):
+        self.assertEqual(await self.scrape_login(), {"sduid": SDUID, "name": f"用户{SDUID}"})
+
+    async def test_wrong_password(self):
+        await self.assertHTTPError(400, self.scrape_login("wrong"))
+
+    async def test_login_page_reused(self):
+        """lt 只能使用一次，重复提交登录表单时统一认证返回登录页而不跳转"""
+        attempt = CASLoginAttempt(self.cas, SDUID, fake_cas.FAKE_CAS_PASSWORD)
+        await attempt.fetch_login_page()
+        await attempt.login()
+        await self.assertHTTPError(401, attempt.login())
+
+    async def test_service_unavailable(self):
+        fake_cas.config = fake_cas.FakeCASConfig(failure_rate=1)
+        await self.assertHTTPError(502, self.scrape_login())
+
+
+class SMSBindingTest(FakeCASTestCase):
+
+    bind_required = True
+
+    async def test_bind_then_login(self):
+        attempt = CASLoginAttempt(self.cas, SDUID, fake_cas.FAKE_CAS_PASSWORD)
+        await attempt.fetch_login_page()
+        self.assertEqual(await attempt.run(), {"status": "bind", "info": "2FA:138****0000"})
+        state = attempt.export_state()
+        self.assertIsNone(CASLoginAttempt.restore(self.cas, SDUID, "wrong", state))
+        attempt = CASLoginAttempt.restore(self.cas, SDUID, fake_cas.FAKE_CAS_PASSWORD, state)
+        await self.assertHTTPError(401, attempt.bind_device("000000"))
+        await attempt.bind_device(fake_cas.FAKE_CAS_SMS_CODE)
+        self.assertEqual((await attempt.run())["sduid"], SDUID)
+
+    async def test_routes(self):
+        """/user/login 要求短信验证，/user/msgcheck 接着同一次登录绑定设备并签发令牌"""
+        engine = await temporary_engine(self)
+
+        async def test_session():
+            async with AsyncSession(engine, expire_on_commit=False) as session:
+                yield session
+
+        app = FastAPI()
+        app.include_router(sdulogin.router, prefix="/api")
+        app.dependency_overrides[get_session] = test_session
+        app.state.cas_client = self.cas
+        app.state.cas_login_states = MemoryLoginStateStore()
+        form = {"sduid": SDUID, "password": fake_cas.FAKE_CAS_PASSWORD}
+        with mock.patch.object(sdulogin, "CAS_LOGIN_BACKEND", "scrape"):
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                response = await client.post("/api/user/login", data=form)
+                self.assertEqual(response.json(), {"status": "bind", "info": "2FA:138****0000"})
+                response = await client.post("/api/user/msgcheck", data=form | {"code": "000000"})
+                self.assertEqual(response.status_code, 401)
+                response = await client.post("/api/user/msgcheck", data=form | {"code": fake_cas.FAKE_CAS_SMS_CODE})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json()["sduid"], SDUID)
+                self.assertIn("access_token", response.json())
+        self.assertEqual(fake_cas.stats["/cas/login"], 2)  # 获取一次登录页，绑定后提交一次登录表单
+
+
+class RestLoginTest(FakeCASTestCase):
+
+    async def test_login_reuses_tgt(self):
+        for _ in range(2):
+            self.assertEqual(await CASRestLogin(self.cas, SDUID, fake_cas.FAKE_CAS_PASSWORD).run(),
+                            {"sduid": SDUID, "name": f"用户{SDUID}"})
+        self.assertEqual(fake_cas.stats["/cas/restlet/tickets"], 1)
+
+    async def test_expired_tgt(self):
+        """缓存的 TGT 已在统一认证失效时重新申请"""
+        login = CASRestLogin(self.cas, SDUID, fake_cas.FAKE_CAS_PASSWORD)
+        sdulogin.ticket_granting_tickets.put(login.key, "TGT-expired")
+        self.assertEqual((await login.run())["sduid"], SDUID)
+        self.assertNotEqual(sdulogin.ticket_granting_tickets.get(login.key), "TGT-expired")
+
+    async def test_wrong_password(self):
+        await self.assertHTTPError(401, CASRestLogin(self.cas, SDUID, "wrong").run())
+        self.assertEqual(len(sdulogin.ticket_granting_tickets), 0)
+
+    async def test_service_unavailable(self):
+        fake_cas.config = fake_cas.FakeCASConfig(failure_rate=1)
+        await self.assertHTTPError(502, CASRestLogin(self.cas, SDUID, fake_cas.FAKE_CAS_PASSWORD).run())
+
+
+class LoginStateStoreTest(unittest.TestCase):
+
+    def test_incomplete_store_not_instantiable(self):
+        class IncompleteStore(LoginStateStore):
+            async def get(self, sduid: str) -> dict | None:
+                return None
+
+        with self.assertRaises(TypeError):
+            IncompleteStore()
+        MemoryLoginStateStore()
+
+
+if __name__ == "__main__":
+    unittest.main()
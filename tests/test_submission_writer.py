@@ -0,0 +1,82 @@
+"""SubmissionWriter 合并提交时，出错的提交不影响同批次的其他提交
+
+用法：python -m unittest tests.test_submission_writer
+"""
+import asyncio
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+from sql.database import AsyncSession
+from sql.submission_writer import Submission, SubmissionWriter, DuplicateSubmission
+import sql.models as models
+from tests import temporary_engine
+
+
+def submission(student_id: str, project_uuid: str = "p1", time_used_seconds: float = 10.0,
+            idempotency_key: str | None = None) -> Submission:
+    return Submission(student_id=student_id, project_uuid=project_uuid, correct_num=1,
+                    time_used_seconds=time_used_seconds, answer="", valid_flag=True,
+                    idempotency_key=idempotency_key)
+
+
+class SubmissionWriterTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.engine = await temporary_engine(self)
+        now = datetime.now()
+        async with AsyncSession(self.engine) as session:
+            session.add(models.Admin(id=1, username="admin", hashed_password=""))
+            session.add(models.Project(uuid="p1", name="p", issue_num=1, starttime=now,
+                                    deadline=now + timedelta(days=1), status=1, creater_id=1))
+            session.add_all(models.User(student_id=f"s{i}", name=f"n{i}", party_branch="b") for i in range(6))
+            await session.commit()
+        #* 批次等待足够久，保证同时发出的提交落在同一批次
+        self.writer = SubmissionWriter(batch_size=16, batch_delay_ms=200)
+        self.writer.start(self.engine)
+
+    async def asyncTearDown(self):
+        await self.writer.stop()
+
+    async def submit(self, s: Submission):
+        async with AsyncSession(self.engine) as session:
+            return await self.writer.submit(s, session)
+
+    async def participate_num(self) -> int:
+        async with AsyncSession(self.engine) as session:
+            return (await session.get(models.Project, "p1")).participate_num
+
+    async def test_bad_submission_fails_alone(self):
+        with self.assertLogs("uvicorn.error", level="WARNING"):
+            results = await asyncio.gather(
+                self.submit(submission("s0")),
+                self.submit(submission("s1", time_used_seconds=float("nan"))),  # NaN 存为 NULL，违反 NOT NULL
+                self.submit(submission("s2", project_uuid="deleted")),  # 项目已被删除，违反外键
+                self.submit(submission("s3")),
+                self.submit(submission("s3")),
+                return_exceptions=True,
+            )
+        self.assertFalse(isinstance(results[0], Exception))
+        self.assertIsInstance(results[1], IntegrityError)
+        self.assertIsInstance(results[2], IntegrityError)
+        self.assertFalse(isinstance(results[3], Exception))
+        self.assertIsInstance(results[4], DuplicateSubmission)
+        self.assertEqual(await self.participate_num(), 2)
+
+    async def test_retry_replays_within_failed_batch(self):
+        first = await self.submit(submission("s4", idempotency_key="k4"))
+        with self.assertLogs("uvicorn.error", level="WARNING"):
+            results = await asyncio.gather(
+                self.submit(submission("s4", idempotency_key="k4")),
+                self.submit(submission("s5", time_used_seconds=float("nan"))),
+                return_exceptions=True,
+            )
+        self.assertEqual(results[0].record_id, first.record_id)
+        self.assertTrue(results[0].replayed)
+        self.assertIsInstance(results[1], IntegrityError)
+        self.assertEqual(await self.participate_num(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
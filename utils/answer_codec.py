@@ -0,0 +1,49 @@
+"""作答记录 Record.answer 的存储格式
+
+v1 格式："v1:" 后接按题目 id 升序排列、以逗号分隔的 "<题目id><选项位掩码的十六进制>"，
+如 "v1:12,2f" 表示题目 1 选 B、题目 2 选 ABCD，未作答的题目掩码为 0。
+"""
+import ast
+
+from utils.grading import OPTION_BITS, option_mask
+
+
+ANSWER_FORMAT_V1 = "v1:"
+
+
+def encode_answers(user_answers) -> str:
+    """user_answers 的每一项需有 question_id 与 user_answer 属性"""
+    masks = sorted((a.question_id, option_mask(a.user_answer)) for a in user_answers)
+    return ANSWER_FORMAT_V1 + ",".join(f"{question_id}{mask:x}" for (question_id, mask) in masks)
+
+
+def mask_to_options(mask: int) -> str:
+    return "".join(option for (option, bit) in OPTION_BITS.items() if mask & bit)
+
+
+def decode_answers(answer: str) -> list[dict]:
+    """解码为 [{"question_id": 1, "user_answer": "B"}, ...]"""
+    if not answer.startswith(ANSWER_FORMAT_V1):
+        return decode_legacy_answers(answer)  # 迁移完成前的旧格式兼容
+    body = answer[len(ANSWER_FORMAT_V1):]
+    if not body:
+        return []
+    return [
+        {"question_id": int(item[:-1]), "user_answer": mask_to_options(int(item[-1], 16))}
+        for item in body.split(",")
+    ]
+
+
+def decode_answer_masks(answer: str) -> dict[int, int]:
+    """解码为 {题目id: 选项位掩码}，供重新判分使用"""
+    if not answer.startswith(ANSWER_FORMAT_V1):
+        return {a["question_id"]: option_mask(a["user_answer"]) for a in decode_legacy_answers(answer)}
+    body = answer[len(ANSWER_FORMAT_V1):]
+    if not body:
+        return {}
+    return {int(item[:-1]): int(item[-1], 16) for item in body.split(",")}
+
+
+def decode_legacy_answers(answer: str) -> list[dict]:
+    """旧格式为 str(list[dict])，仅供迁移与兼容使用"""
+    return ast.literal_eval(answer)
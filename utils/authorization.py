@@ -1,20 +1,24 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Annotated
+from typing import Annotated, NamedTuple
 
 import jwt
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
+from fastapi.security import OAuth2PasswordBearer, HTTPBearer, HTTPAuthorizationCredentials
 from jwt.exceptions import InvalidTokenError
 from passlib.context import CryptContext
 from pydantic import BaseModel
 
-from sql.database import Session, get_session
+from sql.database import AsyncSession, get_session
 import sql.models as models
 
 
 from sqlmodel import select
 
 import utils.response_format as rf
+from utils.cache import TTLCache
 
 # to get a string like this run:
 # openssl rand -hex 32
@@ -41,6 +45,20 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     username: str | None = None
+    admin_id: int | None = None  # 旧版本签发的令牌没有 id
+
+
+class AdminPrincipal(NamedTuple):
+    """通过验证的管理员身份，路由只需要 id 与用户名，不必持有数据库中的 Admin 对象"""
+    id: int
+    username: str
+
+
+ADMIN_PRINCIPAL_CACHE_SIZE = int(os.getenv("ADMIN_PRINCIPAL_CACHE_SIZE", "256"))
+ADMIN_PRINCIPAL_TTL_SECONDS = float(os.getenv("ADMIN_PRINCIPAL_TTL_SECONDS", "60"))
+
+# username -> AdminPrincipal；管理员被删除时立即丢弃，其他进程中的缓存最迟在有效期后失效
+admin_principals = TTLCache(ADMIN_PRINCIPAL_CACHE_SIZE, ADMIN_PRINCIPAL_TTL_SECONDS)
 
 
 
@@ -59,6 +77,45 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(PASSWORD_HASH_WORKERS * 8)))
+
+
+class PasswordPoolBusy(Exception):
+    """等待计算的密码哈希过多"""
+
+
+class PasswordPool:
+    """在线程池中计算 bcrypt，避免每次 100~300 ms 的纯计算阻塞事件循环
+
+    bcrypt 计算时释放 GIL，线程数与 CPU 核数相同即可占满算力；
+    排队的任务超过 max_pending 时直接拒绝，不让登录请求无限堆积
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password")
+        self._pending = 0
+
+    async def run(self, func, *args):
+        if self._pending >= self.max_pending:
+            raise PasswordPoolBusy()
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self._pending -= 1
+
+    async def verify(self, plain_password, hashed_password) -> bool:
+        return await self.run(verify_password, plain_password, hashed_password)
+
+    async def hash(self, password) -> str:
+        return await self.run(get_password_hash, password)
+
+
+password_pool = PasswordPool()
+
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     if expires_delta:
@@ -81,28 +138,114 @@ def create_refresh_token(data: dict, expires_delta: timedelta | None = None):
     return encoded_jwt
 
 
-def admin_verify_token(token: Annotated[str, Depends(oauth2_scheme)], 
-                session: Session = Depends(get_session)):
+def admin_token_data(admin) -> dict:
+    """签发令牌时写入的声明，带上 id 使路由无需再按用户名查询管理员"""
+    return {"sub": admin.username, "id": admin.id}
+
+
+def decode_admin_token(token: str) -> TokenData | None:
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except InvalidTokenError:
+        return None
+    if payload.get("typ") == STUDENT_TOKEN_TYPE: # 学生令牌不能用于管理员接口
+        return None
+    username: str = payload.get("sub")
+    if username is None:
+        return None
+    return TokenData(username=username, admin_id=payload.get("id"))
+
+
+async def get_admin_principal(session: AsyncSession, token_data: TokenData) -> AdminPrincipal | None:
+    """优先使用缓存的管理员身份，未命中时查询一次并缓存
+
+    令牌中的 id 与库中同名管理员的 id 不一致时视为无效
+    """
+    principal = admin_principals.get(token_data.username)
+    if principal is None:
+        admin = (await session.exec(select(models.Admin).filter_by(username=token_data.username))).first()
+        if not admin:
+            return None
+        principal = AdminPrincipal(id=admin.id, username=admin.username)
+        admin_principals.put(principal.username, principal)
+    if token_data.admin_id is not None and token_data.admin_id != principal.id:
+        return None
+    return principal
+
+
+async def admin_verify_token(token: Annotated[str, Depends(oauth2_scheme)], 
+                session: AsyncSession = Depends(get_session)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="无效的身份验证凭据",
         headers={"WWW-Authenticate": "Bearer"})
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-            # return rf.res_401(message="无效的身份验证凭据")
-        token_data = TokenData(username=username)
-    except InvalidTokenError:
+    token_data = decode_admin_token(token)
+    if token_data is None:
         raise credentials_exception
         # return rf.res_401(message="无效的身份验证凭据")
-    user = session.exec(select(models.Admin).filter_by(username=token_data.username)).first()
-    if not user:
+    principal = await get_admin_principal(session, token_data)
+    if principal is None:
         raise credentials_exception
         # return rf.res_401(message="无效的身份验证凭据")
-    return user
+    return principal
 
 
+STUDENT_TOKEN_TYPE = "student"
+STUDENT_TOKEN_EXPIRE_MINUTES = int(os.getenv("STUDENT_TOKEN_EXPIRE_MINUTES", "120"))
+# 为 true 时学生接口必须带令牌，不再接受旧版客户端传来的学号参数
+STUDENT_TOKEN_REQUIRED = os.getenv("STUDENT_TOKEN_REQUIRED", "false").lower() in ("1", "true")
 
+student_bearer = HTTPBearer(auto_error=False, description="统一认证登录后签发的学生令牌")
 
+
+class StudentPrincipal(NamedTuple):
+    """已登录学生的身份，取自令牌声明"""
+    student_id: str
+    name: str
+    party_branch: str | None  # 尚未设置党支部信息时为 None
+
+
+def create_student_token(student: StudentPrincipal) -> str:
+    return create_access_token(
+        data={"typ": STUDENT_TOKEN_TYPE, "sub": student.student_id,
+            "name": student.name, "party_branch": student.party_branch},
+        expires_delta=timedelta(minutes=STUDENT_TOKEN_EXPIRE_MINUTES),
+    )
+
+
+def decode_student_token(token: str) -> StudentPrincipal | None:
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except InvalidTokenError:
+        return None
+    if payload.get("typ") != STUDENT_TOKEN_TYPE or payload.get("sub") is None:
+        return None
+    return StudentPrincipal(student_id=payload["sub"], name=payload.get("name", ""),
+                            party_branch=payload.get("party_branch"))
+
+
+async def student_token(credentials: Annotated[HTTPAuthorizationCredentials | None, Depends(student_bearer)]):
+    """请求带有学生令牌时返回其中的身份，不查询数据库；未带令牌时返回 None，由旧版客户端的学号参数识别"""
+    if credentials is None:
+        if STUDENT_TOKEN_REQUIRED:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="请先登录",
+                                headers={"WWW-Authenticate": "Bearer"})
+        return None
+    student = decode_student_token(credentials.credentials)
+    if student is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="无效的身份验证凭据",
+                            headers={"WWW-Authenticate": "Bearer"})
+    return student
+
+
+async def resolve_student(session: AsyncSession, student: StudentPrincipal | None,
+                        student_id: str | None) -> StudentPrincipal | None:
+    """带令牌时直接使用令牌中的身份；旧版客户端只传学号，查询一次用户"""
+    if student is not None:
+        return student
+    if student_id is None:
+        return None
+    user = await session.get(models.User, student_id)
+    if user is None:
+        return None
+    return StudentPrincipal(student_id=user.student_id, name=user.name, party_branch=user.party_branch)
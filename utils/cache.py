@@ -0,0 +1,98 @@
+import os
+import time
+from collections import OrderedDict
+
+
+PROJECT_PAYLOAD_CACHE_SIZE = int(os.getenv("PROJECT_PAYLOAD_CACHE_SIZE", "64"))
+# 最新一期项目 uuid 的缓存时长；本进程发布、修改、删除项目时立即失效，其他进程的改动最迟在此时长后生效
+LATEST_PROJECT_TTL_SECONDS = float(os.getenv("LATEST_PROJECT_TTL_SECONDS", "5"))
+
+
+class LRUCache:
+    """容量有限的进程内缓存，超出容量时淘汰最久未使用的项"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._items: OrderedDict = OrderedDict()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key):
+        value = self._items.get(key)
+        if value is not None:
+            self._items.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        if len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def discard(self, key):
+        self._items.pop(key, None)
+
+    def clear(self):
+        self._items.clear()
+
+
+class TTLCache(LRUCache):
+    """在 LRUCache 的基础上每项有有效期，过期的项在读取时丢弃
+
+    clock 为取当前时间（秒）的函数，测试中可传入假时钟
+    """
+
+    def __init__(self, maxsize: int, ttl_seconds: float, clock=time.monotonic):
+        super().__init__(maxsize)
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+
+    def get(self, key):
+        item = super().get(key)
+        if item is None:
+            return None
+        (expires_at, value) = item
+        if self.clock() >= expires_at:
+            self.discard(key)
+            return None
+        return value
+
+    def put(self, key, value, ttl_seconds: float | None = None):
+        ttl_seconds = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        super().put(key, (self.clock() + ttl_seconds, value))
+
+
+class ProjectPayloadCache:
+    """已序列化的项目详情（含题目与答案），按 (uuid, version) 缓存
+
+    缓存的是去掉外层花括号的 JSON 成员列表，状态、参与人数等随时变化的字段
+    以及用户的作答情况在响应时另行拼接，见 utils/response_format.py 的 res_200_spliced。
+    项目内容修改时版本号加 1，旧版本的缓存不再命中，随 LRU 淘汰。
+    """
+
+    def __init__(self, maxsize: int = PROJECT_PAYLOAD_CACHE_SIZE, latest_ttl_seconds: float = LATEST_PROJECT_TTL_SECONDS,
+                clock=time.monotonic):
+        self._payloads = LRUCache(maxsize)
+        #* 项目详情带版本号校验，其他进程修改后自然不再命中；最新一期的 uuid 无从校验，只能限定缓存时长
+        self._latest = TTLCache(1, latest_ttl_seconds, clock)
+
+    def get(self, project_uuid: str, version: int) -> bytes | None:
+        return self._payloads.get((project_uuid, version))
+
+    def put(self, project_uuid: str, version: int, payload: bytes):
+        self._payloads.put((project_uuid, version), payload)
+
+    @property
+    def latest_uuid(self) -> str | None:
+        """最新一期项目的 uuid，未缓存或已过期时为 None"""
+        return self._latest.get("latest")
+
+    def set_latest(self, project_uuid: str):
+        self._latest.put("latest", project_uuid)
+
+    def invalidate_latest(self):
+        self._latest.clear()
+
+
+project_payloads = ProjectPayloadCache()
@@ -0,0 +1,181 @@
+"""山大统一认证登录页 des.js 中 strEnc 的 Python 实现
+
+与原 JS 逐字节一致：数据与密钥按 UTF-16 码元每 4 个字符切成 64 位分组（不足补 0），
+每个分组依次用三个密钥的各个分组做 DES 加密，输出大写十六进制。
+原脚本的 PC-1 置换与标准 DES 不同，这里按原脚本的取位方式生成。
+
+下文置换表的下标均与原 JS 的位数组下标一致：第 0 位为分组的最高位。
+"""
+from functools import cache
+
+
+# 初始置换 IP，对应 initPermute
+IP = [0] * 64
+for i in range(4):
+    for k in range(8):
+        IP[i * 8 + k] = (7 - k) * 8 + 2 * i + 1
+        IP[i * 8 + k + 32] = (7 - k) * 8 + 2 * i
+
+# 逆初始置换，对应 finallyPermute
+FP = [0] * 64
+for (out_index, in_index) in enumerate(IP):
+    FP[in_index] = out_index
+
+# P 置换，对应 pPermute
+P = [15, 6, 19, 20, 28, 11, 27, 16, 0, 14, 22, 25, 4, 17, 30, 9,
+    1, 7, 23, 13, 31, 26, 2, 8, 18, 12, 29, 5, 21, 10, 3, 24]
+
+# 密钥置换选择 1，对应 generateKeys 中 key[i * 8 + j] = keyByte[8 * k + i]
+PC1 = [8 * (7 - j) + i for i in range(7) for j in range(8)]
+
+# 密钥置换选择 2，对应 generateKeys 中的 tempKey
+PC2 = [13, 16, 10, 23, 0, 4, 2, 27, 14, 5, 20, 9, 22, 18, 11, 3,
+    25, 7, 15, 6, 26, 19, 12, 1, 40, 51, 30, 36, 46, 54, 29, 39,
+    50, 44, 32, 47, 43, 48, 38, 55, 33, 52, 45, 41, 49, 35, 28, 31]
+
+KEY_SHIFTS = [1, 1, 2, 2, 2, 2, 2, 2, 1, 2, 2, 2, 2, 2, 2, 1]
+
+S_BOXES = [
+    [[14, 4, 13, 1, 2, 15, 11, 8, 3, 10, 6, 12, 5, 9, 0, 7],
+    [0, 15, 7, 4, 14, 2, 13, 1, 10, 6, 12, 11, 9, 5, 3, 8],
+    [4, 1, 14, 8, 13, 6, 2, 11, 15, 12, 9, 7, 3, 10, 5, 0],
+    [15, 12, 8, 2, 4, 9, 1, 7, 5, 11, 3, 14, 10, 0, 6, 13]],
+    [[15, 1, 8, 14, 6, 11, 3, 4, 9, 7, 2, 13, 12, 0, 5, 10],
+    [3, 13, 4, 7, 15, 2, 8, 14, 12, 0, 1, 10, 6, 9, 11, 5],
+    [0, 14, 7, 11, 10, 4, 13, 1, 5, 8, 12, 6, 9, 3, 2, 15],
+    [13, 8, 10, 1, 3, 15, 4, 2, 11, 6, 7, 12, 0, 5, 14, 9]],
+    [[10, 0, 9, 14, 6, 3, 15, 5, 1, 13, 12, 7, 11, 4, 2, 8],
+    [13, 7, 0, 9, 3, 4, 6, 10, 2, 8, 5, 14, 12, 11, 15, 1],
+    [13, 6, 4, 9, 8, 15, 3, 0, 11, 1, 2, 12, 5, 10, 14, 7],
+    [1, 10, 13, 0, 6, 9, 8, 7, 4, 15, 14, 3, 11, 5, 2, 12]],
+    [[7, 13, 14, 3, 0, 6, 9, 10, 1, 2, 8, 5, 11, 12, 4, 15],
+    [13, 8, 11, 5, 6, 15, 0, 3, 4, 7, 2, 12, 1, 10, 14, 9],
+    [10, 6, 9, 0, 12, 11, 7, 13, 15, 1, 3, 14, 5, 2, 8, 4],
+    [3, 15, 0, 6, 10, 1, 13, 8, 9, 4, 5, 11, 12, 7, 2, 14]],
+    [[2, 12, 4, 1, 7, 10, 11, 6, 8, 5, 3, 15, 13, 0, 14, 9],
+    [14, 11, 2, 12, 4, 7, 13, 1, 5, 0, 15, 10, 3, 9, 8, 6],
+    [4, 2, 1, 11, 10, 13, 7, 8, 15, 9, 12, 5, 6, 3, 0, 14],
+    [11, 8, 12, 7, 1, 14, 2, 13, 6, 15, 0, 9, 10, 4, 5, 3]],
+    [[12, 1, 10, 15, 9, 2, 6, 8, 0, 13, 3, 4, 14, 7, 5, 11],
+    [10, 15, 4, 2, 7, 12, 9, 5, 6, 1, 13, 14, 0, 11, 3, 8],
+    [9, 14, 15, 5, 2, 8, 12, 3, 7, 0, 4, 10, 1, 13, 11, 6],
+    [4, 3, 2, 12, 9, 5, 15, 10, 11, 14, 1, 7, 6, 0, 8, 13]],
+    [[4, 11, 2, 14, 15, 0, 8, 13, 3, 12, 9, 7, 5, 10, 6, 1],
+    [13, 0, 11, 7, 4, 9, 1, 10, 14, 3, 5, 12, 2, 15, 8, 6],
+    [1, 4, 11, 13, 12, 3, 7, 14, 10, 15, 6, 8, 0, 5, 9, 2],
+    [6, 11, 13, 8, 1, 4, 10, 7, 9, 5, 0, 15, 14, 2, 3, 12]],
+    [[13, 2, 8, 4, 6, 15, 11, 1, 10, 9, 3, 14, 5, 0, 12, 7],
+    [1, 15, 13, 8, 10, 3, 7, 4, 12, 5, 6, 11, 0, 14, 9, 2],
+    [7, 11, 4, 1, 9, 12, 14, 2, 0, 6, 10, 13, 15, 3, 5, 8],
+    [2, 1, 14, 7, 4, 10, 8, 13, 15, 12, 9, 0, 3, 5, 6, 11]],
+]
+
+
+def permute(value: int, table: list[int], in_bits: int) -> int:
+    """按置换表逐位取值，out[i] = in[table[i]]，只用于预计算"""
+    out = 0
+    for in_index in table:
+        out = (out << 1) | ((value >> (in_bits - 1 - in_index)) & 1)
+    return out
+
+
+def byte_tables(table: list[int], in_bits: int) -> list[list[int]]:
+    """把置换展开为按输入字节查表，置换时只需 in_bits // 8 次查表与按位或"""
+    tables = []
+    for byte_index in range(in_bits // 8):
+        shift = in_bits - 8 * (byte_index + 1)
+        tables.append([permute(v << shift, table, in_bits) for v in range(256)])
+    return tables
+
+
+IP_TABLES = byte_tables(IP, 64)
+FP_TABLES = byte_tables(FP, 64)
+
+# S 盒与 P 置换合并：SP_TABLES[m][6 位输入] 即第 m 个 S 盒的输出经 P 置换后的 32 位结果
+SP_TABLES = []
+for (m, box) in enumerate(S_BOXES):
+    sp = []
+    for chunk in range(64):
+        row = ((chunk >> 4) & 2) | (chunk & 1)
+        column = (chunk >> 1) & 0xF
+        sp.append(permute(box[row][column] << (28 - 4 * m), P, 32))
+    SP_TABLES.append(sp)
+
+
+def permute_64(value: int, tables: list[list[int]]) -> int:
+    return (tables[0][value >> 56] | tables[1][(value >> 48) & 0xFF]
+            | tables[2][(value >> 40) & 0xFF] | tables[3][(value >> 32) & 0xFF]
+            | tables[4][(value >> 24) & 0xFF] | tables[5][(value >> 16) & 0xFF]
+            | tables[6][(value >> 8) & 0xFF] | tables[7][value & 0xFF])
+
+
+def to_blocks(data: str) -> list[int]:
+    """按 UTF-16 码元每 4 个一组转换为 64 位分组，对应 getKeyBytes/strToBt"""
+    raw = data.encode("utf-16-be")
+    return [int.from_bytes(raw[i:i + 8].ljust(8, b"\0"), "big") for i in range(0, len(raw), 8)]
+
+
+@cache
+def block_key_schedule(key_block: int) -> tuple[tuple[int, ...], ...]:
+    """生成 16 轮子密钥，每轮子密钥预先拆为 8 个 6 位片段"""
+    key = permute(key_block, PC1, 64)
+    left, right = key >> 28, key & 0xFFFFFFF
+    round_keys = []
+    for shift in KEY_SHIFTS:
+        left = ((left << shift) | (left >> (28 - shift))) & 0xFFFFFFF
+        right = ((right << shift) | (right >> (28 - shift))) & 0xFFFFFFF
+        round_key = permute((left << 28) | right, PC2, 56)
+        round_keys.append(tuple((round_key >> (42 - 6 * m)) & 0x3F for m in range(8)))
+    return tuple(round_keys)
+
+
+@cache
+def key_schedules(first_key: str, second_key: str, third_key: str) -> tuple:
+    """按原脚本的取舍规则确定参与加密的密钥，并缓存整组子密钥"""
+    if first_key and second_key and third_key:
+        keys = (first_key, second_key, third_key)
+    elif first_key and second_key:
+        keys = (first_key, second_key)
+    elif first_key:
+        keys = (first_key,)
+    else:
+        raise ValueError("strEnc 至少需要第一个密钥")
+    return tuple(block_key_schedule(block) for key in keys for block in to_blocks(key))
+
+
+def encrypt_block(block: int, round_keys) -> int:
+    value = permute_64(block, IP_TABLES)
+    left, right = value >> 32, value & 0xFFFFFFFF
+    sp0, sp1, sp2, sp3, sp4, sp5, sp6, sp7 = SP_TABLES
+    for (k0, k1, k2, k3, k4, k5, k6, k7) in round_keys:
+        # 扩展置换 E：把 R 首尾相接后按 4 位步长取 8 个 6 位片段
+        e = ((right & 1) << 33) | (right << 1) | (right >> 31)
+        f = (sp0[((e >> 28) & 0x3F) ^ k0] | sp1[((e >> 24) & 0x3F) ^ k1]
+            | sp2[((e >> 20) & 0x3F) ^ k2] | sp3[((e >> 16) & 0x3F) ^ k3]
+            | sp4[((e >> 12) & 0x3F) ^ k4] | sp5[((e >> 8) & 0x3F) ^ k5]
+            | sp6[((e >> 4) & 0x3F) ^ k6] | sp7[(e & 0x3F) ^ k7])
+        left, right = right, left ^ f
+    return permute_64((right << 32) | left, FP_TABLES)
+
+
+def str_enc(data: str, first_key: str = "1", second_key: str = "2", third_key: str = "3") -> str:
+    """等价于 JS 中的 strEnc(data, firstKey, secondKey, thirdKey)"""
+    schedules = key_schedules(first_key, second_key, third_key)
+    enc_data = []
+    for block in to_blocks(data):
+        for round_keys in schedules:
+            block = encrypt_block(block, round_keys)
+        enc_data.append(f"{block:016X}")
+    return "".join(enc_data)
+
+
+def str_dec(data: str, first_key: str = "1", second_key: str = "2", third_key: str = "3") -> str:
+    """等价于 JS 中的 strDec，str_enc 的逆运算；解密时倒序使用各组子密钥"""
+    schedules = key_schedules(first_key, second_key, third_key)
+    raw = bytearray()
+    for i in range(0, len(data), 16):
+        block = int(data[i:i + 16], 16)
+        for round_keys in reversed(schedules):
+            block = encrypt_block(block, round_keys[::-1])
+        raw += block.to_bytes(8, "big")
+    return raw.decode("utf-16-be").rstrip("\0")
@@ -0,0 +1,74 @@
+"""作答记录导出的行格式
+
+CSV 面向表格软件，开头带 BOM 以便 Excel 识别 UTF-8；NDJSON 每行一个 JSON 对象，便于程序逐行处理。
+每次编码一批行，作答详情在编码时才解码。
+"""
+import csv
+import io
+from typing import Callable, NamedTuple
+
+from utils.answer_codec import decode_answers
+from utils.response_format import dumps
+
+
+CSV_HEADER = ["记录ID", "学号", "姓名", "党支部", "答对数", "用时（秒）", "是否有效", "作答"]
+
+
+def answer_sheet(answer: str) -> list[dict] | None:
+    try:
+        return decode_answers(answer)
+    except (ValueError, SyntaxError):
+        return None  # 无法解析的旧格式记录
+
+
+def csv_text(value: str) -> str:
+    # 以 = + - @ 开头的单元格会被表格软件当作公式执行
+    return "'" + value if value[:1] in ("=", "+", "-", "@") else value
+
+
+def csv_lines(rows) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def csv_batch(rows) -> bytes:
+    def answer_text(answer: str) -> str:
+        sheet = answer_sheet(answer)
+        if sheet is None:
+            return ""
+        return " ".join(f"{a['question_id']}:{a['user_answer']}" for a in sheet)
+
+    return csv_lines(
+        [row.record_id, csv_text(row.student_id), csv_text(row.name), csv_text(row.party_branch),
+         row.correct_num, row.time_used_seconds, "有效" if row.valid_flag else "超期", answer_text(row.answer)]
+        for row in rows
+    )
+
+
+def ndjson_batch(rows) -> bytes:
+    return b"".join(
+        dumps({
+            "record_id": row.record_id,
+            "student_id": row.student_id,
+            "name": row.name,
+            "party_branch": row.party_branch,
+            "correct_num": row.correct_num,
+            "time_used_seconds": row.time_used_seconds,
+            "valid_flag": row.valid_flag,  # False 为截止后的超期作答
+            "record": answer_sheet(row.answer),
+        }) + b"\n"
+        for row in rows
+    )
+
+
+class ExportFormat(NamedTuple):
+    media_type: str
+    header: bytes
+    encode_batch: Callable[[list], bytes]
+
+
+EXPORT_FORMATS = {
+    "csv": ExportFormat("text/csv; charset=utf-8", "\ufeff".encode("utf-8") + csv_lines([CSV_HEADER]), csv_batch),
+    "ndjson": ExportFormat("application/x-ndjson", b"", ndjson_batch),
+}
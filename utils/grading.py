@@ -0,0 +1,78 @@
+OPTION_BITS = {"A": 1, "B": 2, "C": 4, "D": 8}
+
+
+class GradingError(ValueError):
+    """提交的答案无法判分（题目不属于该项目、选项非法等）"""
+
+
+def option_mask(answer: str) -> int:
+    """把形如 'ABD' 的答案转换为选项位掩码，A~D 依次对应第 0~3 位"""
+    mask = 0
+    for option in answer:
+        bit = OPTION_BITS.get(option)
+        if bit is None:
+            raise GradingError(f"非法选项：{option}")
+        mask |= bit
+    return mask
+
+
+class AnswerKey:
+    """单期项目编译后的答案，question_id -> 正确选项位掩码
+
+    version 与编译时 Project.version 一致，版本不同说明答案已被修改，需要重新编译
+    """
+
+    def __init__(self, project_uuid: str, masks: dict[int, int], version: int = 1):
+        self.project_uuid = project_uuid
+        self.masks = masks
+        self.version = version
+
+    def grade(self, user_answers) -> int:
+        """对一份答卷判分，返回答对题数
+
+        user_answers 的每一项需有 question_id 与 user_answer 属性
+        """
+        correct_num = 0
+        answered = set()
+        for a in user_answers:
+            correct_mask = self.masks.get(a.question_id)
+            if correct_mask is None:
+                raise GradingError(f"题目 {a.question_id} 不属于该项目")
+            if a.question_id in answered:
+                raise GradingError(f"题目 {a.question_id} 重复作答")
+            answered.add(a.question_id)
+            if option_mask(a.user_answer) == correct_mask:
+                correct_num += 1
+        return correct_num
+
+    def regrade(self, answer_masks: dict[int, int]) -> int:
+        """按当前答案重新判分已存储的答卷，已被删除的题目不再计分"""
+        return sum(1 for (question_id, mask) in answer_masks.items() if self.masks.get(question_id) == mask)
+
+
+def compile_answer_key(project_uuid: str, questions, version: int = 1) -> AnswerKey:
+    """questions 的每一项需有 id 与 answer 属性"""
+    return AnswerKey(project_uuid, {q.id: option_mask(q.answer) for q in questions}, version)
+
+
+class AnswerKeyCache:
+    """进程内的答案缓存，项目发布/更新时写入，删除时丢弃"""
+
+    def __init__(self):
+        self._keys: dict[str, AnswerKey] = {}
+
+    def get(self, project_uuid: str, version: int | None = None) -> AnswerKey | None:
+        """指定 version 时，缓存的答案版本不一致视为未命中"""
+        answer_key = self._keys.get(project_uuid)
+        if answer_key is None or (version is not None and answer_key.version != version):
+            return None
+        return answer_key
+
+    def put(self, answer_key: AnswerKey):
+        self._keys[answer_key.project_uuid] = answer_key
+
+    def discard(self, project_uuid: str):
+        self._keys.pop(project_uuid, None)
+
+
+answer_keys = AnswerKeyCache()
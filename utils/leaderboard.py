@@ -0,0 +1,148 @@
+import os
+import time
+from bisect import bisect_left, insort
+
+from utils.cache import TTLCache
+
+
+# 最新一期项目信息的缓存时长；过期后重新查询，其他进程发布新一期或写入作答记录最迟在此时长后反映到排行榜
+LEADERBOARD_REFRESH_SECONDS = float(os.getenv("LEADERBOARD_REFRESH_SECONDS", "5"))
+
+
+class ProjectLeaderboard:
+    """单期项目的有序排行榜
+
+    排序键为 (-correct_num, time_used_seconds, record_id)，
+    正确数多者在前，用时少者在前，并列时按答题（记录创建）顺序排。
+    """
+
+    def __init__(self, project_uuid: str):
+        self.project_uuid = project_uuid
+        self._keys: list[tuple[int, float, int]] = []  # 有序排序键
+        self._entries: dict[int, dict] = {}  # record_id -> 排行榜条目
+        self._student_keys: dict[str, tuple[int, float, int]] = {}  # student_id -> 排序键
+        self.stamp: tuple[int, int] | None = None  # 加载时项目的 (version, participate_num)，随增量插入累加
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, record_id: int, student_id: str, name: str, party_branch: str,
+            correct_num: int, time_used_seconds: float):
+        """插入一条有效作答记录；记录已存在时返回 False
+
+        二分定位插入位置为 O(log n)，但列表插入需移动其后的元素，整体为 O(n)；
+        单期参与人数在数千量级，移动只是一次内存拷贝，开销可忽略
+        """
+        if record_id in self._entries:
+            return False
+        key = (-correct_num, time_used_seconds, record_id)
+        insort(self._keys, key)
+        self._student_keys[student_id] = key
+        self._entries[record_id] = {
+            "student_id": student_id,
+            "name": name,
+            "party_branch": party_branch,
+            "correct_num": correct_num,
+            "time_used_seconds": time_used_seconds,
+        }
+        if self.stamp is not None:
+            self.stamp = (self.stamp[0], self.stamp[1] + 1)
+        return True
+
+    def update_student(self, student_id: str, name: str, party_branch: str):
+        key = self._student_keys.get(student_id)
+        if key is None:
+            return
+        entry = self._entries[key[2]]
+        entry["name"] = name
+        entry["party_branch"] = party_branch
+
+    def top(self, n: int = 30) -> list[dict]:
+        return [
+            {**self._entries[key[2]], "rank": i + 1}
+            for (i, key) in enumerate(self._keys[:n])
+        ]
+
+    def rank_of(self, student_id: str) -> dict:
+        """返回该学生的排名条目，未上榜返回空字典"""
+        key = self._student_keys.get(student_id)
+        if key is None:
+            return {}
+        return {**self._entries[key[2]], "rank": bisect_left(self._keys, key) + 1}
+
+
+class LeaderboardRegistry:
+    """进程内的排行榜注册表
+
+    排行榜在首次查询时从数据库整体加载，此后由提交答案接口增量维护；
+    项目被更新或删除时丢弃对应排行榜，下次查询重新加载。
+    其他进程的写入本进程无从得知：最新一期项目的信息只缓存 LEADERBOARD_REFRESH_SECONDS 秒，
+    重新查询时丢弃往期排行榜，以及 (version, participate_num) 与数据库不一致的排行榜。
+    """
+
+    def __init__(self, refresh_seconds: float = LEADERBOARD_REFRESH_SECONDS, clock=time.monotonic):
+        self._boards: dict[str, ProjectLeaderboard] = {}
+        self._loading: dict[str, ProjectLeaderboard] = {}  # 正在从数据库加载的排行榜
+        self._latest = TTLCache(1, refresh_seconds, clock)  # 最新一期项目的 (基本信息, (version, participate_num))
+
+    @property
+    def latest_project(self) -> dict | None:
+        """最新一期项目的基本信息，未缓存或已过期时为 None"""
+        latest = self._latest.get("latest")
+        return None if latest is None else latest[0]
+
+    def set_latest(self, latest_project: dict, version: int, participate_num: int):
+        stamp = (version, participate_num)
+        self._latest.put("latest", (latest_project, stamp))
+        for (project_uuid, board) in list(self._boards.items()):
+            if project_uuid != latest_project["project_uuid"] or board.stamp != stamp:
+                del self._boards[project_uuid]
+
+    def get(self, project_uuid: str) -> ProjectLeaderboard | None:
+        return self._boards.get(project_uuid)
+
+    async def load(self, project_uuid: str, rows) -> ProjectLeaderboard:
+        """rows 为按名次排好序的异步可迭代行，需包含 record_id、student_id、name、party_branch、correct_num、time_used_seconds 列
+
+        加载期间提交的记录同样写入正在加载的排行榜，按 record_id 去重；
+        若加载期间项目被更新或删除，加载结果只用于本次请求，不再缓存。
+        """
+        board = ProjectLeaderboard(project_uuid)
+        latest = self._latest.get("latest")
+        stamp = latest[1] if latest is not None and latest[0]["project_uuid"] == project_uuid else None
+        self._loading[project_uuid] = board
+        try:
+            async for row in rows:
+                board.add(row.record_id, row.student_id, row.name, row.party_branch,
+                        row.correct_num, row.time_used_seconds)
+        finally:
+            still_valid = self._loading.get(project_uuid) is board
+            if still_valid:
+                del self._loading[project_uuid]
+        if still_valid:
+            #* 加载期间其他进程写入的记录未计入 stamp，下次刷新时与数据库不一致，重新加载
+            board.stamp = stamp
+            self._boards[project_uuid] = board
+        return board
+
+    def add_record(self, project_uuid: str, record_id: int, student_id: str, name: str,
+                party_branch: str, correct_num: int, time_used_seconds: float):
+        """排行榜已加载时增量插入；未加载时忽略，下次加载会从数据库读到该记录"""
+        for board in (self._boards.get(project_uuid), self._loading.get(project_uuid)):
+            if board is not None:
+                board.add(record_id, student_id, name, party_branch, correct_num, time_used_seconds)
+
+    def update_student(self, student_id: str, name: str, party_branch: str):
+        for board in (*self._boards.values(), *self._loading.values()):
+            board.update_student(student_id, name, party_branch)
+
+    def discard(self, project_uuid: str):
+        self._boards.pop(project_uuid, None)
+        self._loading.pop(project_uuid, None)
+        self._latest.clear()
+
+    def invalidate_latest(self):
+        self._latest.clear()
+
+
+leaderboards = LeaderboardRegistry()
@@ -0,0 +1,40 @@
+"""按键（用户名、IP 等）限流的令牌桶
+
+每个键一个桶，以 rate_per_second 的速度补充、最多存 burst 个令牌，每次请求消耗一个；
+桶的数量有上限，最久未用的先淘汰（被淘汰的键下次请求时视为满桶）。
+clock 为取当前时间（秒）的函数，测试中可传入假时钟。
+"""
+import time
+
+from utils.cache import LRUCache
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated_at")
+
+    def __init__(self, tokens: float, updated_at: float):
+        self.tokens = tokens
+        self.updated_at = updated_at
+
+
+class RateLimiter:
+    def __init__(self, rate_per_second: float, burst: int, maxsize: int = 10000, clock=time.monotonic):
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.clock = clock
+        self._buckets = LRUCache(maxsize)
+
+    def acquire(self, key) -> float:
+        """消耗一个令牌；允许时返回 0，否则返回需要等待的秒数"""
+        now = self.clock()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.burst, now)
+            self._buckets.put(key, bucket)
+        else:
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated_at) * self.rate_per_second)
+            bucket.updated_at = now
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            return 0
+        return (1 - bucket.tokens) / self.rate_per_second
@@ -1,5 +1,19 @@
+import json
+import math
 from fastapi import status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+
+
+def dumps(content) -> bytes:
+    """与 JSONResponse 相同的序列化方式"""
+    return json.dumps(content, ensure_ascii=False, allow_nan=False,
+                    indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def json_fields(data: dict) -> bytes:
+    """序列化为去掉外层花括号的 JSON 成员列表，供 res_200_spliced 拼接"""
+    return dumps(data)[1:-1]
+
 
 def res_200(message = "请求成功", data = None):
     return JSONResponse(status_code=status.HTTP_200_OK, 
@@ -59,4 +73,28 @@ def res_404(message = "未找到资源", data = None):
                             "status": 'failure',
                             "message": message,
                             "data": data
-                        })
\ No newline at end of file
+                        })
+
+
+def res_429(message = "请求过于频繁", data = None, retry_after: float = 1):
+    return JSONResponse(status_code=status.HTTP_429_TOO_MANY_REQUESTS, 
+                        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+                        content={
+                            "code": 429,
+                            "status": 'failure',
+                            "message": message,
+                            "data": data
+                        })
+
+
+def res_200_spliced(message = "请求成功", *fields: bytes):
+    """data 由若干 json_fields 的结果拼接而成，已缓存的部分无需重新序列化"""
+    envelope = dumps({
+        "code": 200,
+        "status": 'success',
+        "message": message,
+        "data": None
+    })
+    body = b",".join(field for field in fields if field)
+    return Response(status_code=status.HTTP_200_OK, media_type="application/json",
+                    content=envelope[:-len(b"null}")] + b"{" + body + b"}}")
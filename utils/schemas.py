@@ -1,4 +1,5 @@
 from unittest.mock import Base
+import math
 from pydantic import BaseModel, Field
 from uuid import UUID
 from datetime import datetime
@@ -19,9 +20,9 @@ class AdminLoginRequest(BaseModel):
 
 
 class UserChangePartyBranchRequest(BaseModel):
-    name: str = Field(description="姓名",
+    name: str | None = Field(default=None, description="姓名，带学生令牌时取自令牌，可不填",
                 examples=["张三"])
-    student_id: str = Field(description="学号",
+    student_id: str | None = Field(default=None, description="学号，带学生令牌时取自令牌，可不填",
                 examples=["202500996677"])
     party_branch: str = Field(description="党支部名称",
                 examples=["控制科学与工程学院党支部"])
@@ -41,6 +42,7 @@ class QuestionCreateRequest(BaseModel):
     D: str = Field(description="选项D",
                     examples=["1923"])
     answer: str = Field(description="正确答案，字符串格式，单选形如'A'，多选形如'ABD'",
+                    pattern=r"^[A-D]+$",
                     examples=["B"])
     
 
@@ -77,6 +79,12 @@ class ProjectCreateRequest(BaseModel):
 #                                                     default_factory=list)
 
 
+class QuestionUpdateRequest(QuestionCreateRequest):
+    id: int | None = Field(default=None,
+                    description="问题ID，修改已有题目时填写，新增题目不填；全部不填时题目数须与已有题目相同，按顺序对应",
+                    examples=[1])
+
+
 class ProjectUpdateRequest(BaseModel):
     name: str = Field(description="项目名称",
                     examples=["2026年第6期党建知识问答"])
@@ -86,7 +94,7 @@ class ProjectUpdateRequest(BaseModel):
                     examples=["2026-06-01 09:00:00"])
     deadline: datetime = Field(description="项目截止时间",
                     examples=["2026-06-30 18:00:00"])
-    questions: list[QuestionCreateRequest] = Field(description="项目问题列表", 
+    questions: list[QuestionUpdateRequest] = Field(description="项目问题列表，未列出的已有题目会被删除", 
                                                 default_factory=list)
     
 
@@ -98,8 +106,23 @@ class CommitAnswer(BaseModel):
     
 
 class CommitAnswerRequest(BaseModel):
-    student_id: str = Field(description="学号", examples=["202500996677"])
+    student_id: str | None = Field(default=None, description="学号，已废弃，改用学生令牌",
+                                    deprecated=True, examples=["202500996677"])
     project_uuid: str = Field(description="项目ID", examples=["4ddc1160-0bcb-11f0-a3a7-a340c0b22593"])
     time_used_seconds: str = Field(description="用时（秒）", examples=["111.22"])
-    correct_num: int = Field(description="答对数量", examples=[15])
-    user_answers: list[CommitAnswer] = Field(description="答案列表", default_factory=list)
\ No newline at end of file
+    correct_num: int | None = Field(default=None, description="答对数量，已废弃，由服务端判分",
+                                    deprecated=True, examples=[15])
+    user_answers: list[CommitAnswer] = Field(description="答案列表", default_factory=list)
+    idempotency_key: str | None = Field(default=None, max_length=64,
+                                        description="提交标识，网络不稳定重试时带上同一标识可取回首次提交的结果",
+                                        examples=["9b2f0c1e-5d7a-4c8e-a1f3-6e2d9c4b7a10"])
+
+    def parse_time_used_seconds(self) -> float:
+        """用时须为有限的非负数，否则抛出 ValueError；字段保持字符串以兼容旧客户端"""
+        try:
+            value = float(self.time_used_seconds)
+        except ValueError:
+            raise ValueError("用时格式错误")
+        if not math.isfinite(value) or value < 0:
+            raise ValueError("用时须为非负数")
+        return value
\ No newline at end of file